@@ -1,6 +1,13 @@
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+# --profile-startup times the imports and the window setup, so it starts before them
+if "--profile-startup" in sys.argv:
+    sys.argv.remove("--profile-startup")
+    from utils import startup_profile
+    startup_profile.enable()
+
 from src.main import main
 
 if __name__ == "__main__":
@@ -0,0 +1,63 @@
+"""
+Storage and restore cost of the chapter history: 1,000 snapshots of a
+chapter where each snapshot edits one paragraph, then 1,000 unchanged ones.
+
+    python benchmarks/bench_chapter_history.py [snapshots]
+"""
+import os
+import sys
+import time
+import zlib
+import random
+import shutil
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from utils.chapter_history import ChapterHistory
+
+WORDS = (
+    "el viento soplaba con fuerza sobre los tejados de la ciudad mientras "
+    "Kuno caminaba sin rumbo buscando una respuesta que nadie le daría"
+).split()
+
+def paragraph(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 80))).capitalize() + "."
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rng = random.Random(7)
+    paragraphs = [paragraph(rng) for _ in range(150)]
+    project_path = tempfile.mkdtemp(prefix="kuno_bench_")
+    try:
+        history = ChapterHistory(project_path)
+        start = time.perf_counter()
+        for _ in range(count):
+            paragraphs[rng.randrange(len(paragraphs))] = paragraph(rng)
+            history.snapshot("Capítulo 1.txt", "\n".join(paragraphs), force=True)
+        elapsed = time.perf_counter() - start
+
+        content = "\n".join(paragraphs).encode('utf-8')
+        log_size = os.path.getsize(history.log_path("Capítulo 1.txt"))
+        print(f"snapshots:                {count} in {elapsed:.2f} s")
+        print(f"one copy (raw / zlib):    {len(content) / 1024:8.1f} KB / {len(zlib.compress(content)) / 1024:8.1f} KB")
+        print(f"history (chunks + log):   {history.store.size() / 1024:8.1f} KB + {log_size / 1024:.1f} KB")
+        print(f"naive full copies:        {count * len(content) / 1024:8.1f} KB")
+
+        before = history.store.size()
+        for _ in range(count):
+            history.snapshot("Capítulo 1.txt", "\n".join(paragraphs), force=True)
+        print(f"{count} unchanged snapshots: +{(history.store.size() - before) / 1024:.1f} KB")
+
+        for index in (0, count // 2, count - 1):
+            start = time.perf_counter()
+            fresh = ChapterHistory(project_path)
+            text = fresh.restore("Capítulo 1.txt", index)
+            print(f"restore #{index:<5} (cold)     {(time.perf_counter() - start) * 1000:8.2f} ms, {len(text)} chars")
+        assert text == "\n".join(paragraphs)
+    finally:
+        shutil.rmtree(project_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Startup cost of the spellcheck dictionary: spylls parse vs compiled snapshot,
+and spylls suggest() vs the symmetric-delete suggestion index.
+
+    python benchmarks/bench_dictionary_startup.py [base_path]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from spylls.hunspell import Dictionary
+from utils.dictionary_snapshot import DictionarySnapshot, compile_snapshot, snapshot_path
+from utils.suggestion_index import SuggestionIndex, compile_index
+
+TYPOS = ["caminavamos", "cancion", "hloa", "erorr", "palabraz", "desafortunadamnete"]
+
+SAMPLE = (
+    "El niño caminaba hacia la ciudad mientras cantábamos canciones antiguas "
+    "desafortunadamente nadie escuchó dígamelo rápidamente señor erorr palabraz"
+).split()
+
+def timed(label, fn, repeat=1):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<32} {best * 1000:10.2f} ms")
+    return result
+
+def main():
+    base = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "diccionarios", "es")
+
+    dictionary = timed("spylls Dictionary.from_files", lambda: Dictionary.from_files(base))
+    if DictionarySnapshot.open(base) is None:
+        timed("compile_snapshot", lambda: compile_snapshot(base, dictionary))
+    print(f"snapshot size: {os.path.getsize(snapshot_path(base)) / 1e6:.1f} MB")
+
+    snapshot = timed("DictionarySnapshot.open", lambda: DictionarySnapshot.open(base), repeat=5)
+    print(f"snapshot words: {len(snapshot)}")
+
+    timed(f"spylls lookup x{len(SAMPLE)}", lambda: [dictionary.lookup(w) for w in SAMPLE], repeat=5)
+    timed(f"snapshot lookup x{len(SAMPLE)}", lambda: [snapshot.lookup(w) for w in SAMPLE], repeat=5)
+
+    mismatches = [w for w in SAMPLE if dictionary.lookup(w) != snapshot.lookup(w)]
+    print(f"verdict mismatches: {mismatches or 'none'}")
+    snapshot.close()
+
+    if SuggestionIndex.open(base) is None:
+        timed("compile_index", lambda: compile_index(base))
+    index = timed("SuggestionIndex.open", lambda: SuggestionIndex.open(base), repeat=5)
+    for typo in TYPOS:
+        # Fresh index per run so the recent-query cache does not hide the cost
+        fresh = SuggestionIndex.open(base)
+        suggestions = timed(f"index suggest {typo}", lambda: fresh.suggest(typo))
+        print(f"    {suggestions}")
+        fresh.close()
+    timed(f"spylls suggest {TYPOS[0]}", lambda: list(dictionary.suggest(TYPOS[0])))
+    index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Per-keystroke cost of the editor statistics: full recount of toPlainText()
+vs DocumentStats' per-block bookkeeping, on chapters of growing size.
+"insert only" is QTextDocument's own cost for the same keystrokes; the stats
+overhead is each column minus that one.
+
+    python benchmarks/bench_document_stats.py
+"""
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QTextDocument, QTextCursor
+from utils.document_stats import DocumentStats
+
+PARAGRAPH = (
+    "El viento soplaba con fuerza sobre los tejados de la ciudad mientras "
+    "Kuno caminaba sin rumbo buscando una respuesta que nadie le daría."
+)
+KEYSTROKES = 200
+
+def full_recount(document):
+    """What NovelEditor.update_stats did before DocumentStats"""
+    text = document.toPlainText()
+    chapters = len(re.findall(r'^(Capítulo|Chapter|#)', text, re.MULTILINE | re.IGNORECASE))
+    return len(text.split()), len(text), chapters
+
+def build_text(words):
+    paragraphs = []
+    per_paragraph = len(PARAGRAPH.split())
+    for number in range(words // per_paragraph):
+        if number % 50 == 0:
+            paragraphs.append(f"Capítulo {number // 50 + 1}")
+        paragraphs.append(PARAGRAPH)
+    return "\n".join(paragraphs)
+
+def type_keystrokes(document, on_keystroke):
+    """Types in the middle of the document, with a new paragraph every 20 keys"""
+    cursor = QTextCursor(document)
+    cursor.setPosition(document.characterCount() // 2)
+    start = time.perf_counter()
+    for key in range(KEYSTROKES):
+        cursor.insertText("\n" if key % 20 == 19 else "a")
+        on_keystroke()
+    return (time.perf_counter() - start) / KEYSTROKES
+
+def new_document(words):
+    document = QTextDocument()
+    # contentsChange is only emitted once the document has a layout
+    document.documentLayout()
+    document.setPlainText(build_text(words))
+    return document
+
+def main():
+    app = QApplication(sys.argv)
+    print(f"{'words':>8} {'insert only':>14} {'full recount':>14} {'DocumentStats':>14}")
+    for words in (10000, 50000, 100000):
+        document = new_document(words)
+        baseline = type_keystrokes(document, lambda: None)
+
+        document = new_document(words)
+        full = type_keystrokes(document, lambda: full_recount(document))
+
+        document = new_document(words)
+        stats = DocumentStats(document)
+        incremental = type_keystrokes(document, stats.totals)
+
+        if stats.totals() != full_recount(document):
+            print(f"    mismatch: {stats.totals()} != {full_recount(document)}")
+        print(f"{words:>8} {baseline * 1000:11.3f} ms {full * 1000:11.3f} ms {incremental * 1000:11.3f} ms")
+
+if __name__ == "__main__":
+    main()
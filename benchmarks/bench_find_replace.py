@@ -0,0 +1,89 @@
+"""
+Project-wide find and replace on a generated project (1,000 chapters of
+1,500 words): time to stream every match, longest stall of the event loop
+meanwhile, and time to write the replacements as one batch.
+
+    python benchmarks/bench_find_replace.py [chapters] [words per chapter]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QCoreApplication
+from utils.chapter_manager import ChapterManager
+from utils.find_replace import FindWorker, ReplaceWorker, compile_pattern
+
+WORDS = (
+    "de la que el en y a los se del las un por con no una su para es al lo "
+    "como más pero sus le ya o este sí porque esta entre cuando muy sin sobre "
+    "camino noche ciudad Marta puerta silencio mar viento luz casa"
+).split()
+
+def run(app, worker):
+    """Runs worker to the end, returning (seconds, longest event loop stall)"""
+    start = time.perf_counter()
+    worker.start()
+    last = time.perf_counter()
+    stall = 0.0
+    while not worker.isFinished():
+        app.processEvents()
+        now = time.perf_counter()
+        stall = max(stall, now - last)
+        last = now
+        time.sleep(0.001)
+    app.processEvents()
+    return time.perf_counter() - start, stall
+
+def search(app, chapter_manager, text, replacement, regex=False):
+    pattern = compile_pattern(text, regex, whole_word=not regex)
+    found = {}
+    worker = FindWorker(chapter_manager, chapter_manager.get_chapters(), pattern, replacement, regex)
+    worker.chapter_found.connect(lambda filename, text_hash, count, previews: found.update({filename: (text_hash, count)}))
+    elapsed, stall = run(app, worker)
+    return pattern, found, elapsed, stall
+
+def main():
+    app = QCoreApplication(sys.argv)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    words_per_chapter = int(sys.argv[2]) if len(sys.argv) > 2 else 1500
+    rng = random.Random(11)
+
+    project_path = tempfile.mkdtemp(prefix="kuno_bench_")
+    try:
+        chapters_dir = os.path.join(project_path, "chapters")
+        os.makedirs(chapters_dir)
+        for number in range(1, count + 1):
+            text = " ".join(rng.choice(WORDS) for _ in range(words_per_chapter))
+            with open(os.path.join(chapters_dir, f"Capítulo {number}.txt"), 'w', encoding='utf-8') as f:
+                f.write(text)
+        chapter_manager = ChapterManager(project_path)
+        print(f"{count} chapters, {count * words_per_chapter:,} words")
+
+        for text, replacement, regex in (("Marta", "Lucía", False), ("de", "del", False), (r"(\w+) y (\w+)", r"\2 y \1", True)):
+            pattern, found, elapsed, stall = search(app, chapter_manager, text, replacement, regex)
+            matches = sum(entry[1] for entry in found.values())
+            print(f"find {text!r:18} {elapsed * 1000:8.0f} ms, {matches:>9,} matches in {len(found)} chapters, "
+                  f"longest stall {stall * 1000:.0f} ms")
+
+        pattern, found, _, _ = search(app, chapter_manager, "Marta", "Lucía")
+        worker = ReplaceWorker(chapter_manager, pattern, "Lucía", False,
+                               {filename: (entry[0], set()) for filename, entry in found.items()})
+        results = []
+        worker.replaced.connect(lambda contents, replaced, skipped: results.append((len(contents), replaced)))
+        elapsed, stall = run(app, worker)
+        chapters, replaced = results[0]
+        print(f"replace 'Marta'        {elapsed * 1000:8.0f} ms, {replaced:>9,} matches in {chapters} chapters, "
+              f"longest stall {stall * 1000:.0f} ms")
+        chapter_manager.close()
+    finally:
+        shutil.rmtree(project_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Time to first token of repeated prompts: a new thread and a bare
+requests.post per prompt (the old AIWorker) against the shared
+OllamaClient, which keeps its worker threads and connections between prompts.
+
+By default the prompts go to a local stand-in for Ollama that streams a
+short NDJSON reply at once, so only the client side is measured. With a
+URL and a model they go to a real server instead.
+
+    python benchmarks/bench_ollama_client.py [prompts] [url model]
+"""
+import os
+import sys
+import json
+import time
+import threading
+import statistics
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QCoreApplication, QThread, pyqtSignal
+from utils.ollama_client import OllamaClient
+
+REPLY = "Había una vez una ciudad junto al mar .".split()
+
+class FakeOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # TCP_NODELAY, as Ollama's server has; with Nagle every reply on a
+    # reused connection would wait for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        lines = [{"response": word + " ", "done": False} for word in REPLY] + [{"response": "", "done": True}]
+        for line in lines:
+            data = (json.dumps(line) + "\n").encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Dropped connections: the old worker closed them before the end of the body
+        pass
+
+class LegacyWorker(QThread):
+    """What every prompt used to pay for: a thread and a connection of its own"""
+    stream_update = pyqtSignal(str)
+    done = pyqtSignal()
+
+    def __init__(self, url, payload):
+        super().__init__()
+        self.url = url
+        self.payload = payload
+
+    def run(self):
+        import requests
+        with requests.post(self.url, json=self.payload, stream=True, timeout=120) as response:
+            for line in response.iter_lines():
+                if line:
+                    json_response = json.loads(line)
+                    if json_response.get("response"):
+                        self.stream_update.emit(json_response["response"])
+                    if json_response.get("done", False):
+                        break
+        self.done.emit()
+
+def wait_for(app, predicate):
+    while not predicate():
+        app.processEvents()
+        time.sleep(0.0002)
+
+def bench_legacy(app, url, model, prompts):
+    first_tokens = []
+    for i in range(prompts):
+        state = {}
+        start = time.perf_counter()
+        worker = LegacyWorker(url, {"model": model, "prompt": f"Prompt {i}", "stream": True})
+        worker.stream_update.connect(lambda chunk: state.setdefault("first", time.perf_counter()))
+        worker.done.connect(lambda: state.setdefault("done", True))
+        worker.start()
+        wait_for(app, lambda: "done" in state)
+        worker.wait()
+        first_tokens.append(state["first"] - start)
+    return first_tokens
+
+def bench_client(app, url, model, prompts):
+    client = OllamaClient.instance()
+    first_tokens = []
+    for i in range(prompts):
+        state = {}
+        start = time.perf_counter()
+        request_id = client.generate(url, model, f"Prompt {i}")
+        client.chunk_received.connect(lambda rid, chunk: rid == request_id and state.setdefault("first", time.perf_counter()))
+        client.finished.connect(lambda rid, reply: rid == request_id and state.setdefault("done", True))
+        client.failed.connect(lambda rid, message: state.setdefault("done", message))
+        wait_for(app, lambda: "done" in state)
+        client.chunk_received.disconnect()
+        client.finished.disconnect()
+        client.failed.disconnect()
+        if state["done"] is not True:
+            raise RuntimeError(state["done"])
+        first_tokens.append(state["first"] - start)
+    return first_tokens
+
+def report(label, first_tokens):
+    # The first prompt also pays for imports and connecting; listed apart
+    print(
+        f"{label:<28} first prompt {first_tokens[0] * 1000:7.2f} ms   "
+        f"then median {statistics.median(first_tokens[1:]) * 1000:6.2f} ms, "
+        f"max {max(first_tokens[1:]) * 1000:6.2f} ms"
+    )
+
+def main():
+    prompts = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    app = QCoreApplication(sys.argv)
+    server = None
+    if len(sys.argv) > 3:
+        url, model = sys.argv[2], sys.argv[3]
+    else:
+        server = FakeOllamaServer(("127.0.0.1", 0), FakeOllama)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url, model = f"http://127.0.0.1:{server.server_port}/api/generate", "fake"
+
+    print(f"{prompts} prompts to {url}, time to first token")
+    # Legacy first: its first prompt pays for importing requests, the
+    # client's only for starting its thread and connecting
+    report("New thread + requests.post", bench_legacy(app, url, model, prompts))
+    report("Shared OllamaClient", bench_client(app, url, model, prompts))
+
+    OllamaClient.instance().stop()
+    if server:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Whole-project word count on a generated 1,500-chapter novel: first open,
+when chapters.json has no counts yet, then reopening with the counts the
+first scan stored in it. The totals shown at open are printed next to
+the final ones: on the first open they are still zero.
+
+    python benchmarks/bench_project_stats.py [chapters]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QCoreApplication
+from utils.chapter_manager import ChapterManager
+from utils.project_stats import ProjectStats
+
+PARAGRAPH = (
+    "El viento soplaba con fuerza sobre los tejados de la ciudad mientras "
+    "Kuno caminaba sin rumbo buscando una respuesta que nadie le daría.\n"
+)
+
+def open_stats(project_path):
+    """Time until the status bar shows totals (and which), then until the scan ends"""
+    start = time.perf_counter()
+    chapter_manager = ChapterManager(project_path)
+    stats = ProjectStats(chapter_manager)
+    stats.refresh()
+    shown = time.perf_counter() - start
+    shown_totals = stats.totals()
+    stats.worker.wait()
+    QCoreApplication.processEvents()
+    scanned = time.perf_counter() - start
+    stats.close()
+    chapter_manager.close()
+    return shown, shown_totals, scanned, stats.totals()
+
+def main():
+    app = QCoreApplication(sys.argv)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    project_path = tempfile.mkdtemp(prefix="kuno_bench_")
+    try:
+        chapters_dir = os.path.join(project_path, "chapters")
+        os.makedirs(chapters_dir)
+        for number in range(1, count + 1):
+            with open(os.path.join(chapters_dir, f"Capítulo {number} - Bench.txt"), 'w', encoding='utf-8') as f:
+                f.write(PARAGRAPH * 100)
+
+        for label in ("first open", "reopen"):
+            shown, shown_totals, scanned, totals = open_stats(project_path)
+            print(
+                f"{label:<10} shown after {shown * 1000:8.2f} ms {shown_totals}, "
+                f"scan done {scanned * 1000:8.2f} ms {totals}"
+            )
+    finally:
+        shutil.rmtree(project_path)
+
+if __name__ == "__main__":
+    main()
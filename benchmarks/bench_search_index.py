@@ -0,0 +1,106 @@
+"""
+Search index on a generated 3-million-word project (2,000 chapters of
+1,500 words, Zipf-distributed vocabulary): first build, size on disk,
+loading on reopen, and query latency.
+
+    python benchmarks/bench_search_index.py [chapters] [words per chapter]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QCoreApplication
+from utils.chapter_manager import ChapterManager
+from utils.search_index import SearchIndex
+
+COMMON = (
+    "de la que el en y a los se del las un por con no una su para es al lo "
+    "como más pero sus le ya o este sí porque esta entre cuando muy sin sobre"
+).split()
+SYLLABLES = "ka ri na to me lo sa ve ción dro ña bel mar tí go ra es pe un di".split()
+
+def vocabulary(rng, size):
+    words = list(COMMON)
+    known = set(words)
+    while len(words) < size:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in known:
+            known.add(word)
+            words.append(word)
+    return words
+
+def wait_until_indexed(app, index):
+    """Waits for the worker to finish what is queued; returns the chapters it reindexed"""
+    reindexed = []
+    index.worker.stale.connect(reindexed.extend)
+    done = []
+    index.updated.connect(lambda: done.append(True))
+    while not done:
+        app.processEvents()
+        time.sleep(0.01)
+    app.processEvents()
+    return reindexed
+
+def main():
+    app = QCoreApplication(sys.argv)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    words_per_chapter = int(sys.argv[2]) if len(sys.argv) > 2 else 1500
+    rng = random.Random(5)
+    words = vocabulary(rng, 40000)
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+
+    project_path = tempfile.mkdtemp(prefix="kuno_bench_")
+    try:
+        chapters_dir = os.path.join(project_path, "chapters")
+        os.makedirs(chapters_dir)
+        text_size = 0
+        for number in range(1, count + 1):
+            sample = rng.choices(words, weights, k=words_per_chapter)
+            sample[rng.randrange(len(sample))] = "Kuno"
+            text = " ".join(sample).capitalize() + "."
+            text_size += len(text.encode('utf-8'))
+            with open(os.path.join(chapters_dir, f"Capítulo {number}.txt"), 'w', encoding='utf-8') as f:
+                f.write(text)
+        print(f"{count} chapters, {count * words_per_chapter:,} words, {text_size / 1024 / 1024:.1f} MB of text")
+
+        chapter_manager = ChapterManager(project_path)
+        index = SearchIndex(chapter_manager)
+        start = time.perf_counter()
+        index.sync()
+        wait_until_indexed(app, index)
+        print(f"first build:        {time.perf_counter() - start:8.2f} s (worker thread)")
+        index.save()
+        index.close()
+        print(f"search.idx:         {os.path.getsize(index.path) / 1024 / 1024:8.1f} MB")
+
+        start = time.perf_counter()
+        index = SearchIndex(chapter_manager)
+        index.load()
+        loaded = time.perf_counter() - start
+        start = time.perf_counter()
+        index.sync()
+        synced = time.perf_counter() - start
+        reindexed = wait_until_indexed(app, index)
+        print(f"reopen (load):      {loaded * 1000:8.1f} ms, {len(reindexed)} chapters to reindex")
+        print(f"sync on GUI thread: {synced * 1000:8.1f} ms (versions checked on the worker)")
+
+        for query in ("Kuno", "de", "la que", "canción", words[5000], f"{words[100]} {words[2000]}", "inexistente"):
+            index.search(query)
+            start = time.perf_counter()
+            hits = index.search(query)
+            elapsed = time.perf_counter() - start
+            print(f"search {query!r:24} {elapsed * 1000:7.2f} ms, {len(hits)} hits")
+        index.close()
+        chapter_manager.close()
+    finally:
+        shutil.rmtree(project_path)
+
+if __name__ == "__main__":
+    main()
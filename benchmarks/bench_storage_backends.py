@@ -0,0 +1,110 @@
+"""
+Folder layout vs project.db on a generated 2,000-chapter novel: opening
+the project, loading and saving chapters, moving a chapter from the end
+to the front, and reading the whole book back (export).
+
+    python benchmarks/bench_storage_backends.py [chapters]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QCoreApplication
+from utils.project_manager import ProjectManager
+from utils.chapter_manager import open_chapter_manager
+from utils.storage_migration import migrate_to_database
+
+PARAGRAPH = (
+    "El viento soplaba con fuerza sobre los tejados de la ciudad mientras "
+    "Kuno caminaba sin rumbo buscando una respuesta que nadie le daría.\n"
+)
+
+def folder_size(path):
+    total = files = 0
+    for folder, _, names in os.walk(path):
+        if os.path.basename(folder) == ".kuno" or os.sep + ".kuno" in folder:
+            continue
+        for name in names:
+            total += os.path.getsize(os.path.join(folder, name))
+            files += 1
+    return total, files
+
+def run(base_dir, name, count):
+    rng = random.Random(3)
+    results = {}
+    pm = ProjectManager(base_dir)
+
+    start = time.perf_counter()
+    pm.open_project(name)
+    cm = open_chapter_manager(pm)
+    chapters = cm.get_chapters()
+    results["open + list"] = time.perf_counter() - start
+    assert len(chapters) == count
+
+    sample = rng.sample(chapters, 200)
+    start = time.perf_counter()
+    texts = [cm.load_chapter(filename) for filename in sample]
+    results["load 200 chapters"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for filename, text in zip(sample, texts):
+        cm.save_chapter(filename, text + PARAGRAPH)
+    results["save 200 chapters"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cm.move_chapter(chapters[-1], 0)
+    results["move last to first"] = time.perf_counter() - start
+    assert cm.number(chapters[-1]) == 1
+
+    start = time.perf_counter()
+    words = sum(len(cm.load_chapter(filename).split()) for filename in cm.get_chapters())
+    results["read whole book"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(100):
+        pm.save_content("notes.txt", PARAGRAPH * rng.randint(1, 50))
+    results["save notes x100"] = time.perf_counter() - start
+
+    cm.close()
+    pm.close_project()
+    return results, words, folder_size(os.path.join(base_dir, name))
+
+def main():
+    app = QCoreApplication(sys.argv)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    base_dir = tempfile.mkdtemp(prefix="kuno_bench_")
+    try:
+        for name in ("folder", "sqlite"):
+            rng = random.Random(1)
+            chapters_dir = os.path.join(base_dir, name, "chapters")
+            os.makedirs(chapters_dir)
+            with open(os.path.join(base_dir, name, "notes.txt"), 'w', encoding='utf-8') as f:
+                f.write("")
+            for number in range(1, count + 1):
+                with open(os.path.join(chapters_dir, f"Capítulo {number} - Parte {number}.txt"), 'w', encoding='utf-8') as f:
+                    f.write(PARAGRAPH * rng.randint(20, 60))
+        start = time.perf_counter()
+        migrate_to_database(os.path.join(base_dir, "sqlite"))
+        print(f"{count} chapters; migration to project.db: {time.perf_counter() - start:.2f} s\n")
+
+        folder, folder_words, folder_disk = run(base_dir, "folder", count)
+        sqlite, sqlite_words, sqlite_disk = run(base_dir, "sqlite", count)
+        assert folder_words == sqlite_words
+
+        print(f"{'':22} {'folder':>10} {'project.db':>12}")
+        for label in folder:
+            print(f"{label:22} {folder[label] * 1000:8.1f} ms {sqlite[label] * 1000:9.1f} ms")
+        print(f"{'on disk':22} {folder_disk[0] / 1024:7.0f} KB {sqlite_disk[0] / 1024:8.0f} KB")
+        print(f"{'files':22} {folder_disk[1]:10} {sqlite_disk[1]:12}")
+    finally:
+        shutil.rmtree(base_dir)
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,23 @@ import sys
 from PyQt6.QtWidgets import QApplication
 from ui.main_window import MainWindow
 from utils.logger import setup_exception_hook, log_info
+from utils.dictionary_service import DictionaryService
+from utils import startup_profile
 
 def main():
     setup_exception_hook()
     log_info("Application starting...")
     
-    app = QApplication(sys.argv)
+    app = startup_profile.timed("QApplication", QApplication, sys.argv)
+    # Load the spellcheck dictionary while the window is built
+    with startup_profile.step("DictionaryService.start"):
+        DictionaryService.instance().start()
     
     try:
-        window = MainWindow()
-        window.show()
+        window = startup_profile.timed("MainWindow", MainWindow)
+        startup_profile.watch_first_paint(window)
+        with startup_profile.step("MainWindow.show"):
+            window.show()
         log_info("MainWindow shown.")
         sys.exit(app.exec())
     except Exception as e:
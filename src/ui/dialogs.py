@@ -1,8 +1,49 @@
+import time
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, 
-    QListWidget, QLineEdit, QTextEdit, QGridLayout, QMessageBox, QInputDialog
+    QListWidget, QListWidgetItem, QLineEdit, QTextEdit, QGridLayout, QMessageBox,
+    QInputDialog, QComboBox, QSplitter
 )
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from .editor import HunspellHighlighter
+from utils.logger import log_error
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+class ProjectScanWorker(QThread):
+    """Lists the projects folder and measures projects the cached list has no size for"""
+    listed = pyqtSignal(list)  # project names
+    measured = pyqtSignal(str, object)  # project name, size in bytes
+
+    def __init__(self, project_manager, cached):
+        super().__init__()
+        self.pm = project_manager
+        self.cached = cached
+        self._stop = False
+
+    def stop(self):
+        self._stop = True
+
+    def run(self):
+        try:
+            names = self.pm.get_projects()
+        except OSError as e:
+            log_error(f"Error listing projects: {e}")
+            return
+        self.listed.emit(names)
+        sizes = {}
+        for name in names:
+            if self._stop:
+                break
+            if self.cached.get(name, {}).get("size") is None:
+                sizes[name] = {"size": self.pm.project_size(name)}
+                self.measured.emit(name, sizes[name]["size"])
+        self.pm.update_project_list(sizes, keep=set(names))
 
 class ProjectDialog(QDialog):
     project_selected = pyqtSignal(str)
@@ -16,10 +57,12 @@ class ProjectDialog(QDialog):
         layout = QVBoxLayout()
         self.setLayout(layout)
 
+        # The cached list shows up at once; the scan below corrects it
+        self.projects = self.pm.load_project_list()
         self.list_widget = QListWidget()
-        self.list_widget.addItems(self.pm.get_projects())
         self.list_widget.itemDoubleClicked.connect(self.open_project)
         layout.addWidget(self.list_widget)
+        self.refresh_list()
 
         btn_layout = QHBoxLayout()
         
@@ -34,22 +77,68 @@ class ProjectDialog(QDialog):
         
         layout.addLayout(btn_layout)
 
+        self.scan_worker = ProjectScanWorker(self.pm, dict(self.projects))
+        self.scan_worker.listed.connect(self.on_listed)
+        self.scan_worker.measured.connect(self.on_measured)
+        self.scan_worker.start(QThread.Priority.LowPriority)
+
+    def refresh_list(self):
+        """Lists the projects, last opened first"""
+        current = self.list_widget.currentItem()
+        current = current.data(Qt.ItemDataRole.UserRole) if current else None
+        self.list_widget.clear()
+        names = sorted(self.projects, key=lambda name: (-(self.projects[name].get("opened") or 0), name.lower()))
+        for name in names:
+            item = QListWidgetItem(self.describe(name))
+            item.setData(Qt.ItemDataRole.UserRole, name)
+            self.list_widget.addItem(item)
+            if name == current:
+                self.list_widget.setCurrentItem(item)
+
+    def describe(self, name):
+        entry = self.projects.get(name, {})
+        details = []
+        if entry.get("opened"):
+            details.append("Abierto: " + time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["opened"])))
+        if entry.get("size") is not None:
+            details.append(format_size(entry["size"]))
+        return f"{name}\n    {' · '.join(details)}" if details else name
+
+    def on_listed(self, names):
+        projects = {name: self.projects.get(name, {"opened": None, "size": None}) for name in names}
+        if projects != self.projects:
+            self.projects = projects
+            self.refresh_list()
+
+    def on_measured(self, name, size):
+        if name in self.projects:
+            self.projects[name]["size"] = size
+            for i in range(self.list_widget.count()):
+                item = self.list_widget.item(i)
+                if item.data(Qt.ItemDataRole.UserRole) == name:
+                    item.setText(self.describe(name))
+
     def create_project(self):
         name, ok = QInputDialog.getText(self, "Nuevo Proyecto", "Nombre del proyecto:")
         if ok and name:
             success, msg = self.pm.create_project(name)
             if success:
-                self.list_widget.clear()
-                self.list_widget.addItems(self.pm.get_projects())
+                self.projects[name] = {"opened": None, "size": None}
+                self.refresh_list()
             else:
                 QMessageBox.warning(self, "Error", msg)
 
     def open_project(self):
         item = self.list_widget.currentItem()
         if item:
-            self.project_selected.emit(item.text())
+            self.project_selected.emit(item.data(Qt.ItemDataRole.UserRole))
             self.accept()
 
+    def done(self, result):
+        self.scan_worker.stop()
+        self.scan_worker.wait()
+        super().done(result)
+
 class SymbolDialog(QDialog):
     symbol_selected = pyqtSignal(str)
 
@@ -91,6 +180,9 @@ class NotesDialog(QDialog):
         self.setLayout(layout)
         
         self.editor = QTextEdit()
+        # Shares the process-wide dictionary with the main editor
+        self.highlighter = HunspellHighlighter(self.editor.document())
+        self.highlighter.editor = self.editor
         self.editor.setPlainText(initial_content)
         layout.addWidget(self.editor)
         
@@ -100,3 +192,84 @@ class NotesDialog(QDialog):
 
     def get_content(self):
         return self.editor.toPlainText()
+
+class HistoryDialog(QDialog):
+    restore_requested = pyqtSignal(str, str)  # chapter filename, content
+
+    def __init__(self, history, chapters, current=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Historial de Versiones")
+        self.resize(700, 500)
+        self.history = history
+        self.snapshots = []
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        # Existing chapters first, then deleted ones that still have history
+        self.chapter_combo = QComboBox()
+        for filename in chapters:
+            self.chapter_combo.addItem(filename, filename)
+        for filename in history.chapters():
+            if filename not in chapters:
+                self.chapter_combo.addItem(f"{filename} (eliminado)", filename)
+        self.chapter_combo.currentIndexChanged.connect(self.load_snapshots)
+        layout.addWidget(self.chapter_combo)
+
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        self.snapshot_list = QListWidget()
+        self.snapshot_list.currentRowChanged.connect(self.show_snapshot)
+        splitter.addWidget(self.snapshot_list)
+        self.preview = QTextEdit()
+        self.preview.setReadOnly(True)
+        splitter.addWidget(self.preview)
+        splitter.setSizes([220, 480])
+        layout.addWidget(splitter)
+
+        restore_btn = QPushButton("Restaurar esta versión")
+        restore_btn.clicked.connect(self.restore)
+        layout.addWidget(restore_btn)
+
+        index = self.chapter_combo.findData(current) if current else 0
+        self.chapter_combo.setCurrentIndex(max(index, 0))
+        self.load_snapshots()
+
+    def load_snapshots(self):
+        self.snapshot_list.clear()
+        self.preview.clear()
+        filename = self.chapter_combo.currentData()
+        self.snapshots = self.history.snapshots(filename) if filename else []
+        # Newest first
+        for entry in reversed(self.snapshots):
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["time"]))
+            self.snapshot_list.addItem(f"{stamp} - {entry['words']} palabras")
+        if self.snapshots:
+            self.snapshot_list.setCurrentRow(0)
+
+    def selected_index(self):
+        row = self.snapshot_list.currentRow()
+        if row < 0:
+            return None
+        return len(self.snapshots) - 1 - row
+
+    def show_snapshot(self, row):
+        index = self.selected_index()
+        if index is None:
+            return
+        try:
+            self.preview.setPlainText(self.history.restore(self.chapter_combo.currentData(), index))
+        except Exception as e:
+            self.preview.setPlainText(f"No se pudo leer esta versión: {e}")
+
+    def restore(self):
+        index = self.selected_index()
+        if index is None:
+            return
+        filename = self.chapter_combo.currentData()
+        confirm = QMessageBox.question(
+            self, "Confirmar", f"¿Restaurar '{filename}' a esta versión?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if confirm == QMessageBox.StandardButton.Yes:
+            self.restore_requested.emit(filename, self.history.restore(filename, index))
+            self.accept()
@@ -1,18 +1,25 @@
-import re
-import os
+import time
+from collections import deque
 from PyQt6.QtWidgets import QTextEdit, QMenu
 from PyQt6.QtGui import (
     QTextCharFormat, QFont, QTextCursor, QSyntaxHighlighter, 
-    QColor, QAction
+    QColor, QAction, QTextBlockUserData, QTextDocument
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal, QObject, QTimer, QPoint
+from utils.dictionary_service import DictionaryService
+from utils.document_stats import DocumentStats
 
-# Try to import spylls
-try:
-    from spylls.hunspell import Dictionary
-    SPYLLS_AVAILABLE = True
-except ImportError:
-    SPYLLS_AVAILABLE = False
+# Chapters longer than this are highlighted viewport-first (see HighlightScheduler)
+PROGRESSIVE_HIGHLIGHT_CHARS = 50000
+# Measured resident memory of a laid-out QTextDocument, per character
+DOCUMENT_BYTES_PER_CHAR = 40
+
+class SpellBlockData(QTextBlockUserData):
+    """Spellcheck state of a block: checked at least once, and its unknown words"""
+    def __init__(self):
+        super().__init__()
+        self.checked = False
+        self.words = set()
 
 class HunspellHighlighter(QSyntaxHighlighter):
     def __init__(self, document):
@@ -20,44 +27,250 @@ class HunspellHighlighter(QSyntaxHighlighter):
         self.error_format = QTextCharFormat()
         self.error_format.setUnderlineColor(QColor("red"))
         self.error_format.setUnderlineStyle(QTextCharFormat.UnderlineStyle.WaveUnderline)
-        
-        self.dictionary = None
-        self.ignored_words = set()
 
-        if SPYLLS_AVAILABLE:
-            # Base path without extension
-            base_path = r"D:\Kuno\Web Novel\diccionarios\es"
-            
-            if os.path.exists(base_path + ".dic") and os.path.exists(base_path + ".aff"):
-                try:
-                    self.dictionary = Dictionary.from_files(base_path)
-                except Exception as e:
-                    print(f"Error loading Dictionary: {e}")
-            else:
-                print("Dictionaries not found.")
+        # One dictionary, verdict cache and worker for every editor
+        self.service = DictionaryService.instance()
+        self.service.start()
+        # text hash -> blocks waiting for that result
+        self.pending_blocks = {}
+        # unknown word -> {id(SpellBlockData): block}, for targeted rehighlight
+        self.occurrences = {}
+        # While suspended (bulk loads) blocks are left for the scheduler
+        self.suspended = False
+        self.scheduler = None
+        # Worker priority for new requests; 0 is what the user is looking at
+        self.request_priority = 0
+        # Editor showing this document, set by NovelEditor.show_document
+        self.editor = None
+
+        self.service.ready.connect(self.on_service_ready)
+        self.service.results_ready.connect(self.apply_results)
+        self.service.words_changed.connect(self.on_words_changed)
+
+    def on_service_ready(self):
+        if self.scheduler and self.scheduler.active:
+            self.scheduler.start()
+        else:
+            # A full repaint would otherwise save and recount every open chapter
+            self.silently(self.rehighlight)
 
     def highlightBlock(self, text):
-        if not self.dictionary:
+        if self.suspended or not self.service.is_ready():
             return
 
-        # Find words ignoring punctuation
-        for match in re.finditer(r'[a-zA-ZáéíóúÁÉÍÓÚñÑüÜ]+', text):
-            word = match.group()
-            
-            if word in self.ignored_words:
-                continue
+        data = self.currentBlockUserData()
+        if not isinstance(data, SpellBlockData):
+            data = SpellBlockData()
+            self.setCurrentBlockUserData(data)
+        data.checked = True
+        if not text.strip():
+            self.index_block(data, set())
+            return
 
-            # Check spelling (lookup returns True if correct)
-            # We catch exceptions just in case of weird characters
-            try:
-                if not self.dictionary.lookup(word):
-                    self.setFormat(match.start(), match.end() - match.start(), self.error_format)
-            except:
-                pass
+        # Paint cached results; unchecked blocks stay plain until the worker answers
+        text_hash = hash(text)
+        ranges = self.service.block_results.get(text_hash)
+        if ranges is None:
+            waiting = self.pending_blocks.get(text_hash)
+            if waiting is None:
+                self.pending_blocks[text_hash] = [self.currentBlock()]
+                self.service.request_check(text_hash, text, self.request_priority)
+            else:
+                waiting.append(self.currentBlock())
+            return
+
+        words = set()
+        for start, length in ranges:
+            word = text[start:start + length]
+            words.add(word)
+            # Project words are filtered here so cached results stay valid
+            if not self.service.is_user_word(word):
+                self.setFormat(start, length, self.error_format)
+        self.index_block(data, words)
+
+    def index_block(self, data, words):
+        """Records which unknown words the current block contains"""
+        if data.words == words:
+            return
+
+        key = id(data)
+        for word in data.words - words:
+            blocks = self.occurrences.get(word)
+            if blocks is not None:
+                blocks.pop(key, None)
+                if not blocks:
+                    del self.occurrences[word]
+        block = self.currentBlock()
+        for word in words - data.words:
+            self.occurrences.setdefault(word, {})[key] = block
+        data.words = words
+
+    def apply_results(self, text_hash):
+        """Repaints the blocks of this document that asked for text_hash"""
+        for block in self.pending_blocks.pop(text_hash, ()):
+            # Block handles follow moves; skip blocks edited or deleted since
+            if block.isValid() and hash(block.text()) == text_hash:
+                self.refresh_block(block)
+
+    def refresh_block(self, block):
+        """
+        Re-runs highlightBlock on block. Format-only changes still emit the
+        editor's textChanged, which would trigger stats and auto-save, so the
+        owning editor is silenced meanwhile.
+        """
+        self.silently(self.rehighlightBlock, block)
+
+    def silently(self, action, *args):
+        """Runs a repaint with the owning editor's signals blocked (see refresh_block)"""
+        editor = self.editor
+        if editor is None or editor.document() is not self.document():
+            # Not on screen: no editor signals to silence
+            action(*args)
+            return
+        blocked = editor.blockSignals(True)
+        try:
+            action(*args)
+        finally:
+            editor.blockSignals(blocked)
+
+    def on_words_changed(self, words):
+        """Repaints only the blocks that contain one of the changed words"""
+        variants = set()
+        for word in words:
+            variants.update((word, word.lower(), word.capitalize(), word.upper()))
+
+        for word in variants:
+            for key, block in list(self.occurrences.get(word, {}).items()):
+                if block.isValid() and word in block.text():
+                    self.refresh_block(block)
+                else:
+                    # Deleted or rewritten block
+                    self.occurrences.get(word, {}).pop(key, None)
+
+class HighlightScheduler(QObject):
+    """
+    Spellchecks a large document viewport-first: visible blocks at once, then
+    blocks around them in idle-time slices, giving up beyond MAX_DISTANCE
+    blocks from the viewport. Scrolling re-centers the schedule.
+    """
+    progress = pyqtSignal(int, int)  # blocks done, blocks scheduled
+
+    SLICE_SECONDS = 0.008
+    MAX_DISTANCE = 1500
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        # Highlighter of the document on screen, set by NovelEditor.show_document
+        self.highlighter = None
+        self.active = False
+        self.queue = deque()
+        self.done = 0
+        self.total = 0
+
+        self.slice_timer = QTimer(self)
+        self.slice_timer.setInterval(0)
+        self.slice_timer.timeout.connect(self.run_slice)
+
+        self.scroll_timer = QTimer(self)
+        self.scroll_timer.setSingleShot(True)
+        self.scroll_timer.setInterval(50)
+        self.scroll_timer.timeout.connect(self.start)
+        editor.verticalScrollBar().valueChanged.connect(self.on_scroll)
+
+    def visible_range(self):
+        viewport = self.editor.viewport()
+        first = self.editor.cursorForPosition(QPoint(0, 0)).block().blockNumber()
+        last = self.editor.cursorForPosition(QPoint(0, viewport.height() - 1)).block().blockNumber()
+        return first, max(first, last)
+
+    def start(self):
+        """(Re)builds the schedule around the current viewport"""
+        self.active = True
+        if self.highlighter is None or not self.highlighter.service.is_ready():
+            return
+        first, last = self.visible_range()
+        count = self.editor.document().blockCount()
 
-from PyQt6.QtCore import Qt, pyqtSignal
+        for number in range(first, last + 1):
+            self.visit(number, priority=0)
 
-# ... imports ...
+        # Nearest blocks first, alternating below and above the viewport
+        self.queue.clear()
+        for distance in range(1, self.MAX_DISTANCE + 1):
+            below, above = last + distance, first - distance
+            if below >= count and above < 0:
+                break
+            if below < count:
+                self.queue.append(below)
+            if above >= 0:
+                self.queue.append(above)
+
+        self.done = last - first + 1
+        self.total = self.done + len(self.queue)
+        self.progress.emit(self.done, self.total)
+        self.slice_timer.start()
+
+    def stop(self):
+        self.active = False
+        self.queue.clear()
+        self.slice_timer.stop()
+        self.scroll_timer.stop()
+
+    def on_scroll(self):
+        if self.active:
+            self.scroll_timer.start()
+
+    def run_slice(self):
+        deadline = time.perf_counter() + self.SLICE_SECONDS
+        while self.queue and time.perf_counter() < deadline:
+            self.visit(self.queue.popleft(), priority=2)
+            self.done += 1
+        self.progress.emit(self.done, self.total)
+        if not self.queue:
+            self.slice_timer.stop()
+
+    def visit(self, number, priority):
+        block = self.editor.document().findBlockByNumber(number)
+        if not block.isValid():
+            return
+        data = block.userData()
+        if isinstance(data, SpellBlockData) and data.checked:
+            return
+        self.highlighter.request_priority = priority
+        self.highlighter.refresh_block(block)
+        self.highlighter.request_priority = 0
+
+class ChapterDocument(QObject):
+    """
+    A chapter kept alive between visits: its QTextDocument (text, undo
+    stack, highlighting), highlighter, block counts, and where the user
+    left the cursor and scrollbar.
+    """
+
+    def __init__(self, text, font, parent=None):
+        super().__init__(parent)
+        self.document = QTextDocument(self)
+        self.document.setDefaultFont(font)
+        self.highlighter = HunspellHighlighter(self.document)
+        self.progressive = len(text) > PROGRESSIVE_HIGHLIGHT_CHARS
+        self.highlighter.suspended = self.progressive
+        try:
+            self.document.setPlainText(text)
+        finally:
+            self.highlighter.suspended = False
+        # Loading is not an edit: no undo step, and dirty tracking starts here
+        self.document.clearUndoRedoStacks()
+        self.document.setModified(False)
+        self.stats = DocumentStats(self.document, self)
+        self.cursor_position = 0
+        self.scroll_value = 0
+        # Disk version the text was loaded from or saved as (see MainWindow)
+        self.version = None
+
+    def cost(self):
+        """Estimated memory use in bytes"""
+        return self.document.characterCount() * DOCUMENT_BYTES_PER_CHAR
 
 class NovelEditor(QTextEdit):
     stats_updated = pyqtSignal(int, int, int) # words, chars, chapters
@@ -71,10 +284,69 @@ class NovelEditor(QTextEdit):
         font = QFont("Georgia", 12)
         self.setFont(font)
         
-        # Highlighter
-        self.highlighter = HunspellHighlighter(self.document())
-        
-        self.textChanged.connect(self.update_stats)
+        self.spellcheck = DictionaryService.instance()
+        self.scheduler = HighlightScheduler(self)
+
+        # Document on screen, with its highlighter and per-block counts
+        self.chapter_document = None
+        self.highlighter = None
+        self.stats = None
+        # Empty document shown while no chapter is open; nobody else keeps it
+        self.placeholder = None
+        self.clear_document()
+
+    def load_text(self, text):
+        """Shows text in a new ChapterDocument and returns it"""
+        chapter_document = ChapterDocument(text, self.font(), self)
+        self.show_document(chapter_document)
+        return chapter_document
+
+    def clear_document(self):
+        """Shows an empty placeholder document, deleted once another one is shown"""
+        if self.placeholder is None:
+            placeholder = ChapterDocument("", self.font(), self)
+            self.show_document(placeholder)
+            self.placeholder = placeholder
+
+    def show_document(self, chapter_document):
+        """
+        Swaps the document on screen. The previous one keeps its undo stack
+        and highlighting, and remembers the cursor and scroll position.
+        """
+        previous = self.chapter_document
+        self.scheduler.stop()
+        if previous is not None:
+            previous.cursor_position = self.textCursor().position()
+            previous.scroll_value = self.verticalScrollBar().value()
+            previous.highlighter.scheduler = None
+            previous.stats.stats_updated.disconnect(self.stats_updated)
+            if previous is self.placeholder and previous is not chapter_document:
+                self.placeholder = None
+                previous.deleteLater()
+
+        self.chapter_document = chapter_document
+        self.highlighter = chapter_document.highlighter
+        self.highlighter.editor = self
+        self.highlighter.scheduler = self.scheduler
+        self.scheduler.highlighter = self.highlighter
+        self.stats = chapter_document.stats
+        self.stats.stats_updated.connect(self.stats_updated)
+        self.setDocument(chapter_document.document)
+
+        cursor = self.textCursor()
+        cursor.setPosition(min(chapter_document.cursor_position, chapter_document.document.characterCount() - 1))
+        self.setTextCursor(cursor)
+        self.stats_updated.emit(*self.stats.totals())
+        # After the first layout, so the scrollbar range and viewport are real
+        QTimer.singleShot(0, lambda: self._restore_view(chapter_document))
+
+    def _restore_view(self, chapter_document):
+        if chapter_document is not self.chapter_document:
+            return
+        self.verticalScrollBar().setValue(chapter_document.scroll_value)
+        if chapter_document.progressive:
+            # Long texts are spellchecked viewport-first; checked blocks are skipped
+            self.scheduler.start()
 
     def keyPressEvent(self, event):
         # Auto-correct logic on space or punctuation
@@ -84,7 +356,7 @@ class NovelEditor(QTextEdit):
         super().keyPressEvent(event)
 
     def check_auto_correct(self):
-        if not self.highlighter.dictionary:
+        if not self.spellcheck.is_ready():
             return
 
         cursor = self.textCursor()
@@ -95,10 +367,10 @@ class NovelEditor(QTextEdit):
             return
 
         # Simple auto-correct: if word is wrong and has 1 strong suggestion
-        if word and word not in self.highlighter.ignored_words:
+        if word:
             try:
-                if not self.highlighter.dictionary.lookup(word):
-                    suggestions = list(self.highlighter.dictionary.suggest(word))
+                if self.spellcheck.is_misspelled(word):
+                    suggestions = self.spellcheck.suggest(word)
                     if suggestions:
                         # Pick first suggestion if it's very close or obvious
                         # For safety, we only auto-correct if it's a simple case
@@ -113,22 +385,11 @@ class NovelEditor(QTextEdit):
             except:
                 pass
 
-    def update_stats(self):
-        text = self.toPlainText()
-        chars = len(text)
-        words = len(text.split())
-        # Simple chapter detection: lines starting with "Capítulo" or "Chapter" or just "#"
-        chapters = len(re.findall(r'^(Capítulo|Chapter|#)', text, re.MULTILINE | re.IGNORECASE))
-        if chapters == 0 and chars > 0:
-            chapters = 1 # At least one chapter if there is text
-            
-        self.stats_updated.emit(words, chars, chapters)
-
-    # ... rest of methods ...
+    def contextMenuEvent(self, event):
         # Create standard menu first
         menu = self.createStandardContextMenu()
         
-        if not self.highlighter.dictionary:
+        if not self.spellcheck.is_ready():
             menu.exec(event.globalPos())
             return
 
@@ -138,41 +399,61 @@ class NovelEditor(QTextEdit):
         word = cursor.selectedText()
         
         # Check if word is misspelled
-        is_misspelled = False
-        if word and word not in self.highlighter.ignored_words:
-            try:
-                if not self.highlighter.dictionary.lookup(word):
-                    is_misspelled = True
-            except:
-                pass
+        is_misspelled = bool(word) and self.spellcheck.is_misspelled(word)
 
+        pending = None
         if is_misspelled:
-            # Get suggestions
+            # The index answers within its budget; spylls, if it has to, in the background
             try:
-                suggestions = list(self.highlighter.dictionary.suggest(word))
+                suggestions = self.spellcheck.suggest(word)
             except:
                 suggestions = []
-            
+
+            menu.addSeparator()
             if suggestions:
-                menu.addSeparator()
-                menu.addAction("Sugerencias:").setEnabled(False)
-                
-                # Limit to top 5 suggestions
-                for suggestion in suggestions[:5]:
-                    action = QAction(suggestion, self)
-                    # We need to capture the suggestion and cursor
-                    action.triggered.connect(lambda checked, s=suggestion, c=cursor: self.replace_word(c, s))
-                    menu.addAction(action)
+                self.add_suggestion_actions(menu, None, cursor, suggestions)
             else:
-                menu.addSeparator()
-                menu.addAction("No hay sugerencias").setEnabled(False)
-                
+                pending = menu.addAction("Buscando sugerencias…")
+                pending.setEnabled(False)
+
+                def fill_suggestions(found_word, found):
+                    if found_word != word:
+                        return
+                    if found:
+                        self.add_suggestion_actions(menu, pending, cursor, found)
+                        menu.removeAction(pending)
+                    else:
+                        pending.setText("No hay sugerencias")
+                    menu.adjustSize()
+
+                self.spellcheck.fallback_ready.connect(fill_suggestions)
+                self.spellcheck.request_fallback(word)
+
             menu.addSeparator()
-            add_action = QAction("Omitir palabra", self)
+            add_action = QAction("Agregar al diccionario", self)
             add_action.triggered.connect(lambda: self.add_to_dictionary(word))
             menu.addAction(add_action)
+        elif word in self.spellcheck.user_dictionary.words:
+            menu.addSeparator()
+            remove_action = QAction("Quitar del diccionario", self)
+            remove_action.triggered.connect(lambda: self.remove_from_dictionary(word))
+            menu.addAction(remove_action)
 
         menu.exec(event.globalPos())
+        if pending is not None:
+            self.spellcheck.fallback_ready.disconnect(fill_suggestions)
+
+    def add_suggestion_actions(self, menu, before, cursor, suggestions):
+        """Inserts the top suggestions before the action before (None: at the end)"""
+        heading = QAction("Sugerencias:", menu)
+        heading.setEnabled(False)
+        menu.insertAction(before, heading)
+        # Limit to top 5 suggestions
+        for suggestion in suggestions[:5]:
+            action = QAction(suggestion, menu)
+            # We need to capture the suggestion and cursor
+            action.triggered.connect(lambda checked, s=suggestion, c=cursor: self.replace_word(c, s))
+            menu.insertAction(before, action)
 
     def replace_word(self, cursor, new_word):
         # We need to make sure we replace the correct range
@@ -181,8 +462,11 @@ class NovelEditor(QTextEdit):
         cursor.endEditBlock()
 
     def add_to_dictionary(self, word):
-        self.highlighter.ignored_words.add(word)
-        self.highlighter.rehighlight()
+        # Highlighters repaint affected blocks through DictionaryService.words_changed
+        self.spellcheck.add_word(word)
+
+    def remove_from_dictionary(self, word):
+        self.spellcheck.remove_word(word)
 
     def set_bold(self):
         fmt = QTextCharFormat()
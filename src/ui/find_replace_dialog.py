@@ -0,0 +1,304 @@
+import re
+from bisect import bisect
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
+    QCheckBox, QProgressBar, QTreeWidget, QTreeWidgetItem, QMessageBox
+)
+from PyQt6.QtCore import Qt, pyqtSignal
+
+from utils.find_replace import (
+    FindWorker, ReplaceWorker, compile_pattern, find_matches, PREVIEW_MATCHES
+)
+
+# Item data: chapter items keep (filename, text hash, previews, matches), match items (index, start, end)
+ITEM_DATA = Qt.ItemDataRole.UserRole
+
+class FindReplaceDialog(QDialog):
+    """
+    Find and replace in every chapter, with a preview of each match that
+    can be unchecked before replacing. open_chapter() returns the filename
+    and editor text of the chapter on screen (saving everything else
+    first); replace_open_chapter(filename, matches) replaces its matches
+    through the editor.
+    """
+    result_selected = pyqtSignal(str, int, int)  # chapter filename, offset, length
+    chapters_replaced = pyqtSignal(object)  # {filename: new content}
+    replace_finished = pyqtSignal()  # after a replace batch landed or failed
+
+    def __init__(self, chapter_manager, open_chapter, replace_open_chapter, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Buscar y Reemplazar")
+        self.resize(700, 550)
+        self.chapter_manager = chapter_manager
+        self.open_chapter = open_chapter
+        self.replace_open_chapter = replace_open_chapter
+        self.worker = None
+        self.replace_worker = None
+        # What the results on screen were searched with
+        self.search = None
+        self.chapter_numbers = []
+        self.match_count = 0
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        self.find_input = QLineEdit()
+        self.find_input.setPlaceholderText("Buscar...")
+        self.find_input.returnPressed.connect(self.start_search)
+        layout.addWidget(self.find_input)
+
+        self.replace_input = QLineEdit()
+        self.replace_input.setPlaceholderText("Reemplazar con...")
+        layout.addWidget(self.replace_input)
+
+        options = QHBoxLayout()
+        self.case_check = QCheckBox("Mayúsculas/minúsculas")
+        self.word_check = QCheckBox("Palabra completa")
+        self.regex_check = QCheckBox("Expresión regular")
+        for check in (self.case_check, self.word_check, self.regex_check):
+            options.addWidget(check)
+        options.addStretch()
+        layout.addLayout(options)
+
+        buttons = QHBoxLayout()
+        self.search_btn = QPushButton("Buscar")
+        self.search_btn.clicked.connect(self.start_search)
+        self.cancel_btn = QPushButton("Cancelar")
+        self.cancel_btn.clicked.connect(self.cancel_search)
+        self.cancel_btn.setEnabled(False)
+        self.replace_btn = QPushButton("Reemplazar seleccionados")
+        self.replace_btn.clicked.connect(self.replace_selected)
+        self.replace_btn.setEnabled(False)
+        buttons.addWidget(self.search_btn)
+        buttons.addWidget(self.cancel_btn)
+        buttons.addStretch()
+        buttons.addWidget(self.replace_btn)
+        layout.addLayout(buttons)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setMaximumHeight(6)
+        layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        # One checkable item per chapter; its matches are listed when expanded
+        self.results = QTreeWidget()
+        self.results.setHeaderHidden(True)
+        self.results.itemExpanded.connect(self.populate_matches)
+        self.results.itemChanged.connect(self.on_item_changed)
+        self.results.itemDoubleClicked.connect(self.on_item_double_clicked)
+        layout.addWidget(self.results)
+
+    def start_search(self):
+        text = self.find_input.text()
+        if not text or self.replace_worker:
+            return
+        regex = self.regex_check.isChecked()
+        try:
+            pattern = compile_pattern(
+                text, regex, self.case_check.isChecked(), self.word_check.isChecked()
+            )
+        except re.error as e:
+            self.status_label.setText(f"Expresión no válida: {e}")
+            return
+        self.stop_worker()
+        self.results.clear()
+        self.chapter_numbers = []
+        self.match_count = 0
+        self.replace_btn.setEnabled(False)
+
+        open_filename, open_text = self.open_chapter()
+        texts = {open_filename: open_text} if open_filename else {}
+        replacement = self.replace_input.text()
+        self.search = (pattern, replacement, regex)
+        filenames = self.chapter_manager.get_chapters()
+        self.progress_bar.setRange(0, max(len(filenames), 1))
+        self.progress_bar.setValue(0)
+
+        self.worker = FindWorker(self.chapter_manager, filenames, pattern, replacement, regex, texts)
+        self.worker.chapter_found.connect(self.add_chapter)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.failed.connect(self.on_search_failed)
+        self.worker.finished.connect(self.on_search_finished)
+        self.search_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.worker.start()
+
+    def cancel_search(self):
+        if self.worker:
+            self.worker.stop()
+
+    def stop_worker(self):
+        if self.worker:
+            # Its queued results are dropped by the sender checks below
+            self.worker.stop()
+            self.worker.wait()
+            self.worker = None
+
+    def add_chapter(self, filename, text_hash, count, previews):
+        """Adds a searched chapter's item where it goes in chapter order"""
+        if self.sender() is not self.worker:
+            return
+        number = self.chapter_manager.number(filename)
+        position = bisect(self.chapter_numbers, number)
+        self.chapter_numbers.insert(position, number)
+        self.match_count += count
+
+        item = QTreeWidgetItem([f"{self.chapter_manager.label(filename)} ({count})"])
+        item.setData(0, ITEM_DATA, (filename, text_hash, previews, count))
+        item.setCheckState(0, Qt.CheckState.Checked)
+        item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+        self.results.blockSignals(True)
+        self.results.insertTopLevelItem(position, item)
+        self.results.blockSignals(False)
+
+    def populate_matches(self, item):
+        data = item.data(0, ITEM_DATA)
+        if item.parent() or item.childCount():
+            return
+        _, _, previews, count = data
+        checked = item.checkState(0)
+        self.results.blockSignals(True)
+        for index, start, end, text in previews:
+            child = QTreeWidgetItem([text])
+            child.setData(0, ITEM_DATA, (index, start, end))
+            child.setCheckState(0, checked)
+            item.addChild(child)
+        if count > PREVIEW_MATCHES:
+            item.addChild(QTreeWidgetItem([f"… y {count - PREVIEW_MATCHES} más"]))
+        self.results.blockSignals(False)
+
+    def on_item_changed(self, item):
+        if item.parent():
+            return
+        # Checking a chapter checks all its matches
+        self.results.blockSignals(True)
+        for i in range(item.childCount()):
+            child = item.child(i)
+            if child.data(0, ITEM_DATA) is not None:
+                child.setCheckState(0, item.checkState(0))
+        self.results.blockSignals(False)
+
+    def on_item_double_clicked(self, item):
+        if not item.parent():
+            return
+        data = item.data(0, ITEM_DATA)
+        if data:
+            filename = item.parent().data(0, ITEM_DATA)[0]
+            self.result_selected.emit(filename, data[1], data[2] - data[1])
+
+    def on_progress(self, done, total):
+        if self.sender() is not self.worker:
+            return
+        self.progress_bar.setValue(done)
+        self.status_label.setText(
+            f"Buscando... {done}/{total} capítulos, {self.match_count} coincidencias"
+        )
+
+    def on_search_failed(self, error):
+        if self.sender() is not self.worker:
+            return
+        self.search = None
+        self.results.clear()
+        self.status_label.setText(error)
+
+    def on_search_finished(self):
+        if self.sender() is not self.worker:
+            return
+        cancelled = self.worker._stop
+        self.worker = None
+        self.search_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        if self.search is None:
+            # Failed: the error stays on screen
+            return
+        chapters = self.results.topLevelItemCount()
+        summary = f"{self.match_count} coincidencias en {chapters} capítulos"
+        self.status_label.setText(f"Búsqueda cancelada: {summary}" if cancelled else summary)
+        self.replace_btn.setEnabled(chapters > 0)
+
+    def selected_chapters(self):
+        """filename -> (text hash, indexes of the unchecked matches) for every checked chapter"""
+        chapters = {}
+        for i in range(self.results.topLevelItemCount()):
+            item = self.results.topLevelItem(i)
+            if item.checkState(0) != Qt.CheckState.Checked:
+                continue
+            filename, text_hash = item.data(0, ITEM_DATA)[:2]
+            excluded = set()
+            for j in range(item.childCount()):
+                child = item.child(j)
+                data = child.data(0, ITEM_DATA)
+                if data is not None and child.checkState(0) != Qt.CheckState.Checked:
+                    excluded.add(data[0])
+            chapters[filename] = (text_hash, excluded)
+        return chapters
+
+    def replace_selected(self):
+        chapters = self.selected_chapters()
+        if not chapters or not self.search:
+            return
+        confirm = QMessageBox.question(
+            self, "Confirmar",
+            f"¿Reemplazar las coincidencias seleccionadas en {len(chapters)} capítulos?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if confirm != QMessageBox.StandardButton.Yes:
+            return
+        pattern, replacement, regex = self.search
+
+        # The chapter on screen is replaced in the editor, as one undoable edit
+        skipped = []
+        replaced = 0
+        open_filename, open_text = self.open_chapter()
+        if open_filename in chapters:
+            text_hash, excluded = chapters.pop(open_filename)
+            if hash(open_text) != text_hash:
+                skipped.append(open_filename)
+            else:
+                matches = find_matches(pattern, open_text, replacement, regex)
+                matches = [match for index, match in enumerate(matches) if index not in excluded]
+                self.replace_open_chapter(open_filename, matches)
+                replaced = len(matches)
+
+        self.replace_worker = ReplaceWorker(self.chapter_manager, pattern, replacement, regex, chapters)
+        self.replace_worker.replaced.connect(
+            lambda contents, count, others: self.on_replaced(contents, count + replaced, skipped + others)
+        )
+        self.replace_worker.failed.connect(self.on_replace_failed)
+        self.search_btn.setEnabled(False)
+        self.replace_btn.setEnabled(False)
+        self.status_label.setText("Reemplazando...")
+        self.replace_worker.start()
+
+    def on_replaced(self, contents, count, skipped):
+        self.replace_worker = None
+        self.search = None
+        self.results.clear()
+        self.search_btn.setEnabled(True)
+        self.chapters_replaced.emit(contents)
+        self.replace_finished.emit()
+        message = f"{count} coincidencias reemplazadas"
+        if skipped:
+            message += f"; {len(skipped)} capítulos cambiaron desde la búsqueda y no se tocaron"
+        self.status_label.setText(message)
+
+    def on_replace_failed(self, error):
+        self.replace_worker = None
+        self.search_btn.setEnabled(True)
+        self.replace_btn.setEnabled(True)
+        self.status_label.setText(f"Error al reemplazar: {error}")
+        self.replace_finished.emit()
+
+    def replacing(self, filename):
+        """True while a replace is writing filename"""
+        return self.replace_worker is not None and filename in self.replace_worker.chapters
+
+    def closeEvent(self, event):
+        self.stop_worker()
+        if self.replace_worker:
+            # The batch is already being written; let it land
+            self.replace_worker.wait()
+        super().closeEvent(event)
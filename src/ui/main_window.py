@@ -1,21 +1,34 @@
+import time
+from functools import partial
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSplitter, 
     QToolBar, QFileDialog, QMessageBox, QLabel, QStatusBar, QMenu
 )
-from PyQt6.QtGui import QAction, QIcon, QTextDocument
+from PyQt6.QtGui import QAction, QIcon, QTextDocument, QTextCursor
 from PyQt6.QtCore import Qt, QSize, QTimer
-from PyQt6.QtPrintSupport import QPrinter
 
 from .editor import NovelEditor
 from .sidebar_characters import CharacterSidebar
 from .sidebar_chapters import ChapterSidebar
 from .sidebar_ai import AIChatSidebar
-from .dialogs import SymbolDialog, NotesDialog, ProjectDialog
+from .sidebar_search import SearchSidebar
+from .dialogs import SymbolDialog, NotesDialog, ProjectDialog, HistoryDialog
+from .find_replace_dialog import FindReplaceDialog
 from utils.project_manager import ProjectManager
-from utils.chapter_manager import ChapterManager
+from utils.chapter_manager import open_chapter_manager
+from utils.project_stats import ProjectStats
+from utils.search_index import SearchIndex
+from utils.save_scheduler import SaveScheduler
+from utils.document_cache import DocumentCache
+from utils.chapter_prefetch import ChapterPrefetcher
+from utils.project_loader import ProjectLoader
+from utils.find_replace import document_positions
+from utils.edit_journal import JournalRecorder, content_hash, wait_for_writes
 from utils.styles import DARK_THEME, LIGHT_THEME
-from utils.logger import log_info
-from utils.settings import load_theme_preference, save_theme_preference
+from utils.logger import log_info, log_timing
+from utils.dictionary_service import DictionaryService
+from utils.startup_profile import timed
+from utils.settings import Settings
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -26,14 +39,34 @@ class MainWindow(QMainWindow):
         # Project Manager
         self.project_manager = ProjectManager()
         self.chapter_manager = None
+        self.project_stats = None
+        self.search_index = None
+        self.project_loader = None
         self.current_chapter = None
+        # Every debounced write (chapters, notes, characters) goes through here
+        self.save_scheduler = SaveScheduler()
+        self.save_scheduler.saved.connect(self.on_saved)
+        self.save_scheduler.save_failed.connect(self.on_save_failed)
+        # Keystroke-level journal of the open chapter, between saves
+        self.journal_recorder = JournalRecorder(self)
+        # Recently visited chapters, kept as live documents by filename
+        self.documents = DocumentCache(parent=self)
+        self.documents.about_to_evict.connect(self.on_document_evicted)
+        # Next and previous chapters, read (and spellchecked) ahead of time
+        self.settings = Settings.instance()
+        self.settings.changed.connect(self.on_setting_changed)
+        self.prefetcher = ChapterPrefetcher(self)
+        self.prefetcher.spellcheck = self.settings.prefetch_spellcheck
         
         # Dialogs
         self.symbol_dialog = None
         self.notes_dialog = None
+        self.find_dialog = None
+        # Chapter picked while a replace was writing it, opened once it lands
+        self.chapter_after_replace = None
         
         # Theme
-        self.is_dark_mode = load_theme_preference()
+        self.is_dark_mode = self.settings.dark_mode
 
         # Central Widget
         central_widget = QWidget()
@@ -51,20 +84,24 @@ class MainWindow(QMainWindow):
         left_layout.setContentsMargins(0, 0, 0, 0)
         left_layout.setSpacing(5)
         
-        self.chapter_sidebar = ChapterSidebar()
-        self.char_sidebar = CharacterSidebar()
+        self.chapter_sidebar = timed("ChapterSidebar", ChapterSidebar)
+        self.char_sidebar = timed("CharacterSidebar", CharacterSidebar)
+        # Project-wide search, shown from the toolbar
+        self.search_sidebar = timed("SearchSidebar", SearchSidebar)
+        self.search_sidebar.hide()
         
         left_layout.addWidget(self.chapter_sidebar, 1)
         left_layout.addWidget(self.char_sidebar, 1)
+        left_layout.addWidget(self.search_sidebar, 1)
         
         splitter.addWidget(left_panel)
         
         # Center: Editor
-        self.editor = NovelEditor()
+        self.editor = timed("NovelEditor", NovelEditor)
         splitter.addWidget(self.editor)
         
         # Right: AI Chat
-        self.ai_sidebar = AIChatSidebar()
+        self.ai_sidebar = timed("AIChatSidebar", AIChatSidebar)
         splitter.addWidget(self.ai_sidebar)
 
         # Set initial sizes (20%, 60%, 20%)
@@ -75,37 +112,41 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(splitter)
 
         # Toolbar
-        self.create_toolbar()
+        timed("Toolbar", self.create_toolbar)
         
         # Menu Bar (Project)
-        self.create_menu()
+        timed("Menu", self.create_menu)
 
         # Status Bar
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
         self.stats_label = QLabel("Palabras: 0 | Caracteres: 0 | Capítulos: 0")
         self.status_bar.addPermanentWidget(self.stats_label)
+        self.project_label = QLabel("")
+        self.status_bar.addPermanentWidget(self.project_label)
+        self.save_label = QLabel("")
+        self.status_bar.addPermanentWidget(self.save_label)
+        self.save_scheduler.pending_changed.connect(self.update_save_label)
 
         # Connect Signals
         self.char_sidebar.insert_character_signal.connect(self.editor.insertPlainText)
+        self.char_sidebar.characters_changed.connect(DictionaryService.instance().set_character_names)
         self.chapter_sidebar.chapter_selected.connect(self.load_chapter)
+        self.search_sidebar.result_selected.connect(self.open_search_result)
         self.editor.stats_updated.connect(self.update_stats_label)
+        self.editor.scheduler.progress.connect(self.update_highlight_progress)
         self.editor.textChanged.connect(self.auto_save_chapter)
+        self.char_sidebar.save_scheduler = self.save_scheduler
         
         # AI Signals
         self.ai_sidebar.insert_text_requested.connect(self.editor.insertPlainText)
         self.ai_sidebar.create_chapter_requested.connect(self.create_chapter_from_ai)
         
-        # Auto-save timer (every 60 seconds)
-        self.auto_save_timer = QTimer()
-        self.auto_save_timer.timeout.connect(self.save_current_chapter)
-        self.auto_save_timer.start(60000)  # 60 seconds
-        
         # Initial Project Check - Deferred to ensure window is shown first
         QTimer.singleShot(100, self.open_project_manager)
         
         # Apply saved theme
-        self.apply_theme()
+        timed("Theme", self.apply_theme)
 
     def create_menu(self):
         menubar = self.menuBar()
@@ -115,6 +156,10 @@ class MainWindow(QMainWindow):
         pm_action.triggered.connect(self.open_project_manager)
         project_menu.addAction(pm_action)
         
+        history_action = QAction("Historial de Versiones", self)
+        history_action.triggered.connect(self.show_history)
+        project_menu.addAction(history_action)
+
         close_project_action = QAction("Cerrar Proyecto", self)
         close_project_action.triggered.connect(self.close_project)
         project_menu.addAction(close_project_action)
@@ -125,6 +170,12 @@ class MainWindow(QMainWindow):
         self.theme_action.triggered.connect(self.toggle_theme)
         view_menu.addAction(self.theme_action)
 
+        prefetch_action = QAction("Revisar ortografía de capítulos contiguos", self)
+        prefetch_action.setCheckable(True)
+        prefetch_action.setChecked(self.settings.prefetch_spellcheck)
+        prefetch_action.toggled.connect(self.toggle_prefetch_spellcheck)
+        view_menu.addAction(prefetch_action)
+
     def open_project_manager(self):
         dialog = ProjectDialog(self.project_manager, self)
         dialog.project_selected.connect(self.load_project)
@@ -133,30 +184,65 @@ class MainWindow(QMainWindow):
     def load_project(self, project_name):
         log_info(f"Loading project: {project_name}")
         try:
+            # Pending writes belong to the previous project: they, and the
+            # cached chapters evicted here, reach its storage before it closes
+            self.stop_project_loader()
+            self.close_find_dialog()
+            self.save_project_data()
+            self.journal_recorder.detach()
+            self.editor.clear_document()
+            self.documents.clear()
+            self.current_chapter = None
+            self.save_scheduler.flush()
+
             success, path = self.project_manager.open_project(project_name)
             if success:
                 self.setWindowTitle(f"Kuno Writer - {project_name}")
-                
+
                 # Initialize Chapter Manager
-                self.chapter_manager = ChapterManager(path)
+                if self.chapter_manager:
+                    self.chapter_manager.close()
+                self.chapter_manager = open_chapter_manager(self.project_manager)
+                self.chapter_manager.chapters_changed.connect(
+                    lambda: self.update_stats_label(*self.editor.stats.totals())
+                )
                 self.chapter_sidebar.set_chapter_manager(self.chapter_manager)
+                self.prefetcher.set_chapter_manager(self.chapter_manager)
                 log_info("Chapter manager initialized.")
+
+                # Whole-project totals, cached totals first
+                if self.project_stats:
+                    self.project_stats.close()
+                self.project_stats = ProjectStats(self.chapter_manager)
+                self.project_stats.totals_changed.connect(self.update_project_label)
+                self.project_stats.refresh()
+
+                # Search index: saved index first, changed chapters in the background
+                if self.search_index:
+                    self.search_index.close()
+                self.search_index = SearchIndex(self.chapter_manager)
+                self.search_sidebar.set_search_index(self.search_index, self.chapter_manager)
+                self.search_index.load_in_background()
                 
-                # Load Characters
-                self.char_sidebar.set_project_manager(self.project_manager)
-                log_info("Characters loaded.")
-                
-                # Clear editor
-                self.editor.clear()
-                self.current_chapter = None
-                
-                # Load first chapter if exists
-                chapters = self.chapter_manager.get_chapters()
-                if chapters:
-                    self.load_chapter(chapters[0])
+                # Characters arrive from the loader; no edits until they do
+                self.char_sidebar.set_project_manager(self.project_manager, [])
+                self.char_sidebar.setEnabled(False)
+
+                # Project words for the spellchecker, character names once loaded
+                DictionaryService.instance().set_project(path)
+
+                # Characters and the first chapter are read in the background
+                self.project_loader = ProjectLoader(self.project_manager, self.chapter_manager, project_name)
+                self.project_loader.characters_loaded.connect(self.on_project_characters)
+                self.project_loader.chapter_loaded.connect(self.on_project_first_chapter)
+                self.project_loader.start()
+                self.statusBar().showMessage("Abriendo proyecto...")
                 
                 # Reset Notes Dialog if open
                 if self.notes_dialog:
+                    # Its notes were saved above, into the previous project
+                    self.notes_dialog.finished.disconnect(self.save_notes)
+                    self.notes_dialog.editor.textChanged.disconnect(self.auto_save_notes)
                     self.notes_dialog.close()
                     self.notes_dialog = None
             else:
@@ -165,6 +251,32 @@ class MainWindow(QMainWindow):
             log_info(f"CRITICAL ERROR loading project: {e}")
             QMessageBox.critical(self, "Error Fatal", f"Error al cargar el proyecto: {e}")
 
+    def stop_project_loader(self):
+        if self.project_loader:
+            self.project_loader.stop()
+            # Short: the loader checks the flag between reads and while sizing the project
+            self.project_loader.wait()
+            self.project_loader = None
+
+    def on_project_characters(self, characters):
+        if self.sender() is not self.project_loader:
+            return
+        self.char_sidebar.set_project_manager(self.project_manager, characters)
+        self.char_sidebar.setEnabled(True)
+        DictionaryService.instance().set_character_names(characters)
+        log_info("Characters loaded.")
+
+    def on_project_first_chapter(self, filename, version, content):
+        if self.sender() is not self.project_loader:
+            return
+        self.statusBar().clearMessage()
+        # Unless the user already picked a chapter
+        if self.current_chapter or filename not in self.chapter_manager:
+            return
+        if content is not None:
+            self.prefetcher.keep(filename, version, content)
+        self.load_chapter(filename)
+
     def create_chapter_from_ai(self, title):
         """Create a new chapter requested by AI"""
         if not self.chapter_manager:
@@ -177,11 +289,9 @@ class MainWindow(QMainWindow):
             self.load_chapter(filename)
             
             # Select in list
-            items = self.chapter_sidebar.chapter_list.findItems(filename, Qt.MatchFlag.MatchExactly)
-            if items:
-                self.chapter_sidebar.chapter_list.setCurrentItem(items[0])
+            self.chapter_sidebar.select_chapter(filename)
                 
-            QMessageBox.information(self, "Éxito", f"Capítulo creado: {filename}")
+            QMessageBox.information(self, "Éxito", f"Capítulo creado: {self.chapter_manager.label(filename)}")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"No se pudo crear el capítulo: {e}")
 
@@ -189,47 +299,168 @@ class MainWindow(QMainWindow):
         """Load a chapter into the editor"""
         if not self.chapter_manager:
             return
+        if self.find_dialog and self.find_dialog.replacing(filename):
+            # Opened now, its old text would overwrite the replace or be overwritten by it
+            self.chapter_after_replace = filename
+            self.statusBar().showMessage(f"{filename} se abrirá al terminar el reemplazo")
+            return
+        self.chapter_after_replace = None
         
+        start = time.perf_counter()
         # Save current chapter first
         if self.current_chapter:
             self.save_current_chapter()
         
-        # Load new chapter
-        content = self.chapter_manager.load_chapter(filename)
-        self.editor.setPlainText(content)
-        self.current_chapter = filename
+        self.journal_recorder.detach()
+        chapter_document = self.documents.get(filename)
+        if chapter_document and not self.is_document_current(filename, chapter_document):
+            # Changed on disk (outside the app, restored, deleted) since it was cached
+            self.documents.discard(filename)
+            chapter_document = None
+
+        if chapter_document:
+            # Still open: swap it in, with its undo stack and highlighting
+            self.editor.show_document(chapter_document)
+            self.current_chapter = filename
+        else:
+            # Load new chapter (its last save may still be on its way to disk)
+            content = self.save_scheduler.pending_content(self.chapter_key(filename))
+            version = self.chapter_manager.version(filename)
+            if content is None:
+                # Read ahead by the prefetcher unless it changed since
+                prefetched = self.prefetcher.take(filename, version)
+                content = self.chapter_manager.load_chapter(filename, prefetched)
+            chapter_document = self.editor.load_text(content)
+            chapter_document.version = version
+            self.documents.put(filename, chapter_document)
+            self.current_chapter = filename
+            if self.chapter_manager.was_recovered(filename):
+                # The journal had edits the file is missing: save them for real
+                self.editor.document().setModified(True)
+                self.auto_save_chapter()
+                self.statusBar().showMessage(f"Se recuperaron cambios sin guardar de {filename}", 5000)
+        self.journal_recorder.attach(self.editor.document(), self.chapter_manager.journal(filename))
+        self.documents.trim(keep=filename)
+        self.prefetch_neighbours(filename)
+        log_timing("load_chapter", time.perf_counter() - start, chapter=filename)
         log_info(f"Loaded chapter: {filename}")
+        log_info(f"Spellcheck cache: {self.editor.spellcheck.verdict_cache.stats()}")
+
+    def prefetch_neighbours(self, filename):
+        """Gets the chapters before and after filename ready, unless already open"""
+        chapters = self.chapter_manager.get_chapters()
+        index = self.chapter_manager.number(filename) - 1
+        # Next first: most writing and reading goes forward
+        neighbours = [chapters[i] for i in (index + 1, index - 1) if 0 <= i < len(chapters)]
+        self.prefetcher.prefetch([f for f in neighbours if f not in self.documents])
+
+    def is_document_current(self, filename, chapter_document):
+        """True if a cached document still matches its chapter on disk"""
+        if filename not in self.chapter_manager:
+            return False
+        if self.save_scheduler.pending_content(self.chapter_key(filename)) is not None:
+            # Its own save is on the way; on_saved records the new version
+            return True
+        return chapter_document.version == self.chapter_manager.version(filename)
+
+    def on_document_evicted(self, filename, chapter_document):
+        """Saves a chapter dropped from the cache if it has unsaved text"""
+        document = chapter_document.document
+        if not document.isModified() or not self.chapter_manager:
+            return
+        content = document.toPlainText()
+        document.setModified(False)
+        self.save_scheduler.schedule(
+            self.chapter_key(filename), lambda: content,
+            partial(self.chapter_manager.save_chapter, filename)
+        )
+        self.save_scheduler.save_now(self.chapter_key(filename))
+
+    def chapter_key(self, filename=None):
+        """SaveScheduler key of a chapter of the open project"""
+        return ("chapter", self.chapter_manager, filename or self.current_chapter)
+
+    def collect_chapter(self):
+        """Editor text to save, or None if nothing was typed since the last save"""
+        document = self.editor.document()
+        if not document.isModified():
+            return None
+        document.setModified(False)
+        content = self.editor.toPlainText()
+        self.journal_recorder.checkpoint(content)
+        return content
 
     def save_current_chapter(self):
         """Save the current chapter"""
         if self.chapter_manager and self.current_chapter:
-            content = self.editor.toPlainText()
-            self.chapter_manager.save_chapter(self.current_chapter, content)
+            self.auto_save_chapter()
+            self.save_scheduler.save_now(self.chapter_key())
 
     def auto_save_chapter(self):
-        """Auto-save on text change (debounced)"""
-        if hasattr(self, '_save_timer'):
-            self._save_timer.stop()
-        
-        self._save_timer = QTimer()
-        self._save_timer.setSingleShot(True)
-        self._save_timer.timeout.connect(self.save_current_chapter)
-        self._save_timer.start(2000)  # Save after 2 seconds of inactivity
+        """Auto-save on text change (debounced by the save scheduler)"""
+        if self.chapter_manager and self.current_chapter:
+            self.save_scheduler.schedule(
+                self.chapter_key(), self.collect_chapter,
+                partial(self.chapter_manager.save_chapter, self.current_chapter)
+            )
+
+    def on_saved(self, key, content, result):
+        # result is False when the chapter file already had that content
+        if key[0] == "chapter":
+            # The journal only needs the edits made after this save
+            key[1].journal(key[2]).queue_compact(content_hash(content))
+            if result and self.project_stats:
+                self.project_stats.record(key[2], content)
+            chapter_document = self.documents.get(key[2]) if key[1] is self.chapter_manager else None
+            if result and chapter_document:
+                chapter_document.version = key[1].version(key[2])
+
+    def on_save_failed(self, key, error):
+        chapter_document = None
+        if key[0] == "chapter" and key[1] is self.chapter_manager:
+            chapter_document = self.documents.get(key[2])
+        if chapter_document:
+            # Saved again on the next change, or when evicted
+            chapter_document.document.setModified(True)
+        self.statusBar().showMessage(f"Error al guardar {key[-1]}: {error}", 5000)
+
+    def update_save_label(self, pending):
+        self.save_label.setText(f"Guardando ({pending})..." if pending else "")
 
     def save_project_data(self):
         # Save current chapter
         self.save_current_chapter()
+        if self.notes_dialog:
+            self.save_notes()
 
     def close_project(self):
         """Close current project and return to project manager"""
-        # Save everything first
+        # Save everything first, evicted chapters included
+        self.stop_project_loader()
+        self.close_find_dialog()
         self.save_project_data()
-        
-        # Clear editor and reset state
-        self.editor.clear()
+        self.journal_recorder.detach()
+        self.editor.clear_document()
+        self.documents.clear()
         self.current_chapter = None
+        self.save_scheduler.flush()
+
+        # Reset state
+        if self.chapter_manager:
+            self.chapter_manager.close()
         self.chapter_manager = None
-        self.project_manager.current_project_path = None
+        self.chapter_sidebar.chapter_manager = None
+        self.prefetcher.set_chapter_manager(None)
+        if self.project_stats:
+            self.project_stats.close()
+            self.project_stats = None
+        if self.search_index:
+            self.search_index.close()
+            self.search_index = None
+        self.search_sidebar.set_search_index(None, None)
+        self.project_label.setText("")
+        self.project_manager.close_project()
+        DictionaryService.instance().set_project(None)
         
         # Clear sidebars
         self.chapter_sidebar.chapter_list.clear()
@@ -242,7 +473,24 @@ class MainWindow(QMainWindow):
         self.open_project_manager()
 
     def closeEvent(self, event):
+        self.stop_project_loader()
+        self.prefetcher.stop()
+        self.close_find_dialog()
         self.save_project_data()
+        # Cached chapters whose last save failed
+        for filename, chapter_document in list(self.documents.items.items()):
+            self.on_document_evicted(filename, chapter_document)
+        self.save_scheduler.stop()
+        self.journal_recorder.detach()
+        wait_for_writes()
+        if self.chapter_manager:
+            self.chapter_manager.close()
+        if self.project_stats:
+            self.project_stats.close()
+        if self.search_index:
+            self.search_index.close()
+        # Checkpoints a project.db's WAL back into the file
+        self.project_manager.close_project()
         super().closeEvent(event)
 
     def create_toolbar(self):
@@ -261,6 +509,18 @@ class MainWindow(QMainWindow):
         export_action.triggered.connect(self.save_file)
         toolbar.addAction(export_action)
         
+        search_action = QAction("🔍 Buscar", self)
+        search_action.setToolTip("Buscar en todo el proyecto (Ctrl+Shift+F)")
+        search_action.setShortcut("Ctrl+Shift+F")
+        search_action.triggered.connect(self.show_search)
+        toolbar.addAction(search_action)
+
+        replace_action = QAction("🔁 Reemplazar", self)
+        replace_action.setToolTip("Buscar y reemplazar en todo el proyecto (Ctrl+H)")
+        replace_action.setShortcut("Ctrl+H")
+        replace_action.triggered.connect(self.show_find_replace)
+        toolbar.addAction(replace_action)
+        
         toolbar.addSeparator()
 
         # Formatting Actions
@@ -312,6 +572,88 @@ class MainWindow(QMainWindow):
         notes_btn.triggered.connect(self.show_notes)
         toolbar.addAction(notes_btn)
 
+    def show_search(self):
+        self.search_sidebar.show()
+        self.search_sidebar.focus_search()
+
+    def open_search_result(self, filename, offset, length):
+        """Opens the chapter of a search hit with the match selected"""
+        if filename != self.current_chapter:
+            self.load_chapter(filename)
+        if filename != self.current_chapter:
+            return
+        # Offsets are from the last save; clamp in case the text changed since
+        text = self.editor.toPlainText()
+        start, end = document_positions(text, [min(offset, len(text)), min(offset + length, len(text))])
+        cursor = self.editor.textCursor()
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        self.editor.setTextCursor(cursor)
+        self.editor.ensureCursorVisible()
+        self.editor.setFocus()
+
+    def show_find_replace(self):
+        if not self.chapter_manager:
+            QMessageBox.warning(self, "Error", "No hay un proyecto abierto.")
+            return
+        if not self.find_dialog:
+            self.find_dialog = FindReplaceDialog(
+                self.chapter_manager, self.find_replace_text, self.replace_in_editor, self
+            )
+            self.find_dialog.result_selected.connect(self.open_search_result)
+            self.find_dialog.chapters_replaced.connect(self.on_chapters_replaced)
+            self.find_dialog.replace_finished.connect(self.on_replace_finished)
+        self.find_dialog.show()
+        self.find_dialog.raise_()
+        self.find_dialog.activateWindow()
+
+    def close_find_dialog(self):
+        """Closes find and replace, which searches the chapters of the open project"""
+        if self.find_dialog:
+            self.find_dialog.close()
+            self.find_dialog.deleteLater()
+            self.find_dialog = None
+        self.chapter_after_replace = None
+
+    def find_replace_text(self):
+        """(filename, editor text) of the open chapter, every other chapter saved to disk"""
+        self.save_current_chapter()
+        self.save_scheduler.flush()
+        if not self.current_chapter:
+            return None, None
+        return self.current_chapter, self.editor.toPlainText()
+
+    def replace_in_editor(self, filename, matches):
+        """Replaces matches of the open chapter as one edit, so Ctrl+Z undoes all of them"""
+        if filename != self.current_chapter or not matches:
+            return
+        text = self.editor.toPlainText()
+        self.chapter_manager.history.snapshot(filename, text, force=True)
+        positions = document_positions(text, [offset for start, end, _ in matches for offset in (start, end)])
+        cursor = QTextCursor(self.editor.document())
+        cursor.beginEditBlock()
+        # Last first, so the positions before each match stay valid
+        for i in range(len(matches) - 1, -1, -1):
+            cursor.setPosition(positions[2 * i])
+            cursor.setPosition(positions[2 * i + 1], QTextCursor.MoveMode.KeepAnchor)
+            cursor.insertText(matches[i][2])
+        cursor.endEditBlock()
+
+    def on_chapters_replaced(self, contents):
+        """Chapters rewritten on disk by a replace: drop their stale cached documents"""
+        for filename, content in contents.items():
+            # Never the open chapter: load_chapter holds them back until now
+            self.documents.discard(filename)
+            if self.project_stats:
+                self.project_stats.record(filename, content)
+        self.statusBar().showMessage(f"Reemplazos guardados en {len(contents)} capítulos", 3000)
+
+    def on_replace_finished(self):
+        filename = self.chapter_after_replace
+        self.chapter_after_replace = None
+        if filename and self.chapter_manager and filename in self.chapter_manager:
+            self.load_chapter(filename)
+
     def show_symbols(self):
         if not self.symbol_dialog:
             self.symbol_dialog = SymbolDialog(self)
@@ -320,27 +662,73 @@ class MainWindow(QMainWindow):
         self.symbol_dialog.raise_()
         self.symbol_dialog.activateWindow()
 
+    def show_history(self):
+        if not self.chapter_manager:
+            QMessageBox.warning(self, "Error", "No hay un proyecto abierto.")
+            return
+        # Versions written by pending saves should show up too
+        self.save_current_chapter()
+        self.save_scheduler.flush()
+        dialog = HistoryDialog(
+            self.chapter_manager.history, self.chapter_manager.get_chapters(),
+            self.current_chapter, self
+        )
+        dialog.restore_requested.connect(self.restore_chapter_version)
+        dialog.exec()
+
+    def restore_chapter_version(self, filename, content):
+        if filename == self.current_chapter:
+            # Replaced through the editor so Ctrl+Z brings the text back
+            self.chapter_manager.history.snapshot(filename, self.editor.toPlainText(), force=True)
+            cursor = self.editor.textCursor()
+            cursor.beginEditBlock()
+            cursor.select(QTextCursor.SelectionType.Document)
+            cursor.insertText(content)
+            cursor.endEditBlock()
+        else:
+            self.chapter_manager.restore_chapter(filename, content)
+        self.statusBar().showMessage(f"Versión restaurada: {filename}", 3000)
+
     def show_notes(self):
         if not self.notes_dialog:
             content = self.project_manager.load_content("notes.txt", "")
             self.notes_dialog = NotesDialog(content, self)
             self.notes_dialog.finished.connect(self.save_notes)
+            self.notes_dialog.editor.textChanged.connect(self.auto_save_notes)
         self.notes_dialog.show()
         self.notes_dialog.raise_()
         self.notes_dialog.activateWindow()
 
+    def auto_save_notes(self):
+        if self.notes_dialog and self.project_manager.current_project_path:
+            self.save_scheduler.schedule(
+                ("notes",), self.notes_dialog.get_content,
+                self.project_manager.content_writer("notes.txt")
+            )
+
     def save_notes(self):
         if self.notes_dialog:
-            content = self.notes_dialog.get_content()
-            self.project_manager.save_content("notes.txt", content)
+            self.auto_save_notes()
+            self.save_scheduler.save_now(("notes",))
 
     def update_stats_label(self, words, chars, chapters):
         # Get total chapters from project
         total_chapters = 0
         if self.chapter_manager:
-            total_chapters = len(self.chapter_manager.get_chapters())
+            total_chapters = self.chapter_manager.count()
         
         self.stats_label.setText(f"Palabras: {words} | Caracteres: {chars} | Capítulos: {total_chapters}")
+        if self.project_stats:
+            self.project_stats.set_live(self.current_chapter, words, chars)
+
+    def update_project_label(self, words, chars):
+        self.project_label.setText(f"Proyecto: {words} palabras | {chars} caracteres")
+
+    def update_highlight_progress(self, done, total):
+        if done < total:
+            self.statusBar().showMessage(f"Revisando ortografía... {done * 100 // total}%")
+        else:
+            self.statusBar().showMessage("Ortografía revisada", 2000)
 
     def quick_save(self):
         """Quick save current chapter"""
@@ -377,6 +765,8 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "Error", f"No se pudo exportar: {e}")
 
     def export_pdf(self, path):
+        # QtPrintSupport is only loaded for the first PDF export
+        from PyQt6.QtPrintSupport import QPrinter
         printer = QPrinter(QPrinter.PrinterMode.HighResolution)
         printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
         printer.setOutputFileName(path)
@@ -386,12 +776,19 @@ class MainWindow(QMainWindow):
     def toggle_theme(self):
         """Toggle between dark and light theme"""
         self.is_dark_mode = not self.is_dark_mode
-        save_theme_preference(self.is_dark_mode)
+        self.settings.dark_mode = self.is_dark_mode
         self.apply_theme()
         
         # Update menu text
         self.theme_action.setText("🌙 Modo Oscuro" if not self.is_dark_mode else "☀️ Modo Claro")
 
+    def toggle_prefetch_spellcheck(self, enabled):
+        self.settings.prefetch_spellcheck = enabled
+
+    def on_setting_changed(self, key, value):
+        if key == "prefetch_spellcheck":
+            self.prefetcher.spellcheck = value
+
     def apply_theme(self):
         """Apply the current theme"""
         from PyQt6.QtWidgets import QApplication
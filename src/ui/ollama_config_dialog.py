@@ -3,7 +3,7 @@ from PyQt6.QtWidgets import (
     QPushButton, QComboBox, QMessageBox
 )
 from PyQt6.QtCore import Qt
-import requests
+from utils.ollama_client import OllamaClient
 
 class OllamaConfigDialog(QDialog):
     def __init__(self, current_url, current_model, parent=None):
@@ -57,50 +57,50 @@ class OllamaConfigDialog(QDialog):
         
         layout.addLayout(btn_layout)
         
+        # Model lists arrive asynchronously, tagged with the request id
+        self.request_id = None
+        self.client = OllamaClient.instance()
+        self.client.models_listed.connect(self.on_models_listed)
+        self.client.failed.connect(self.on_models_failed)
+
         # Auto-refresh on open
         self.refresh_models()
 
     def refresh_models(self):
-        """Fetch available models from Ollama"""
+        """Fetch available models from Ollama, through the shared client"""
         self.status_label.setText("Detectando modelos...")
+        self.status_label.setStyleSheet("color: #888; font-size: 11px;")
         self.model_combo.clear()
-        
-        try:
-            # Get base URL for tags endpoint
-            base_url = self.url_input.text().strip()
-            if base_url.endswith('/api/generate'):
-                base_url = base_url.replace('/api/generate', '')
-            
-            tags_url = f"{base_url}/api/tags"
-            
-            response = requests.get(tags_url, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                models = data.get('models', [])
-                
-                if models:
-                    model_names = [model['name'] for model in models]
-                    self.model_combo.addItems(model_names)
-                    self.status_label.setText(f"✓ {len(model_names)} modelo(s) encontrado(s)")
-                    self.status_label.setStyleSheet("color: #4ec9b0; font-size: 11px;")
-                    
-                    # Select previously selected model if available
-                    if self.selected_model and self.selected_model in model_names:
-                        self.model_combo.setCurrentText(self.selected_model)
-                else:
-                    self.status_label.setText("⚠ No hay modelos disponibles. Ejecuta 'ollama pull <modelo>' primero.")
-                    self.status_label.setStyleSheet("color: #f48771; font-size: 11px;")
-            else:
-                self.status_label.setText(f"❌ Error al obtener modelos: {response.status_code}")
-                self.status_label.setStyleSheet("color: #f48771; font-size: 11px;")
-                
-        except requests.exceptions.ConnectionError:
-            self.status_label.setText("❌ No se pudo conectar a Ollama. Verifica que esté corriendo.")
-            self.status_label.setStyleSheet("color: #f48771; font-size: 11px;")
-        except Exception as e:
-            self.status_label.setText(f"❌ Error: {str(e)}")
+        self.request_id = self.client.list_models(self.url_input.text())
+
+    def on_models_listed(self, request_id, model_names):
+        if request_id != self.request_id:
+            return
+        if model_names:
+            self.model_combo.addItems(model_names)
+            self.status_label.setText(f"✓ {len(model_names)} modelo(s) encontrado(s)")
+            self.status_label.setStyleSheet("color: #4ec9b0; font-size: 11px;")
+
+            # Select previously selected model if available
+            if self.selected_model and self.selected_model in model_names:
+                self.model_combo.setCurrentText(self.selected_model)
+        else:
+            self.status_label.setText("⚠ No hay modelos disponibles. Ejecuta 'ollama pull <modelo>' primero.")
             self.status_label.setStyleSheet("color: #f48771; font-size: 11px;")
 
+    def on_models_failed(self, request_id, error_msg):
+        if request_id != self.request_id:
+            return
+        if error_msg == "TIMEOUT":
+            error_msg = "Ollama no respondió a tiempo."
+        self.status_label.setText(f"❌ {error_msg}")
+        self.status_label.setStyleSheet("color: #f48771; font-size: 11px;")
+
+    def done(self, result):
+        self.client.models_listed.disconnect(self.on_models_listed)
+        self.client.failed.disconnect(self.on_models_failed)
+        super().done(result)
+
     def save_config(self):
         """Save configuration and close dialog"""
         url = self.url_input.text().strip()
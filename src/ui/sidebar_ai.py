@@ -1,92 +1,32 @@
+from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QTextEdit, QLineEdit, QPushButton, QLabel, 
     QHBoxLayout, QMessageBox, QCheckBox, QScrollArea, QFrame, QSizePolicy,
     QSpacerItem, QComboBox
 )
 from PyQt6.QtGui import QTextCursor, QDesktopServices
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QUrl, QTimer
-import requests
-import json
+from PyQt6.QtCore import Qt, pyqtSignal, QUrl, QTimer
 import os
 import re
-from utils.settings import (
-    load_ollama_url, save_ollama_url, load_ollama_model, save_ollama_model,
-    load_style_preference, save_style_preference
-)
+from utils.settings import Settings
+from utils.ollama_client import OllamaClient
 from .ollama_config_dialog import OllamaConfigDialog
 
-class AIWorker(QThread):
-    finished = pyqtSignal(str)
-    stream_update = pyqtSignal(str)
-    error = pyqtSignal(str)
-    
-    def __init__(self, prompt, url, model, system_template="", context=""):
-        super().__init__()
-        self.prompt = prompt
-        self.url = url
-        self.model = model
-        self.system_template = system_template
-        self.context = context
-
-    def run(self):
-        try:
-            # Construct final prompt with system template if present
-            final_prompt = self.prompt
-            if self.system_template:
-                # Replace {{ .Prompt }} in template or prepend it
-                if "{{ .Prompt }}" in self.system_template:
-                    final_prompt = self.system_template.replace("{{ .Prompt }}", self.prompt)
-                else:
-                    final_prompt = f"{self.system_template}\n\n{self.prompt}"
-
-            # Include model in payload
-            payload = {
-                "model": self.model,
-                "prompt": final_prompt,
-                "stream": True,
-                "options": {
-                    "temperature": 0.95,
-                    "top_p": 0.95,
-                    "top_k": 50,
-                    "repeat_penalty": 1.1
-                }
-            }
-            
-            # Increased timeout to 120s (wait for connection/first byte)
-            with requests.post(self.url, json=payload, stream=True, timeout=120) as response:
-                if response.status_code == 200:
-                    full_response = ""
-                    for line in response.iter_lines():
-                        if line:
-                            try:
-                                json_response = json.loads(line)
-                                chunk = json_response.get("response", "")
-                                if chunk:
-                                    full_response += chunk
-                                    self.stream_update.emit(chunk)
-                                if json_response.get("done", False):
-                                    break
-                            except json.JSONDecodeError:
-                                continue
-                    self.finished.emit(full_response)
-                else:
-                    # Parse error message
-                    try:
-                        error_data = response.json()
-                        error_msg = error_data.get("error", response.text)
-                    except:
-                        error_msg = response.text
-                    
-                    if "no model" in error_msg.lower() or "model not found" in error_msg.lower():
-                        self.error.emit(f"Modelo '{self.model}' no encontrado. Verifica que esté disponible en Ollama.")
-                    else:
-                        self.error.emit(f"Error API ({response.status_code}): {error_msg}")
-
-        except requests.exceptions.ConnectionError:
-            self.error.emit("No se pudo conectar al servidor Ollama. Verifica que esté corriendo en la URL configurada.")
-        except requests.exceptions.Timeout:
-            self.error.emit("TIMEOUT")
-        except Exception as e:
-            self.error.emit(f"Error: {str(e)}")
+# Sampling options of every generation
+GENERATION_OPTIONS = {
+    "temperature": 0.95,
+    "top_p": 0.95,
+    "top_k": 50,
+    "repeat_penalty": 1.1
+}
+
+def build_prompt(prompt, system_template=""):
+    """Final prompt with the system template, if any, applied"""
+    if not system_template:
+        return prompt
+    # Replace {{ .Prompt }} in template or prepend it
+    if "{{ .Prompt }}" in system_template:
+        return system_template.replace("{{ .Prompt }}", prompt)
+    return f"{system_template}\n\n{prompt}"
 
 class ChatBubble(QFrame):
     action_requested = pyqtSignal(str, str) # type, content
@@ -209,8 +149,9 @@ class AIChatSidebar(QWidget):
         self.setLayout(self.layout)
         
         # Load saved configuration
-        self.ollama_url = load_ollama_url()
-        self.ollama_model = load_ollama_model()
+        self.settings = Settings.instance()
+        self.ollama_url = self.settings.ollama_url
+        self.ollama_model = self.settings.ollama_model
 
         # Title and Connection Button
         header_layout = QHBoxLayout()
@@ -253,9 +194,8 @@ class AIChatSidebar(QWidget):
         self.layout.addWidget(self.agent_mode_cb)
         
         # Load preferences
-        prefs = load_style_preference()
-        self.auto_style_cb.setChecked(prefs['auto_style'])
-        current_style = prefs['last_style']
+        self.auto_style_cb.setChecked(self.settings.auto_style)
+        current_style = self.settings.last_style
         index = self.style_combo.findText(current_style)
         if index >= 0:
             self.style_combo.setCurrentIndex(index)
@@ -294,6 +234,13 @@ class AIChatSidebar(QWidget):
         self.current_ai_bubble = None
         self.last_prompt = ""
 
+        # Replies of every request come through the same signals
+        self.request_id = None
+        self.client = OllamaClient.instance()
+        self.client.chunk_received.connect(self.on_chunk_received)
+        self.client.finished.connect(self.on_request_finished)
+        self.client.failed.connect(self.on_request_failed)
+
     def configure_connection(self):
         """Open dialog to configure Ollama connection"""
         dialog = OllamaConfigDialog(self.ollama_url, self.ollama_model, self)
@@ -303,8 +250,8 @@ class AIChatSidebar(QWidget):
             self.ollama_url = url
             self.ollama_model = model
             
-            save_ollama_url(url)
-            save_ollama_model(model)
+            self.settings.ollama_url = url
+            self.settings.ollama_model = model
             
             self.update_status()
             QMessageBox.information(
@@ -348,7 +295,8 @@ class AIChatSidebar(QWidget):
         self.style_combo.setEnabled(not is_auto)
         
         # Save preference
-        save_style_preference(is_auto, self.style_combo.currentText())
+        self.settings.auto_style = is_auto
+        self.settings.last_style = self.style_combo.currentText()
 
     def get_modelfile_content(self, style_name):
         """Read TEMPLATE from Modelfile"""
@@ -415,7 +363,8 @@ class AIChatSidebar(QWidget):
         else:
             style = self.style_combo.currentText()
             # Save manual selection
-            save_style_preference(False, style)
+            self.settings.auto_style = False
+            self.settings.last_style = style
 
         # Get Template
         system_template = self.get_modelfile_content(style)
@@ -432,12 +381,12 @@ class AIChatSidebar(QWidget):
             else:
                 system_template = agent_instr
 
-        # Start worker
-        self.worker = AIWorker(msg, self.ollama_url, self.ollama_model, system_template=system_template)
-        self.worker.stream_update.connect(self.handle_stream_update)
-        self.worker.finished.connect(self.handle_response)
-        self.worker.error.connect(self.handle_error)
-        self.worker.start()
+        # Queue on the shared client; a reply still streaming is dropped
+        if self.request_id is not None:
+            self.client.cancel(self.request_id)
+        self.request_id = self.client.generate(
+            self.ollama_url, self.ollama_model, build_prompt(msg, system_template), GENERATION_OPTIONS
+        )
 
     def add_message_bubble(self, sender, text):
         bubble = ChatBubble(sender, text)
@@ -461,6 +410,20 @@ class AIChatSidebar(QWidget):
         label.setWordWrap(True)
         self.chat_layout.insertWidget(self.chat_layout.count() - 1, label)
 
+    def on_chunk_received(self, request_id, chunk):
+        if request_id == self.request_id:
+            self.handle_stream_update(chunk)
+
+    def on_request_finished(self, request_id, reply):
+        if request_id == self.request_id:
+            self.request_id = None
+            self.handle_response(reply)
+
+    def on_request_failed(self, request_id, error_msg):
+        if request_id == self.request_id:
+            self.request_id = None
+            self.handle_error(error_msg)
+
     def handle_stream_update(self, chunk):
         if self.current_ai_bubble:
             self.current_ai_bubble.append_text(chunk)
@@ -1,5 +1,5 @@
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QListWidget, QPushButton, 
+    QWidget, QVBoxLayout, QListWidget, QListWidgetItem, QPushButton, 
     QHBoxLayout, QInputDialog, QMessageBox, QLabel
 )
 from PyQt6.QtCore import pyqtSignal, Qt
@@ -33,6 +33,14 @@ class ChapterSidebar(QWidget):
         self.rename_btn.setToolTip("Renombrar Capítulo")
         self.rename_btn.clicked.connect(self.rename_chapter)
         
+        self.up_btn = QPushButton("↑")
+        self.up_btn.setToolTip("Subir Capítulo")
+        self.up_btn.clicked.connect(lambda: self.move_chapter(-1))
+
+        self.down_btn = QPushButton("↓")
+        self.down_btn.setToolTip("Bajar Capítulo")
+        self.down_btn.clicked.connect(lambda: self.move_chapter(1))
+
         self.del_btn = QPushButton("🗑")
         self.del_btn.setObjectName("DeleteButton")
         self.del_btn.setToolTip("Eliminar Capítulo")
@@ -40,6 +48,8 @@ class ChapterSidebar(QWidget):
 
         btn_layout.addWidget(self.add_btn)
         btn_layout.addWidget(self.rename_btn)
+        btn_layout.addWidget(self.up_btn)
+        btn_layout.addWidget(self.down_btn)
         btn_layout.addWidget(self.del_btn)
         
         self.layout.addLayout(btn_layout)
@@ -49,13 +59,31 @@ class ChapterSidebar(QWidget):
 
     def set_chapter_manager(self, cm):
         self.chapter_manager = cm
+        # Chapters added, renamed or removed outside the app
+        cm.chapters_changed.connect(self.refresh_list)
         self.refresh_list()
 
     def refresh_list(self):
+        current = self.current_filename()
         self.chapter_list.clear()
         if self.chapter_manager:
-            chapters = self.chapter_manager.get_chapters()
-            self.chapter_list.addItems(chapters)
+            # Items show "Capítulo N - Title" and carry the chapter file
+            for filename in self.chapter_manager.get_chapters():
+                item = QListWidgetItem(self.chapter_manager.label(filename))
+                item.setData(Qt.ItemDataRole.UserRole, filename)
+                self.chapter_list.addItem(item)
+            # Keep the selection across refreshes
+            if current:
+                self.select_chapter(current)
+
+    def current_filename(self):
+        item = self.chapter_list.currentItem()
+        return item.data(Qt.ItemDataRole.UserRole) if item else None
+
+    def select_chapter(self, filename):
+        """Selects the item of filename without emitting chapter_selected"""
+        if self.chapter_manager and filename in self.chapter_manager:
+            self.chapter_list.setCurrentRow(self.chapter_manager.number(filename) - 1)
 
     def add_chapter(self):
         if not self.chapter_manager:
@@ -66,34 +94,32 @@ class ChapterSidebar(QWidget):
             filename = self.chapter_manager.create_chapter(title)
             self.refresh_list()
             # Select the new chapter
-            items = self.chapter_list.findItems(filename, Qt.MatchFlag.MatchExactly)
-            if items:
-                self.chapter_list.setCurrentItem(items[0])
-                self.chapter_selected.emit(filename)
+            self.select_chapter(filename)
+            self.chapter_selected.emit(filename)
 
     def rename_chapter(self):
         if not self.chapter_manager:
             return
         
-        current_item = self.chapter_list.currentItem()
-        if not current_item:
+        filename = self.current_filename()
+        if not filename:
             return
         
-        old_filename = current_item.text()
-        # Extract current title
-        parts = old_filename.replace('.txt', '').split(' - ', 1)
-        current_title = parts[1] if len(parts) == 2 else ""
-        
         new_title, ok = QInputDialog.getText(
-            self, "Renombrar Capítulo", "Nuevo título:", text=current_title
+            self, "Renombrar Capítulo", "Nuevo título:", text=self.chapter_manager.title(filename)
         )
         if ok and new_title:
-            new_filename = self.chapter_manager.rename_chapter(old_filename, new_title)
+            self.chapter_manager.rename_chapter(filename, new_title)
             self.refresh_list()
-            # Reselect
-            items = self.chapter_list.findItems(new_filename, Qt.MatchFlag.MatchExactly)
-            if items:
-                self.chapter_list.setCurrentItem(items[0])
+
+    def move_chapter(self, offset):
+        if not self.chapter_manager:
+            return
+        filename = self.current_filename()
+        if not filename:
+            return
+        self.chapter_manager.move_chapter(filename, self.chapter_manager.number(filename) - 1 + offset)
+        self.refresh_list()
 
     def delete_chapter(self):
         if not self.chapter_manager:
@@ -103,9 +129,9 @@ class ChapterSidebar(QWidget):
         if not current_item:
             return
         
-        filename = current_item.text()
+        filename = self.current_filename()
         confirm = QMessageBox.question(
-            self, "Confirmar", f"¿Eliminar '{filename}'?",
+            self, "Confirmar", f"¿Eliminar '{current_item.text()}'?",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         
@@ -114,4 +140,4 @@ class ChapterSidebar(QWidget):
             self.refresh_list()
 
     def on_item_clicked(self, item):
-        self.chapter_selected.emit(item.text())
+        self.chapter_selected.emit(item.data(Qt.ItemDataRole.UserRole))
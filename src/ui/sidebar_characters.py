@@ -6,6 +6,7 @@ from PyQt6.QtCore import pyqtSignal, Qt
 
 class CharacterSidebar(QWidget):
     insert_character_signal = pyqtSignal(str)
+    characters_changed = pyqtSignal(list)
 
     def __init__(self):
         super().__init__()
@@ -47,10 +48,17 @@ class CharacterSidebar(QWidget):
         # Initial Data
         self.characters = []
         self.project_manager = None
+        # Set by the main window; saves directly without one
+        self.save_scheduler = None
 
-    def set_project_manager(self, pm):
+    def set_project_manager(self, pm, characters=None):
+        """characters: the list already read from the project, if it was"""
         self.project_manager = pm
-        self.load_characters()
+        if characters is None:
+            self.load_characters()
+        else:
+            self.characters = characters
+            self.refresh_list()
 
     def load_characters(self):
         if self.project_manager:
@@ -59,7 +67,14 @@ class CharacterSidebar(QWidget):
 
     def save_characters(self):
         if self.project_manager:
-            self.project_manager.save_content("characters.json", self.characters)
+            if self.save_scheduler:
+                self.save_scheduler.schedule(
+                    ("characters",), lambda: list(self.characters),
+                    self.project_manager.content_writer("characters.json")
+                )
+            else:
+                self.project_manager.save_content("characters.json", self.characters)
+            self.characters_changed.emit(self.characters)
 
     def refresh_list(self):
         self.character_list.clear()
@@ -0,0 +1,109 @@
+import time
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QListWidget, QListWidgetItem, QLineEdit, QLabel
+)
+from PyQt6.QtCore import pyqtSignal, Qt, QTimer
+
+# Characters of context shown on each side of the first match
+SNIPPET_CONTEXT = 40
+
+class SearchSidebar(QWidget):
+    result_selected = pyqtSignal(str, int, int)  # chapter filename, offset, length
+
+    def __init__(self):
+        super().__init__()
+        self.layout = QVBoxLayout()
+        self.setLayout(self.layout)
+
+        # Title
+        title = QLabel("Buscar")
+        title.setStyleSheet("font-weight: bold; font-size: 16px; margin-bottom: 5px;")
+        self.layout.addWidget(title)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Palabras a buscar en todo el proyecto...")
+        self.search_input.textChanged.connect(self.on_text_changed)
+        self.search_input.returnPressed.connect(self.run_search)
+        self.layout.addWidget(self.search_input)
+
+        self.status_label = QLabel("")
+        self.layout.addWidget(self.status_label)
+
+        # Results: one item per chapter, carrying (filename, offset, length)
+        self.result_list = QListWidget()
+        self.result_list.setWordWrap(True)
+        self.result_list.itemClicked.connect(self.on_item_clicked)
+        self.layout.addWidget(self.result_list)
+
+        # Search as you type, once typing pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.run_search)
+
+        # Data
+        self.search_index = None
+        self.chapter_manager = None
+
+    def set_search_index(self, search_index, chapter_manager):
+        if self.search_index:
+            self.search_index.progress.disconnect(self.on_progress)
+        self.search_index = search_index
+        self.chapter_manager = chapter_manager
+        self.result_list.clear()
+        self.status_label.setText("")
+        if search_index:
+            search_index.progress.connect(self.on_progress)
+
+    def on_progress(self, waiting, total):
+        if waiting:
+            self.status_label.setText(f"Indexando... {total - waiting}/{total} capítulos")
+        elif not self.search_input.text().strip():
+            self.status_label.setText("")
+        else:
+            # Chapters indexed since the last search may match now
+            self.search_timer.start()
+
+    def on_text_changed(self):
+        self.search_timer.start()
+
+    def focus_search(self):
+        self.search_input.setFocus()
+        self.search_input.selectAll()
+
+    def run_search(self):
+        self.search_timer.stop()
+        self.result_list.clear()
+        query = self.search_input.text().strip()
+        if not self.search_index or not query:
+            self.status_label.setText("")
+            return
+
+        start = time.perf_counter()
+        hits = self.search_index.search(query)
+        elapsed = (time.perf_counter() - start) * 1000
+        for filename, score, positions in hits:
+            if filename not in self.chapter_manager:
+                continue
+            offset, length = positions[0] if positions else (0, 0)
+            text = f"{self.chapter_manager.label(filename)} ({len(positions)})"
+            snippet = self.snippet(filename, offset, length)
+            if snippet:
+                text += f"\n{snippet}"
+            item = QListWidgetItem(text)
+            item.setData(Qt.ItemDataRole.UserRole, (filename, offset, length))
+            self.result_list.addItem(item)
+        self.status_label.setText(f"{self.result_list.count()} capítulos ({elapsed:.0f} ms)")
+
+    def snippet(self, filename, offset, length):
+        """The first match with some context, from the chapter as saved"""
+        content, _ = self.chapter_manager.read_chapter(filename)
+        if not content:
+            return ""
+        start = max(0, offset - SNIPPET_CONTEXT)
+        end = min(len(content), offset + length + SNIPPET_CONTEXT)
+        text = " ".join(content[start:end].split())
+        return ("…" if start > 0 else "") + text + ("…" if end < len(content) else "")
+
+    def on_item_clicked(self, item):
+        self.result_selected.emit(*item.data(Qt.ItemDataRole.UserRole))
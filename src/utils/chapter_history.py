@@ -0,0 +1,210 @@
+"""
+Content-addressed version history of the chapters of a project.
+
+A snapshot splits the chapter into paragraphs and stores each one as a
+zlib-compressed chunk named by its sha1, so paragraphs that did not change
+between snapshots are stored once. The list of paragraph hashes is itself
+cut into groups at content-defined boundaries (a hash ending in a zero
+nibble), each group stored as a chunk, and the snapshot's root chunk lists
+the groups. Editing one paragraph therefore adds the paragraph, its group
+and a small root, not a copy of the chapter.
+
+Everything lives in <project>/.kuno/history/:
+
+    chunks.pack        zlib chunks, appended
+    chunks.idx         sha1, offset, length of each chunk (struct INDEX_ENTRY)
+    <chapter>.jsonl    one line per snapshot: time, root, words, chars
+"""
+import os
+import json
+import time
+import zlib
+import struct
+import hashlib
+import threading
+
+from utils.project_manager import META_DIR
+
+INDEX_ENTRY = struct.Struct("<20sQI")
+# Snapshots of a chapter closer than this are skipped (see ChapterHistory.snapshot)
+HISTORY_INTERVAL = 300
+
+def _append_line(f, line):
+    """Appends line to f (opened "a+b"), on a line of its own even after a torn last line"""
+    f.seek(0, os.SEEK_END)
+    if f.tell():
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            line = b"\n" + line
+    f.write(line)
+
+class ChunkStore:
+    """Append-only pack of zlib-compressed chunks addressed by sha1"""
+
+    def __init__(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        self.pack_path = os.path.join(folder, "chunks.pack")
+        self.index_path = os.path.join(folder, "chunks.idx")
+        self._lock = threading.Lock()
+        # sha1 digest -> (offset, length) in the pack
+        self.index = {}
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % INDEX_ENTRY.size
+        if usable != len(data):
+            # Torn last entry (crash mid-append): cut it, or every later
+            # entry would be read out of alignment
+            with open(self.index_path, 'r+b') as f:
+                f.truncate(usable)
+        for digest, offset, length in INDEX_ENTRY.iter_unpack(data[:usable]):
+            self.index[digest] = (offset, length)
+
+    def put_many(self, chunks):
+        """Stores byte strings not seen before; returns their digests"""
+        digests = []
+        with self._lock:
+            new = []
+            seen = set()
+            for data in chunks:
+                digest = hashlib.sha1(data).digest()
+                digests.append(digest)
+                if digest not in self.index and digest not in seen:
+                    seen.add(digest)
+                    new.append((digest, zlib.compress(data)))
+            if new:
+                with open(self.pack_path, 'ab') as pack:
+                    offset = pack.tell()
+                    entries = []
+                    for digest, compressed in new:
+                        pack.write(compressed)
+                        entries.append((digest, offset, len(compressed)))
+                        offset += len(compressed)
+                    pack.flush()
+                    os.fsync(pack.fileno())
+                # Only indexed once the data is on disk
+                with open(self.index_path, 'ab') as index:
+                    for digest, offset, length in entries:
+                        index.write(INDEX_ENTRY.pack(digest, offset, length))
+                        self.index[digest] = (offset, length)
+                    index.flush()
+                    os.fsync(index.fileno())
+        return digests
+
+    def get_many(self, digests):
+        with self._lock:
+            locations = [self.index[digest] for digest in digests]
+        chunks = []
+        with open(self.pack_path, 'rb') as pack:
+            for offset, length in locations:
+                pack.seek(offset)
+                chunks.append(zlib.decompress(pack.read(length)))
+        return chunks
+
+    def size(self):
+        total = 0
+        for path in (self.pack_path, self.index_path):
+            if os.path.exists(path):
+                total += os.path.getsize(path)
+        return total
+
+def _split_hashes(digests):
+    """Cuts a hash list into groups where a hash ends in a zero nibble"""
+    groups = [[]]
+    for digest in digests:
+        groups[-1].append(digest)
+        if digest[-1] & 0x0F == 0:
+            groups.append([])
+    return [group for group in groups if group]
+
+class ChapterHistory:
+    """Snapshots of every chapter of a project, restorable by index"""
+
+    def __init__(self, project_path):
+        self.folder = os.path.join(project_path, META_DIR, "history")
+        self.store = ChunkStore(self.folder)
+        self._lock = threading.Lock()
+        # filename -> last snapshot entry (None: no snapshots), so saves
+        # skipped by HISTORY_INTERVAL do not parse the whole log
+        self._last = {}
+
+    def log_path(self, filename):
+        return os.path.join(self.folder, filename + ".jsonl")
+
+    def snapshots(self, filename):
+        """Returns the snapshots of filename, oldest first, skipping torn lines"""
+        entries = []
+        try:
+            with open(self.log_path(filename), 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(entry, dict) and "root" in entry and "time" in entry:
+                        entries.append(entry)
+        except OSError:
+            pass
+        return entries
+
+    def chapters(self):
+        """Filenames with at least one snapshot, including deleted chapters"""
+        return sorted(name[:-len(".jsonl")] for name in os.listdir(self.folder) if name.endswith(".jsonl"))
+
+    def snapshot(self, filename, content, force=False):
+        """
+        Records content as a new snapshot of filename. Unless forced, it is
+        skipped when the last snapshot is identical or younger than
+        HISTORY_INTERVAL. Returns True if a snapshot was written.
+        """
+        with self._lock:
+            if filename not in self._last:
+                entries = self.snapshots(filename)
+                self._last[filename] = entries[-1] if entries else None
+            previous = self._last[filename]
+            now = time.time()
+            if previous and not force and now - previous["time"] < HISTORY_INTERVAL:
+                return False
+
+            paragraphs = [p.encode('utf-8') for p in content.split("\n")]
+            digests = self.store.put_many(paragraphs)
+            groups = self.store.put_many(b"".join(group) for group in _split_hashes(digests))
+            root = self.store.put_many([b"".join(groups)])[0].hex()
+            if previous and previous["root"] == root:
+                return False
+
+            entry = {"time": now, "root": root, "words": len(content.split()), "chars": len(content)}
+            with open(self.log_path(filename), 'a+b') as f:
+                _append_line(f, (json.dumps(entry) + "\n").encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            self._last[filename] = entry
+        return True
+
+    def restore(self, filename, index):
+        """Returns the chapter text of snapshot number index of filename"""
+        entry = self.snapshots(filename)[index]
+        root = self.store.get_many([bytes.fromhex(entry["root"])])[0]
+        groups = self.store.get_many([root[i:i + 20] for i in range(0, len(root), 20)])
+        digests = [group[i:i + 20] for group in groups for i in range(0, len(group), 20)]
+        return "\n".join(p.decode('utf-8') for p in self.store.get_many(digests))
+
+    def rename(self, old_filename, new_filename):
+        with self._lock:
+            self._last.pop(old_filename, None)
+            self._last.pop(new_filename, None)
+            old_path = self.log_path(old_filename)
+            if not os.path.exists(old_path):
+                return
+            new_path = self.log_path(new_filename)
+            if os.path.exists(new_path):
+                # Name reused: keep both histories under the new name
+                with open(old_path, 'rb') as src, open(new_path, 'a+b') as dst:
+                    _append_line(dst, src.read())
+                os.remove(old_path)
+            else:
+                os.replace(old_path, new_path)
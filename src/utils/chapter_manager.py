@@ -1,82 +1,531 @@
 import os
+import re
 import json
+import time
+import threading
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from utils.project_manager import META_DIR
+from utils.edit_journal import EditJournal
+from utils.chapter_history import ChapterHistory
+from utils.logger import log_error
+
+MANIFEST_FILE = "chapters.json"
+MANIFEST_VERSION = 1
+# Seconds between manifest writes caused only by saves (counts and mtimes)
+MANIFEST_SAVE_INTERVAL = 30
+# "Capítulo 3 - El viaje.txt" -> "El viaje"
+LEGACY_TITLE_PATTERN = re.compile(r'^(?:Capítulo|Chapter)\s*\d+\s*-\s*(.*)$', re.IGNORECASE)
+
+def natural_key(name):
+    """Sort key where "Capítulo 2" comes before "Capítulo 10" """
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', name)]
+
+def file_stamp(path):
+    """mtime_ns and size of a chapter file, as its manifest entry stores them"""
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+def sanitize_title(title):
+    safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
+    return safe_title or "Sin título"
+
+class BaseChapterManager(QObject):
+    """
+    What every project layout shares: the chapters' order, titles and
+    counts as manifest entries kept in memory, their edit journals and
+    history, and the save bookkeeping. Subclasses only store: _read,
+    _write, _write_many, _insert, _remove, _store_title, _store_order and
+    version. Writes return the stamp of what they stored, a dict with its
+    new mtime_ns plus whatever else the layout checks it by.
+    """
+    chapters_changed = pyqtSignal()
+    chapter_saved = pyqtSignal(str, str)  # filename, content (from the saving thread)
 
-class ChapterManager:
     def __init__(self, project_path):
+        super().__init__()
         self.project_path = project_path
-        self.chapters_dir = os.path.join(project_path, "chapters")
-        if not os.path.exists(self.chapters_dir):
-            os.makedirs(self.chapters_dir)
+        # Manifest entries in chapter order, and the same entries by filename
+        self._order = []
+        self._entries = {}
+        self._positions = {}
+        self._next_id = 1
+        # filename -> hash of the content known to be stored
+        self._saved = {}
+        # Saves run on a background thread; deletes and manifest writes wait for them
+        self._write_lock = threading.Lock()
+        # Chapters whose last load replayed unsaved edits from their journal
+        self._recovered = set()
+        self.history = ChapterHistory(project_path)
+
+    def _reindex(self):
+        self._entries = {entry["file"]: entry for entry in self._order}
+        self._positions = {entry["file"]: index for index, entry in enumerate(self._order)}
+
+    def _new_entry(self, filename, title):
+        entry = {"id": self._next_id, "file": filename, "title": title, "words": None, "chars": None, "mtime_ns": None}
+        self._next_id += 1
+        return entry
+
+    def close(self):
+        """Writes what is still pending; nothing to do unless the layout keeps something back"""
 
     def get_chapters(self):
-        """Returns list of chapter files sorted by name"""
-        if not os.path.exists(self.chapters_dir):
-            return []
-        
-        files = [f for f in os.listdir(self.chapters_dir) if f.endswith('.txt')]
-        return sorted(files)
+        """Returns the chapter files in chapter order"""
+        return [entry["file"] for entry in self._order]
+
+    def count(self):
+        return len(self._order)
+
+    def __contains__(self, filename):
+        return filename in self._entries
+
+    def title(self, filename):
+        entry = self._entries.get(filename)
+        return entry["title"] if entry else ""
+
+    def number(self, filename):
+        """1-based position of the chapter, or 0 if unknown"""
+        return self._positions.get(filename, -1) + 1
+
+    def label(self, filename):
+        """Name shown for the chapter: "Capítulo N - Title" """
+        return f"Capítulo {self.number(filename)} - {self.title(filename)}"
+
+    def counts(self):
+        """filename -> (words, chars) of the chapters counted so far"""
+        return {
+            entry["file"]: (entry["words"], entry["chars"]) for entry in self._order
+            if entry["words"] is not None and entry.get("chars") is not None
+        }
 
     def create_chapter(self, title):
-        """Creates a new chapter file"""
-        # Find next chapter number
-        existing = self.get_chapters()
-        chapter_num = len(existing) + 1
-        
-        # Sanitize title for filename
-        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
-        if not safe_title:
-            safe_title = "Sin título"
-        
-        filename = f"Capítulo {chapter_num} - {safe_title}.txt"
-        filepath = os.path.join(self.chapters_dir, filename)
-        
-        # Create empty file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write("")
-        
+        """Creates a new empty chapter at the end of the book"""
+        # Ids are never reused, so names stay unique after deletes
+        filename = f"{self._next_id:04d} - {sanitize_title(title)}.txt"
+        while self._taken(filename):
+            self._next_id += 1
+            filename = f"{self._next_id:04d} - {sanitize_title(title)}.txt"
+        self._add(filename, title.strip() or "Sin título")
         return filename
 
-    def load_chapter(self, filename):
-        """Loads chapter content"""
-        filepath = os.path.join(self.chapters_dir, filename)
-        if not os.path.exists(filepath):
-            return ""
-        
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return f.read()
+    def _taken(self, filename):
+        return filename in self._entries
+
+    def _add(self, filename, title):
+        with self._write_lock:
+            entry = self._new_entry(filename, title)
+            self._order.append(entry)
+            self._reindex()
+            try:
+                self._insert(entry)
+            except Exception:
+                self._order.pop()
+                self._reindex()
+                raise
+
+    def load_chapter(self, filename, content=None):
+        """Loads chapter content; content is the text already read by read_chapter"""
+        if content is None:
+            content = self._read(filename)
+            if content is None:
+                return ""
+        self._saved[filename] = hash(content)
+
+        # Edits that never made it into the saved text (crash, power loss)
+        journal = self.journal(filename)
+        if journal.exists():
+            recovered = journal.replay(content)
+            if recovered is not None:
+                self._recovered.add(filename)
+                return recovered
+            journal.remove()
+        return content
+
+    def read_chapter(self, filename):
+        """
+        Returns (content, version) as stored, or (None, None).
+        Safe to call from any thread; nothing is recorded.
+        """
+        version = self.version(filename)
+        content = self._read(filename)
+        if content is None:
+            return None, None
+        return content, version
+
+    def journal(self, filename):
+        """Edit journal of a chapter (see utils.edit_journal)"""
+        return EditJournal(os.path.join(self.project_path, META_DIR, "journal", filename + ".journal"))
+
+    def was_recovered(self, filename):
+        """True once after load_chapter replayed journaled edits of filename"""
+        if filename in self._recovered:
+            self._recovered.discard(filename)
+            return True
+        return False
 
     def save_chapter(self, filename, content):
-        """Saves chapter content"""
+        """
+        Saves chapter content. Returns False without writing if the content
+        is what is already stored, or if the chapter was deleted meanwhile.
+        """
+        with self._write_lock:
+            entry = self._entries.get(filename)
+            if entry is None:
+                return False
+            content_hash = hash(content)
+            if self._saved.get(filename) == content_hash and self.version(filename) is not None:
+                return False
+            stamp = self._write(filename, content)
+            if stamp is None:
+                return False
+            self._saved[filename] = content_hash
+            entry.update(words=len(content.split()), chars=len(content), **stamp)
+            self._counts_changed()
+        self._record_save(filename, content)
+        return True
+
+    def save_chapters(self, contents):
+        """
+        Saves {filename: content} as one batch (see _write_many).
+        Returns the filenames actually saved.
+        """
+        with self._write_lock:
+            changed = {
+                filename: content for filename, content in contents.items()
+                if filename in self._entries and self._saved.get(filename) != hash(content)
+            }
+            stamps = self._write_many(changed) if changed else {}
+            for filename, stamp in stamps.items():
+                content = changed[filename]
+                self._saved[filename] = hash(content)
+                self._entries[filename].update(words=len(content.split()), chars=len(content), **stamp)
+            if stamps:
+                self._counts_changed()
+        for filename in stamps:
+            self._record_save(filename, changed[filename])
+        return list(stamps)
+
+    def _counts_changed(self):
+        """Called with _write_lock held after saves updated manifest entries"""
+
+    def _record_save(self, filename, content):
+        try:
+            self.history.snapshot(filename, content)
+        except Exception as e:
+            log_error(f"Error recording history of {filename}: {e}")
+        self.chapter_saved.emit(filename, content)
+
+    def restore_chapter(self, filename, content):
+        """Writes a version from the history, recreating the chapter if it was deleted"""
+        if filename in self:
+            # The text being replaced stays restorable too
+            self.history.snapshot(filename, self._read(filename) or "", force=True)
+        else:
+            stem = filename[:-len(".txt")]
+            match = re.match(r'^\d+ - (.*)$', stem) or LEGACY_TITLE_PATTERN.match(stem)
+            self._add(filename, match.group(1) if match else stem)
+            self.chapters_changed.emit()
+        self.save_chapter(filename, content)
+
+    def delete_chapter(self, filename):
+        """Deletes a chapter"""
+        content = self._read(filename)
+        if content is not None:
+            # Deleted chapters can still be restored from the history
+            self.history.snapshot(filename, content, force=True)
+        with self._write_lock:
+            self._order = [entry for entry in self._order if entry["file"] != filename]
+            self._reindex()
+            self._saved.pop(filename, None)
+            self._remove(filename)
+        self.journal(filename).remove()
+        self.chapters_changed.emit()
+
+    def rename_chapter(self, filename, new_title):
+        """Changes the title of a chapter; the file keeps its name"""
+        with self._write_lock:
+            entry = self._entries.get(filename)
+            if entry is None:
+                return filename
+            entry["title"] = new_title.strip() or "Sin título"
+            self._store_title(entry)
+        return filename
+
+    def move_chapter(self, filename, new_index):
+        """Moves a chapter to new_index; later chapters renumber themselves"""
+        with self._write_lock:
+            entry = self._entries.get(filename)
+            if entry is None:
+                return
+            old_index = self._positions[filename]
+            self._order.remove(entry)
+            new_index = max(0, min(new_index, len(self._order)))
+            self._order.insert(new_index, entry)
+            self._reindex()
+            # Only the chapters between both positions change number
+            self._store_order(min(old_index, new_index), max(old_index, new_index) + 1)
+
+class ChapterManager(BaseChapterManager):
+    """
+    Chapters of a project, listed by <project>/chapters.json: order, id,
+    title, word/char counts and mtime of each chapter file. Creating, renaming,
+    reordering and numbering only touch the manifest; files are never
+    renamed and their display number is their position. Files added or
+    removed outside the app are reconciled from a QFileSystemWatcher,
+    debounced, instead of scanning the folder on every listing.
+    """
+
+    def __init__(self, project_path):
+        super().__init__(project_path)
+        self.chapters_dir = os.path.join(project_path, "chapters")
+        if not os.path.exists(self.chapters_dir):
+            os.makedirs(self.chapters_dir)
+        self.manifest_path = os.path.join(project_path, MANIFEST_FILE)
+        # Counts and mtimes changed by saves but not written yet; they are
+        # only a cache, recounted if lost, so saves write them at most
+        # every MANIFEST_SAVE_INTERVAL and close() writes the rest
+        self._manifest_dirty = False
+        self._manifest_written = 0
+
+        if not self.load_manifest():
+            # First open with a manifest: adopt the files in natural order
+            self.reconcile(emit=False)
+
+        # Outside changes come in bursts (copying a folder, sync clients)
+        self._reconcile_timer = QTimer(self)
+        self._reconcile_timer.setSingleShot(True)
+        self._reconcile_timer.setInterval(300)
+        self._reconcile_timer.timeout.connect(self.reconcile)
+        self.watcher = QFileSystemWatcher([self.chapters_dir], self)
+        self.watcher.directoryChanged.connect(self._reconcile_timer.start)
+        # Changes made while the app was closed, once the window is up
+        self._reconcile_timer.start()
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return False
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            log_error(f"Error loading chapter manifest: {e}")
+            return False
+        if data.get("version") != MANIFEST_VERSION:
+            return False
+        self._order = data.get("chapters", [])
+        self._next_id = data.get("next_id", len(self._order) + 1)
+        self._reindex()
+        return True
+
+    def save_manifest(self):
+        with self._write_lock:
+            self._write_manifest()
+
+    def _write_manifest(self):
+        data = {"version": MANIFEST_VERSION, "next_id": self._next_id, "chapters": self._order}
+        tmp_path = self.manifest_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.manifest_path)
+            self._manifest_dirty = False
+            self._manifest_written = time.monotonic()
+        except Exception as e:
+            log_error(f"Error saving chapter manifest: {e}")
+
+    def _counts_changed(self):
+        # Only written now if the last write is MANIFEST_SAVE_INTERVAL old
+        self._manifest_dirty = True
+        if time.monotonic() - self._manifest_written >= MANIFEST_SAVE_INTERVAL:
+            self._write_manifest()
+
+    def reconcile(self, emit=True):
+        """Adds chapter files the manifest does not know and drops missing ones"""
+        try:
+            files = {f for f in os.listdir(self.chapters_dir) if f.endswith('.txt')}
+        except OSError:
+            return
+        with self._write_lock:
+            missing = [entry for entry in self._order if entry["file"] not in files]
+            added = sorted(files - set(self._entries), key=natural_key)
+            if not missing and not added:
+                return
+            self._order = [entry for entry in self._order if entry["file"] in files]
+            for filename in added:
+                stem = filename[:-len(".txt")]
+                match = LEGACY_TITLE_PATTERN.match(stem)
+                self._order.append(self._new_entry(filename, match.group(1) if match else stem))
+            self._reindex()
+            self._write_manifest()
+        if emit:
+            self.chapters_changed.emit()
+
+    def close(self):
+        """Stops watching the chapters folder and writes pending manifest changes"""
+        self._reconcile_timer.stop()
+        self.watcher.removePaths(self.watcher.directories())
+        with self._write_lock:
+            if self._manifest_dirty:
+                self._write_manifest()
+
+    def counted_versions(self):
+        """
+        filename -> (mtime_ns, size) of the file the manifest counts are
+        from (None: not counted). Either one differing means the file
+        changed: copies and restores can keep the mtime.
+        """
+        return {filename: self._counted_version(entry) for filename, entry in self._entries.items()}
+
+    def _counted_version(self, entry):
+        if entry.get("chars") is None:
+            return None
+        return entry["mtime_ns"], entry.get("size")
+
+    def set_counts(self, filename, words, chars, stamp, counted_version):
+        """
+        Records counts made outside a save, with the stamp of the file they
+        are from, unless the chapter was saved since counted_versions()
+        returned counted_version. They are written with the next manifest write.
+        """
+        with self._write_lock:
+            entry = self._entries.get(filename)
+            if entry is None:
+                return
+            if self._counted_version(entry) == counted_version:
+                entry.update(words=words, chars=chars, **stamp)
+                self._manifest_dirty = True
+
+    def _taken(self, filename):
+        # Also files the manifest does not list yet
+        return filename in self._entries or os.path.exists(os.path.join(self.chapters_dir, filename))
+
+    def _read(self, filename):
+        try:
+            with open(os.path.join(self.chapters_dir, filename), 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def version(self, filename):
+        """Changes whenever the chapter file is written, by the app or not"""
+        try:
+            return os.stat(os.path.join(self.chapters_dir, filename)).st_mtime_ns
+        except OSError:
+            return None
+
+    def _write(self, filename, content):
+        """Writes atomically (temp file, fsync, rename); returns the file's stamp"""
         filepath = os.path.join(self.chapters_dir, filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
             f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+        return file_stamp(filepath)
 
-    def delete_chapter(self, filename):
-        """Deletes a chapter file"""
+    def _write_many(self, contents):
+        """Every temp file is written and synced before the first rename; returns {filename: stamp}"""
+        written = []
+        try:
+            for filename, content in contents.items():
+                filepath = os.path.join(self.chapters_dir, filename)
+                tmp_path = filepath + ".tmp"
+                written.append((filename, filepath, tmp_path))
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError:
+            # Nothing was renamed yet: the chapters are as they were
+            for _, _, tmp_path in written:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            raise
+        stamps = {}
+        for filename, filepath, tmp_path in written:
+            os.replace(tmp_path, filepath)
+            stamps[filename] = file_stamp(filepath)
+        return stamps
+
+    def _insert(self, entry):
+        with open(os.path.join(self.chapters_dir, entry["file"]), 'w', encoding='utf-8') as f:
+            f.write("")
+        self._write_manifest()
+
+    def _remove(self, filename):
         filepath = os.path.join(self.chapters_dir, filename)
         if os.path.exists(filepath):
             os.remove(filepath)
+        self._write_manifest()
 
-    def rename_chapter(self, old_filename, new_title):
-        """Renames a chapter file"""
-        # Extract chapter number from old filename
-        parts = old_filename.split(' - ', 1)
-        if len(parts) == 2:
-            chapter_prefix = parts[0]  # "Capítulo X"
-        else:
-            chapter_prefix = "Capítulo 1"
-        
-        # Sanitize new title
-        safe_title = "".join(c for c in new_title if c.isalnum() or c in (' ', '-', '_')).strip()
-        if not safe_title:
-            safe_title = "Sin título"
-        
-        new_filename = f"{chapter_prefix} - {safe_title}.txt"
-        
-        old_path = os.path.join(self.chapters_dir, old_filename)
-        new_path = os.path.join(self.chapters_dir, new_filename)
-        
-        if os.path.exists(old_path):
-            os.rename(old_path, new_path)
-        
-        return new_filename
+    def _store_title(self, entry):
+        self._write_manifest()
+
+    def _store_order(self, start, stop):
+        self._write_manifest()
+
+class DatabaseChapterManager(BaseChapterManager):
+    """
+    ChapterManager for projects stored in a project.db (see
+    utils.project_database). Same interface; the order, titles and texts
+    live in the database, so there is no folder to watch or reconcile.
+    """
+
+    def __init__(self, project_path, database):
+        super().__init__(project_path)
+        self.database = database
+        # Counted by ProjectStats from the database, not from files
+        self.chapters_dir = None
+
+        self._order = database.chapters()
+        self._reindex()
+        self._next_id = max(database.get_meta("next_id", 1), max((e["id"] for e in self._order), default=0) + 1)
+
+    def _read(self, filename):
+        return self.database.chapter_text(filename)
+
+    def version(self, filename):
+        """Changes whenever the chapter is saved"""
+        entry = self._entries.get(filename)
+        return entry["mtime_ns"] if entry else None
+
+    def _write(self, filename, content):
+        """Writes in one transaction; returns its stamp, or None if the row is gone"""
+        mtime_ns = time.time_ns()
+        return {"mtime_ns": mtime_ns} if self.database.save_chapter(filename, content, mtime_ns) else None
+
+    def _write_many(self, contents):
+        """Writes in one transaction; returns {filename: stamp}"""
+        mtime_ns = time.time_ns()
+        stamps = {}
+        with self.database.batch():
+            for filename, content in contents.items():
+                if self.database.save_chapter(filename, content, mtime_ns):
+                    stamps[filename] = {"mtime_ns": mtime_ns}
+        return stamps
+
+    def _insert(self, entry):
+        # Counted as it is stored: empty
+        entry.update(words=0, chars=0)
+        with self.database.batch():
+            self.database.insert_chapters([entry])
+            self.database.set_meta("next_id", self._next_id)
+
+    def _remove(self, filename):
+        self.database.delete_chapter(filename)
+
+    def _store_title(self, entry):
+        self.database.set_title(entry["file"], entry["title"])
+
+    def _store_order(self, start, stop):
+        self.database.set_order([entry["file"] for entry in self._order[start:stop]], start)
+
+def open_chapter_manager(project_manager):
+    """Chapter manager for the project open in project_manager, by its layout"""
+    if project_manager.database:
+        return DatabaseChapterManager(project_manager.current_project_path, project_manager.database)
+    return ChapterManager(project_manager.current_project_path)
@@ -0,0 +1,121 @@
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from utils.dictionary_service import DictionaryService
+from utils.logger import log_error
+
+# Wait for the user to settle on a chapter before reading its neighbours
+PREFETCH_DELAY_MS = 400
+# Below the highlight scheduler's background blocks (2)
+PREFETCH_PRIORITY = 3
+
+class PrefetchWorker(QThread):
+    """Reads chapters off the GUI thread"""
+    fetched = pyqtSignal(str, object, str)  # filename, version, content
+
+    def __init__(self, chapter_manager, filenames):
+        super().__init__()
+        self.chapter_manager = chapter_manager
+        self.filenames = filenames
+        self._stop = False
+
+    def stop(self):
+        self._stop = True
+
+    def run(self):
+        for filename in self.filenames:
+            if self._stop:
+                return
+            try:
+                content, version = self.chapter_manager.read_chapter(filename)
+            except Exception as e:
+                log_error(f"Error prefetching {filename}: {e}")
+                continue
+            if content is None:
+                continue
+            if self.chapter_manager.journal(filename).replay(content) is not None:
+                # Unsaved edits to recover: left to a normal load
+                continue
+            self.fetched.emit(filename, version, content)
+
+class ChapterPrefetcher(QObject):
+    """
+    Reads the chapters around the open one before the user asks for them,
+    keeping their text by disk version. With spellcheck on, their
+    paragraphs are also queued to the DictionaryService at low priority,
+    so the highlighter paints them from its cache when they are opened.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.chapter_manager = None
+        self.spellcheck = True
+        # filename -> (version, content)
+        self.texts = {}
+        self.wanted = []
+        self.worker = None
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(PREFETCH_DELAY_MS)
+        self.timer.timeout.connect(self._start)
+
+    def set_chapter_manager(self, chapter_manager):
+        self.stop()
+        self.chapter_manager = chapter_manager
+        self.texts = {}
+        self.wanted = []
+
+    def prefetch(self, filenames):
+        """Replaces the chapters to keep ready; reads them after PREFETCH_DELAY_MS"""
+        self.wanted = list(filenames)
+        self.texts = {f: entry for f, entry in self.texts.items() if f in self.wanted}
+        self.timer.start()
+
+    def keep(self, filename, version, content):
+        """Holds text read elsewhere until take() asks for it"""
+        self.texts[filename] = (version, content)
+
+    def take(self, filename, version):
+        """Prefetched text of filename if still at version, else None"""
+        entry = self.texts.pop(filename, None)
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1]
+
+    def stop(self):
+        self.timer.stop()
+        if self.worker and self.worker.isRunning():
+            self.worker.stop()
+            self.worker.wait()
+        self.worker = None
+
+    def _start(self):
+        if not self.chapter_manager:
+            return
+        if self.worker and self.worker.isRunning():
+            self.worker.stop()
+            self.worker.wait()
+        missing = [f for f in self.wanted if f not in self.texts]
+        if not missing:
+            return
+        self.worker = PrefetchWorker(self.chapter_manager, missing)
+        self.worker.fetched.connect(self._store)
+        self.worker.start(QThread.Priority.LowPriority)
+
+    def _store(self, filename, version, content):
+        if filename not in self.wanted:
+            return
+        self.texts[filename] = (version, content)
+        if self.spellcheck:
+            self._precheck(content)
+
+    def _precheck(self, content):
+        """Queues the paragraphs the spellcheck cache does not know yet"""
+        service = DictionaryService.instance()
+        if not service.is_ready():
+            return
+        for text in set(content.split("\n")):
+            if text.strip():
+                text_hash = hash(text)
+                if service.block_results.get(text_hash) is None:
+                    service.request_check(text_hash, text, PREFETCH_PRIORITY)
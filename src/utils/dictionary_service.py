@@ -0,0 +1,239 @@
+import os
+import re
+import queue
+import importlib.util
+import itertools
+import threading
+from PyQt6.QtCore import QObject, QThread, QCoreApplication, pyqtSignal
+
+from utils.spell_cache import WordVerdictCache, BlockResultCache
+from utils.dictionary_snapshot import DictionarySnapshot
+from utils.suggestion_index import SuggestionIndex, compile_dictionary_files
+from utils.user_dictionary import UserDictionary
+from utils.logger import log_info, log_warning, log_error
+
+# spylls is imported when a dictionary is first parsed, not at startup
+SPYLLS_AVAILABLE = importlib.util.find_spec("spylls") is not None
+
+# Base paths without extension, first existing one wins
+DICTIONARY_PATHS = [
+    r"D:\Kuno\Web Novel\diccionarios\es",
+    os.path.join(os.path.dirname(__file__), "..", "..", "diccionarios", "es")
+]
+
+WORD_PATTERN = re.compile(r'[a-zA-ZáéíóúÁÉÍÓÚñÑüÜ]+')
+# Seconds a suggestion query may spend on the GUI thread
+SUGGEST_BUDGET = 0.02
+# Suggestions asked from spylls when the index has none
+FALLBACK_SUGGESTIONS = 5
+
+class SpellcheckWorker(QThread):
+    """Checks block texts off the GUI thread and reports misspelled ranges"""
+    results_ready = pyqtSignal(object, list)  # text hash, [(start, length), ...]
+
+    def __init__(self, is_misspelled):
+        super().__init__()
+        self.is_misspelled = is_misspelled
+        self.jobs = queue.PriorityQueue()
+        self._order = itertools.count()
+        app = QCoreApplication.instance()
+        if app:
+            app.aboutToQuit.connect(self.stop)
+
+    def submit(self, text_hash, text, priority=1):
+        """Queues a block text; lower priority values are checked first"""
+        self.jobs.put((priority, next(self._order), text_hash, text))
+
+    def stop(self):
+        if self.isRunning():
+            self.jobs.put((-1, next(self._order), None, None))
+            self.wait()
+
+    def run(self):
+        while True:
+            _, _, text_hash, text = self.jobs.get()
+            if text_hash is None:
+                break
+            ranges = []
+            for match in WORD_PATTERN.finditer(text):
+                if self.is_misspelled(match.group()):
+                    ranges.append((match.start(), match.end() - match.start()))
+            self.results_ready.emit(text_hash, ranges)
+
+class DictionaryService(QObject):
+    """
+    Process-wide spellcheck dictionary, shared by every highlighter.
+    Loads in a background thread; highlighters paint nothing until ready.
+
+    Cached verdicts and block results only reflect the base dictionary.
+    The project's UserDictionary is applied on top when painting, so adding
+    or removing a word never invalidates them.
+    """
+    ready = pyqtSignal()
+    _loaded = pyqtSignal()              # loader thread -> GUI thread
+    results_ready = pyqtSignal(object)  # text hash now in block_results
+    words_changed = pyqtSignal(list)    # words whose verdict changed
+    fallback_ready = pyqtSignal(str, list)  # word, spylls suggestions
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        super().__init__()
+        self.base_path = None
+        # lexicon answers lookups (snapshot, or spylls if there is none yet);
+        # the spylls dictionary itself is only needed for suggestions
+        self.lexicon = None
+        self.suggestions = None
+        self.dictionary = None
+        self.user_dictionary = UserDictionary()
+        # Shared by the worker, auto-correct and the context menu
+        self.verdict_cache = WordVerdictCache()
+        # Results per block text, painted by every highlighter
+        self.block_results = BlockResultCache()
+        self.worker = None
+        self._loader = None
+        self._dictionary_lock = threading.Lock()
+        self._fallback_words = queue.Queue()
+        self._fallback_thread = None
+        self._loaded.connect(self._on_loaded)
+
+    def start(self):
+        """Starts loading in the background (only once)"""
+        if self._loader is None:
+            self._loader = threading.Thread(target=self._load, daemon=True)
+            self._loader.start()
+
+    def is_ready(self):
+        return self.worker is not None
+
+    def _load(self):
+        for base_path in DICTIONARY_PATHS:
+            if os.path.exists(base_path + ".dic") and os.path.exists(base_path + ".aff"):
+                self.base_path = os.path.normpath(base_path)
+                break
+        else:
+            log_warning("Dictionaries not found.")
+            return
+
+        self.lexicon = DictionarySnapshot.open(self.base_path)
+        self.suggestions = SuggestionIndex.open(self.base_path)
+        if self.lexicon is None:
+            self.lexicon = self._load_spylls()
+        if self.lexicon is None:
+            return
+
+        # The worker is a QObject, so it is created on the GUI thread
+        self._loaded.emit()
+        log_info(f"Dictionary ready: {type(self.lexicon).__name__}")
+
+        if not self.suggestions:
+            # Next launch will load the compiled snapshot and index instead
+            try:
+                compile_dictionary_files(self.base_path, self.dictionary)
+                self.suggestions = SuggestionIndex.open(self.base_path)
+            except Exception as e:
+                log_error(f"Error compiling dictionary files: {e}")
+
+    def _on_loaded(self):
+        self.worker = SpellcheckWorker(self.is_unknown)
+        self.worker.results_ready.connect(self._store_results)
+        self.worker.start(QThread.Priority.LowPriority)
+        self.ready.emit()
+
+    def _load_spylls(self):
+        """Parses the .dic/.aff with spylls once, whoever needs it first"""
+        with self._dictionary_lock:
+            if self.dictionary is None and SPYLLS_AVAILABLE and self.base_path:
+                try:
+                    from spylls.hunspell import Dictionary
+                    self.dictionary = Dictionary.from_files(self.base_path)
+                except Exception as e:
+                    log_error(f"Error loading Dictionary: {e}")
+            return self.dictionary
+
+    def is_unknown(self, word):
+        """Returns True if the base dictionary rejects word (cached)"""
+        verdict = self.verdict_cache.get(word)
+        if verdict is None:
+            # Check spelling (lookup returns True if correct)
+            # We catch exceptions just in case of weird characters
+            try:
+                verdict = not self.lexicon.lookup(word)
+            except:
+                verdict = False
+            self.verdict_cache.put(word, verdict)
+        return verdict
+
+    def is_user_word(self, word):
+        return word in self.user_dictionary
+
+    def is_misspelled(self, word):
+        """Returns True if word is in neither the dictionary nor the project's words"""
+        return self.is_unknown(word) and not self.is_user_word(word)
+
+    def suggest(self, word):
+        """Returns spelling suggestions from the index within SUGGEST_BUDGET"""
+        if self.suggestions:
+            return self.suggestions.suggest(word, budget=SUGGEST_BUDGET)
+        return []
+
+    def request_fallback(self, word):
+        """
+        Asks spylls (loaded on first use) for suggestions off the GUI thread;
+        they arrive through fallback_ready.
+        """
+        self._fallback_words.put(word)
+        if self._fallback_thread is None:
+            self._fallback_thread = threading.Thread(target=self._run_fallback, daemon=True)
+            self._fallback_thread.start()
+
+    def _run_fallback(self):
+        while True:
+            word = self._fallback_words.get()
+            # Only the last word asked for is still on screen
+            while not self._fallback_words.empty():
+                word = self._fallback_words.get_nowait()
+            suggestions = []
+            try:
+                dictionary = self._load_spylls()
+                if dictionary is not None:
+                    suggestions = list(itertools.islice(dictionary.suggest(word), FALLBACK_SUGGESTIONS))
+            except Exception as e:
+                log_error(f"Error suggesting for {word!r}: {e}")
+            self.fallback_ready.emit(word, suggestions)
+
+    def request_check(self, text_hash, text, priority=1):
+        """Queues a block text for the worker; results arrive via results_ready"""
+        self.worker.submit(text_hash, text, priority)
+
+    def _store_results(self, text_hash, ranges):
+        self.block_results.put(text_hash, ranges)
+        self.results_ready.emit(text_hash)
+
+    def set_project(self, project_path, character_names=()):
+        """Switches to the user dictionary of project_path (None for no project)"""
+        old = self.user_dictionary
+        self.user_dictionary = UserDictionary(project_path)
+        self.user_dictionary.set_names(character_names)
+        changed = (old.words | old.names) ^ (self.user_dictionary.words | self.user_dictionary.names)
+        if changed:
+            self.words_changed.emit(sorted(changed))
+
+    def set_character_names(self, names):
+        changed = self.user_dictionary.set_names(names)
+        if changed:
+            self.words_changed.emit(sorted(changed))
+
+    def add_word(self, word):
+        if self.user_dictionary.add(word):
+            self.words_changed.emit([word])
+
+    def remove_word(self, word):
+        if self.user_dictionary.remove(word):
+            self.words_changed.emit([word])
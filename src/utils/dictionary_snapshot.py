@@ -0,0 +1,227 @@
+"""
+Precompiled word list for the Hunspell dictionary.
+
+Parsing es.dic/es.aff with spylls takes seconds, while the highlighter only
+needs to know whether a word exists. compile_snapshot() expands every stem
+with its affixes once and writes the sorted forms next to the .dic file as
+<base>.snapshot:
+
+    magic, version, metadata length     (struct HEADER)
+    metadata JSON                       (version, count, source size/mtime/sha1)
+    count                               (uint32)
+    offsets[count + 1]                  (uint32, relative to the word blob)
+    word blob                           (sorted UTF-8 words, no separators)
+
+DictionarySnapshot memory-maps that file and answers lookups with a binary
+search, so loading it costs milliseconds regardless of dictionary size.
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+
+MAGIC = b"KWDS"
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct("<4sHI")
+UINT32 = struct.Struct("<I")
+
+def snapshot_path(base_path):
+    """Returns the snapshot file for a dictionary base path (without extension)"""
+    return base_path + ".snapshot"
+
+def source_info(path):
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": digest}
+
+def sources_match(stored, base_path):
+    """Cheap size/mtime check first, content hash only if those differ"""
+    for ext in ("dic", "aff"):
+        path = f"{base_path}.{ext}"
+        info = stored.get(ext)
+        if not info or not os.path.exists(path):
+            return False
+        stat = os.stat(path)
+        if stat.st_size == info["size"] and stat.st_mtime_ns == info["mtime_ns"]:
+            continue
+        with open(path, 'rb') as f:
+            if hashlib.sha1(f.read()).hexdigest() != info["sha1"]:
+                return False
+    return True
+
+def write_table(f, items):
+    """Writes byte strings as count, offsets[count + 1], blob (see MappedTable)"""
+    offsets = [0]
+    for item in items:
+        offsets.append(offsets[-1] + len(item))
+    f.write(UINT32.pack(len(items)))
+    f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+    f.write(b"".join(items))
+
+class MappedTable:
+    """Byte strings stored by write_table, read in place from a memory map"""
+
+    def __init__(self, data, pos):
+        self._data = data
+        (self.count,) = UINT32.unpack_from(data, pos)
+        self._offsets_pos = pos + UINT32.size
+        self._blob_pos = self._offsets_pos + (self.count + 1) * UINT32.size
+        (blob_size,) = UINT32.unpack_from(data, self._blob_pos - UINT32.size)
+        #: Position right after this table
+        self.end = self._blob_pos + blob_size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        start, end = struct.unpack_from("<2I", self._data, self._offsets_pos + index * UINT32.size)
+        return self._data[self._blob_pos + start:self._blob_pos + end]
+
+    def find(self, item):
+        """Binary search in a sorted table; returns the index or -1"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self[mid]
+            if current < item:
+                lo = mid + 1
+            elif current > item:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+def _apply_suffixes(aff, stem, flags):
+    for flag in flags:
+        for suffix in aff.SFX.get(flag, ()):
+            if stem.endswith(suffix.strip) and suffix.cond_regexp.search(stem):
+                yield suffix, stem[:len(stem) - len(suffix.strip)] + suffix.add
+
+def _apply_prefixes(aff, stem, flags):
+    for flag in flags:
+        for prefix in aff.PFX.get(flag, ()):
+            if stem.startswith(prefix.strip) and prefix.cond_regexp.match(stem):
+                yield prefix, prefix.add + stem[len(prefix.strip):]
+
+def expand_dictionary(dictionary):
+    """Returns the set of every word form accepted by a spylls Dictionary"""
+    aff = dictionary.aff
+    skip_flags = {f for f in (aff.FORBIDDENWORD, aff.ONLYINCOMPOUND) if f}
+    forms = set()
+
+    for word in dictionary.dic.words:
+        if word.flags & skip_flags:
+            continue
+        stem, flags = word.stem, word.flags
+        if not (aff.NEEDAFFIX and aff.NEEDAFFIX in flags):
+            forms.add(stem)
+
+        for suffix, form in _apply_suffixes(aff, stem, flags):
+            forms.add(form)
+            # Continuation classes (e.g. "ción/S" -> plural)
+            for _, twofold in _apply_suffixes(aff, form, suffix.flags):
+                forms.add(twofold)
+            if suffix.crossproduct:
+                for prefix, crossed in _apply_prefixes(aff, form, flags):
+                    if prefix.crossproduct:
+                        forms.add(crossed)
+
+        for _, form in _apply_prefixes(aff, stem, flags):
+            forms.add(form)
+
+    return forms
+
+def compile_snapshot(base_path, dictionary=None):
+    """Expands the dictionary and writes <base_path>.snapshot atomically"""
+    if dictionary is None:
+        from spylls.hunspell import Dictionary
+        dictionary = Dictionary.from_files(base_path)
+
+    words = sorted(w.encode('utf-8') for w in expand_dictionary(dictionary))
+    metadata = json.dumps({
+        "version": SNAPSHOT_VERSION,
+        "count": len(words),
+        "sources": {
+            "dic": source_info(base_path + ".dic"),
+            "aff": source_info(base_path + ".aff")
+        }
+    }).encode('utf-8')
+
+    path = snapshot_path(base_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(metadata)))
+        f.write(metadata)
+        write_table(f, words)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+class DictionarySnapshot:
+    """Read-only, memory-mapped view of a compiled snapshot"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, meta_len = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported snapshot format: {path}")
+
+        meta_start = HEADER.size
+        self.metadata = json.loads(self._map[meta_start:meta_start + meta_len])
+        self._words = MappedTable(self._map, meta_start + meta_len)
+
+    @classmethod
+    def open(cls, base_path):
+        """Returns the snapshot for base_path, or None if missing or out of date"""
+        path = snapshot_path(base_path)
+        if not os.path.exists(path):
+            return None
+        try:
+            snapshot = cls(path)
+        except (ValueError, OSError, struct.error):
+            return None
+        if not sources_match(snapshot.metadata.get("sources", {}), base_path):
+            snapshot.close()
+            return None
+        return snapshot
+
+    def close(self):
+        self._map.close()
+
+    def __len__(self):
+        return len(self._words)
+
+    def __contains__(self, word):
+        return self._words.find(word.encode('utf-8')) >= 0
+
+    def lookup(self, word):
+        """Same contract as Dictionary.lookup, including capitalized variants"""
+        if word in self:
+            return True
+        # "Casa" at the start of a sentence, "CASA" in a heading
+        if word[:1].isupper():
+            lower = word.lower()
+            if lower != word and lower in self:
+                return True
+            if word.isupper() and word.capitalize() in self:
+                return True
+        return False
+
+    def words(self):
+        """Iterates every word form in sorted order"""
+        for index in range(len(self._words)):
+            yield self._words[index].decode('utf-8')
+
+if __name__ == "__main__":
+    # python -m utils.dictionary_snapshot [base_path]
+    base = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(__file__), "..", "..", "diccionarios", "es")
+    print(f"Snapshot written: {compile_snapshot(os.path.normpath(base))}")
@@ -0,0 +1,64 @@
+from collections import OrderedDict
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# Memory allowed to the chapters kept open, the one on screen included
+DOCUMENT_CACHE_BUDGET = 64 * 1024 * 1024
+
+class DocumentCache(QObject):
+    """
+    Least recently used chapters kept as live documents, so switching back
+    to one is a document swap instead of a reload. Values only need a
+    cost() in bytes. Once the total goes over the budget the oldest ones
+    are dropped; about_to_evict lets the owner save them first.
+    """
+    about_to_evict = pyqtSignal(object, object)  # key, value
+
+    def __init__(self, budget=DOCUMENT_CACHE_BUDGET, parent=None):
+        super().__init__(parent)
+        self.budget = budget
+        self.items = OrderedDict()
+
+    def get(self, key):
+        """Returns the value of key, now the most recently used, or None"""
+        value = self.items.get(key)
+        if value is not None:
+            self.items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        old = self.items.pop(key, None)
+        if old is not None and old is not value:
+            self._drop(key, old)
+        self.items[key] = value
+
+    def discard(self, key):
+        value = self.items.pop(key, None)
+        if value is not None:
+            self._drop(key, value)
+
+    def clear(self):
+        while self.items:
+            key, value = self.items.popitem(last=False)
+            self._drop(key, value)
+
+    def trim(self, keep=None):
+        """Evicts the least recently used values until the cache fits its budget"""
+        total = sum(value.cost() for value in self.items.values())
+        for key in list(self.items):
+            if total <= self.budget:
+                break
+            if key == keep:
+                continue
+            value = self.items.pop(key)
+            total -= value.cost()
+            self._drop(key, value)
+
+    def _drop(self, key, value):
+        self.about_to_evict.emit(key, value)
+        value.deleteLater()
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def __len__(self):
+        return len(self.items)
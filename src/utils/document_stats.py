@@ -0,0 +1,103 @@
+import re
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+# Simple chapter detection: lines starting with "Capítulo" or "Chapter" or just "#"
+HEADING_PATTERN = re.compile(r'(Capítulo|Chapter|#)', re.IGNORECASE)
+# Fixed refresh rate of stats_updated, however fast the user types
+REFRESH_INTERVAL_MS = 100
+
+def count_block(text):
+    """Returns (words, chars, is_heading) for one block of text"""
+    return len(text.split()), len(text), 1 if HEADING_PATTERN.match(text) else 0
+
+class DocumentStats(QObject):
+    """
+    Word/char/chapter counts of a QTextDocument, kept per block.
+    contentsChange only recounts the blocks an edit touched, so the cost of a
+    keystroke does not depend on the document size. Totals are published
+    through stats_updated at most every REFRESH_INTERVAL_MS.
+    """
+    stats_updated = pyqtSignal(int, int, int)  # words, chars, chapters
+
+    def __init__(self, document, parent=None):
+        super().__init__(parent)
+        self.document = document
+        # (words, chars, is_heading) by block number
+        self.blocks = []
+        self.words = 0
+        self.chars = 0
+        self.headings = 0
+        self.published = None
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.publish)
+
+        self.recount()
+        document.contentsChange.connect(self.on_contents_change)
+
+    def recount(self):
+        """Counts every block from scratch"""
+        self.blocks = []
+        block = self.document.begin()
+        while block.isValid():
+            self.blocks.append(count_block(block.text()))
+            block = block.next()
+        self.words = sum(b[0] for b in self.blocks)
+        self.chars = sum(b[1] for b in self.blocks)
+        self.headings = sum(b[2] for b in self.blocks)
+
+    def on_contents_change(self, position, removed, added):
+        first = self.document.findBlock(position)
+        last = self.document.findBlock(position + added)
+        if not first.isValid():
+            first = self.document.begin()
+        if not last.isValid():
+            last = self.document.lastBlock()
+
+        first_number = first.blockNumber()
+        last_number = last.blockNumber()
+        # Blocks merged or split by the edit
+        delta = self.document.blockCount() - len(self.blocks)
+        old_last = last_number - delta
+        if old_last < first_number - 1 or old_last >= len(self.blocks):
+            self.recount()
+            self.schedule()
+            return
+
+        counts = []
+        block = first
+        while block.isValid() and block.blockNumber() <= last_number:
+            counts.append(count_block(block.text()))
+            block = block.next()
+
+        for words, chars, heading in self.blocks[first_number:old_last + 1]:
+            self.words -= words
+            self.chars -= chars
+            self.headings -= heading
+        for words, chars, heading in counts:
+            self.words += words
+            self.chars += chars
+            self.headings += heading
+        self.blocks[first_number:old_last + 1] = counts
+        self.schedule()
+
+    def schedule(self):
+        if not self.refresh_timer.isActive():
+            self.refresh_timer.start()
+
+    def totals(self):
+        """Returns (words, chars, chapters) as shown in the status bar"""
+        # Blocks are joined by newlines in toPlainText()
+        chars = self.chars + max(len(self.blocks) - 1, 0)
+        chapters = self.headings
+        if chapters == 0 and chars > 0:
+            chapters = 1 # At least one chapter if there is text
+        return self.words, chars, chapters
+
+    def publish(self):
+        totals = self.totals()
+        if totals != self.published:
+            self.published = totals
+            self.stats_updated.emit(*totals)
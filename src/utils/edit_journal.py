@@ -0,0 +1,286 @@
+"""
+Append-only journal of the edits made to a chapter since its last save.
+
+Each chapter has <project>/.kuno/journal/<chapter>.journal, one JSON value
+per line:
+
+    {"base": sha1}              content of the .txt the edits apply to
+    [position, removed, text]   an edit, as reported by contentsChange
+    {"checkpoint": sha1}        the text up to here was handed to a save
+
+Edits are appended every JOURNAL_FLUSH_MS, so a crash loses at most that
+much typing. Once a save lands, compact() drops everything up to its
+checkpoint, leaving the saved content as the new base. On load, replay()
+applies whatever the .txt is missing.
+
+The recorder's appends and the compactions after each save are queued
+(queue_append, queue_compact, queue_start) and written in order by one
+JournalWriter thread. Every other access to a journal file first waits
+for the writes still queued for it.
+"""
+import os
+import json
+import queue
+import atexit
+import hashlib
+import threading
+from PyQt6.QtCore import QObject, QTimer
+
+from utils.logger import log_error, log_warning
+
+JOURNAL_FLUSH_MS = 300
+
+def content_hash(content):
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+def apply_edit(text, position, removed, inserted):
+    return text[:position] + inserted + text[position + removed:]
+
+class JournalWriter(threading.Thread):
+    """Runs queued journal writes in order, off the GUI thread"""
+
+    def __init__(self):
+        super().__init__(name="JournalWriter", daemon=True)
+        self.jobs = queue.SimpleQueue()
+        # path -> writes queued for it and not done yet
+        self.pending = {}
+        self.idle = threading.Condition()
+
+    def submit(self, journal, write, *args):
+        with self.idle:
+            self.pending[journal.path] = self.pending.get(journal.path, 0) + 1
+        self.jobs.put((journal.path, write, args))
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            path, write, args = job
+            try:
+                write(*args)
+            except Exception as e:
+                log_error(f"Error writing journal {path}: {e}")
+            with self.idle:
+                self.pending[path] -= 1
+                if not self.pending[path]:
+                    del self.pending[path]
+                self.idle.notify_all()
+
+    def wait(self, path=None):
+        """Blocks until the writes queued for path (or for every journal) are done"""
+        with self.idle:
+            self.idle.wait_for(lambda: not (self.pending.get(path) if path else self.pending))
+
+    def stop(self):
+        if self.is_alive():
+            self.jobs.put(None)
+            self.join()
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def journal_writer():
+    """The JournalWriter thread, started on first use"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = JournalWriter()
+            _writer.start()
+            atexit.register(_writer.stop)
+        return _writer
+
+def wait_for_writes():
+    """Blocks until every queued journal write is done"""
+    if _writer is not None:
+        _writer.wait()
+
+class EditJournal:
+    """One chapter's journal file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _wait(self):
+        if _writer is not None:
+            _writer.wait(self.path)
+
+    def exists(self):
+        self._wait()
+        return os.path.exists(self.path)
+
+    def read(self):
+        """Returns the parsed records, stopping at a torn last line"""
+        self._wait()
+        return self._read()
+
+    def _read(self):
+        records = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        break
+        except OSError:
+            pass
+        return records
+
+    def start(self, base_content):
+        """Begins a new journal on top of base_content"""
+        self._wait()
+        self._start(base_content)
+
+    def queue_start(self, base_content):
+        journal_writer().submit(self, self._start, base_content)
+
+    def _start(self, base_content):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"base": content_hash(base_content)}) + "\n")
+
+    def append(self, records):
+        self._wait()
+        self._append(records)
+
+    def queue_append(self, records):
+        journal_writer().submit(self, self._append, list(records))
+
+    def _append(self, records):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def replay(self, content):
+        """
+        Returns content with the journaled edits it is missing applied,
+        or None if the journal has nothing to add or does not match it.
+        """
+        records = self.read()
+        if not records or not isinstance(records[0], dict):
+            return None
+        current = content_hash(content)
+        # Edits after the last point the .txt is known to match
+        start = None
+        if records[0].get("base") == current:
+            start = 1
+        for index, record in enumerate(records):
+            if isinstance(record, dict) and record.get("checkpoint") == current:
+                start = index + 1
+        if start is None:
+            log_warning(f"Journal does not match its chapter: {self.path}")
+            return None
+
+        text = content
+        applied = False
+        for record in records[start:]:
+            if isinstance(record, list):
+                text = apply_edit(text, *record)
+                applied = True
+        return text if applied else None
+
+    def compact(self, saved_hash):
+        """Drops the records already contained in a save of saved_hash"""
+        self._wait()
+        self._compact(saved_hash)
+
+    def queue_compact(self, saved_hash):
+        journal_writer().submit(self, self._compact, saved_hash)
+
+    def _compact(self, saved_hash):
+        records = self._read()
+        for index in range(len(records) - 1, -1, -1):
+            record = records[index]
+            if isinstance(record, dict) and saved_hash in (record.get("checkpoint"), record.get("base")):
+                remaining = records[index + 1:]
+                break
+        else:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in [{"base": saved_hash}] + remaining:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        self._wait()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class JournalRecorder(QObject):
+    """Buffers the edits of a QTextDocument and appends them to its EditJournal"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.document = None
+        self.journal = None
+        self.buffer = []
+        self.revision = None
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(JOURNAL_FLUSH_MS)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def attach(self, document, journal):
+        """Starts journaling document, whose current text is on disk"""
+        self.detach()
+        self.document = document
+        self.journal = journal
+        self.revision = document.revision()
+        if not journal.exists():
+            journal.queue_start(document.toPlainText())
+        document.contentsChange.connect(self.on_contents_change)
+
+    def detach(self):
+        if self.document is None:
+            return
+        self.flush()
+        self.document.contentsChange.disconnect(self.on_contents_change)
+        self.document = None
+        self.journal = None
+
+    def on_contents_change(self, position, removed, added):
+        # Highlighter format changes come through here too, but do not
+        # bump the revision
+        revision = self.document.revision()
+        if revision == self.revision:
+            return
+        self.revision = revision
+
+        inserted = self._text(position, added) if added else ""
+        self.buffer.append([position, removed, inserted])
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def _text(self, position, length):
+        """Plain text of the document range, as toPlainText() would give it"""
+        text = []
+        block = self.document.findBlock(position)
+        end = position + length
+        while block.isValid() and block.position() < end:
+            block_text = block.text() + "\n"
+            start = max(position - block.position(), 0)
+            stop = min(end - block.position(), len(block_text))
+            text.append(block_text[start:stop])
+            block = block.next()
+        return "".join(text).replace("\u00a0", " ")
+
+    def flush(self):
+        self.flush_timer.stop()
+        if self.buffer and self.journal:
+            self.journal.queue_append(self.buffer)
+        self.buffer = []
+
+    def checkpoint(self, content):
+        """Marks that content is being saved; compact() with its hash once it is"""
+        if self.journal is None:
+            return None
+        self.flush()
+        saved_hash = content_hash(content)
+        self.journal.queue_append([{"checkpoint": saved_hash}])
+        return saved_hash
@@ -0,0 +1,204 @@
+"""
+Find and replace across every chapter of a project.
+
+FindWorker streams the chapters through a small thread pool (reading them
+is most of the time on a big project) and reports each chapter's matches
+as soon as it is searched, with a few previews, so the results fill in
+while the search runs and can be cancelled at any point.
+
+Nothing is replaced from the preview itself: ReplaceWorker reads every
+chapter again, skips the ones whose text changed since they were searched
+(their hash no longer matches), runs the search again on the rest and
+saves them all with one ChapterManager.save_chapters() batch. The chapter
+open in the editor is replaced by the caller, through the editor, so the
+change can be undone.
+"""
+import re
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from utils.logger import log_error
+
+# Chapters read and searched at the same time
+FIND_THREADS = 4
+# Matches listed per chapter in the preview; the rest are only counted
+PREVIEW_MATCHES = 100
+# Characters of context shown on each side of a match
+PREVIEW_CONTEXT = 30
+
+ASTRAL_PATTERN = re.compile('[\U00010000-\U0010FFFF]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+def compile_pattern(text, regex=False, case_sensitive=False, whole_word=False):
+    """Compiles the search text; raises re.error for an invalid expression"""
+    expression = text if regex else re.escape(text)
+    if whole_word:
+        expression = rf'\b(?:{expression})\b'
+    flags = re.MULTILINE
+    if not case_sensitive:
+        flags |= re.IGNORECASE
+    return re.compile(expression, flags)
+
+def find_matches(pattern, text, replacement, regex=False):
+    """
+    Returns [(start, end, replacement text)] for every match of pattern in
+    text. In regex mode replacement can refer to groups (\\1, \\g<name>).
+    """
+    if regex:
+        return [(m.start(), m.end(), m.expand(replacement)) for m in pattern.finditer(text)]
+    return [(m.start(), m.end(), replacement) for m in pattern.finditer(text)]
+
+def apply_matches(text, matches):
+    """text with matches (in order, not overlapping) replaced"""
+    parts = []
+    last = 0
+    for start, end, replacement in matches:
+        parts.append(text[last:start])
+        parts.append(replacement)
+        last = end
+    parts.append(text[last:])
+    return "".join(parts)
+
+def document_positions(text, offsets):
+    """
+    Maps str offsets into text to QTextDocument positions, which count
+    characters outside the BMP (most emoji) twice.
+    """
+    if not ASTRAL_PATTERN.search(text):
+        return list(offsets)
+    astral = [m.start() for m in ASTRAL_PATTERN.finditer(text)]
+    positions = []
+    before = 0
+    for offset in offsets:
+        while before < len(astral) and astral[before] < offset:
+            before += 1
+        positions.append(offset + before)
+    return positions
+
+def preview(text, start, end, replacement):
+    """One line of context: "…before [match → replacement] after…" """
+    left = max(0, start - PREVIEW_CONTEXT)
+    right = min(len(text), end + PREVIEW_CONTEXT)
+    line = WHITESPACE_PATTERN.sub(" ", text[left:start])
+    line += f"[{text[start:end]} → {replacement}]"
+    line += WHITESPACE_PATTERN.sub(" ", text[end:right])
+    return ("…" if left > 0 else "") + line.strip() + ("…" if right < len(text) else "")
+
+def read_current_text(chapter_manager, filename):
+    """Chapter text with the edits its journal would recover, or None"""
+    content, _ = chapter_manager.read_chapter(filename)
+    if content is None:
+        return None
+    return chapter_manager.journal(filename).replay(content) or content
+
+class FindWorker(QThread):
+    """Searches every chapter off the GUI thread, reporting them as they finish"""
+    chapter_found = pyqtSignal(str, object, int, object)  # filename, text hash, matches, [(index, start, end, preview)]
+    progress = pyqtSignal(int, int)  # chapters searched, total
+    failed = pyqtSignal(str)
+
+    def __init__(self, chapter_manager, filenames, pattern, replacement, regex=False, texts=None):
+        super().__init__()
+        self.chapter_manager = chapter_manager
+        self.filenames = filenames
+        self.pattern = pattern
+        self.replacement = replacement
+        self.regex = regex
+        # filename -> text to search instead of the saved one (the open chapter)
+        self.texts = texts or {}
+        self._stop = False
+
+    def stop(self):
+        self._stop = True
+
+    def run(self):
+        # concurrent.futures costs ~30 ms to import; not worth paying at startup
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        done = 0
+        pool = ThreadPoolExecutor(max_workers=FIND_THREADS)
+        try:
+            futures = {pool.submit(self._search, filename): filename for filename in self.filenames}
+            for future in as_completed(futures):
+                if self._stop:
+                    break
+                done += 1
+                try:
+                    result = future.result()
+                except re.error as e:
+                    # A bad group reference in the replacement fails every chapter alike
+                    self.failed.emit(f"Reemplazo no válido: {e}")
+                    self._stop = True
+                    break
+                except Exception as e:
+                    log_error(f"Error searching {futures[future]}: {e}")
+                    result = None
+                if result:
+                    self.chapter_found.emit(futures[future], *result)
+                self.progress.emit(done, len(self.filenames))
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _search(self, filename):
+        if self._stop:
+            return None
+        text = self.texts.get(filename)
+        if text is None:
+            text = read_current_text(self.chapter_manager, filename)
+        if not text:
+            return None
+        matches = find_matches(self.pattern, text, self.replacement, self.regex)
+        if not matches:
+            return None
+        previews = [
+            (index, start, end, preview(text, start, end, replacement))
+            for index, (start, end, replacement) in enumerate(matches[:PREVIEW_MATCHES])
+        ]
+        return hash(text), len(matches), previews
+
+class ReplaceWorker(QThread):
+    """Replaces the chosen matches of saved chapters and writes them as one batch"""
+    replaced = pyqtSignal(object, int, object)  # {filename: new content}, matches replaced, [skipped filenames]
+    failed = pyqtSignal(str)
+
+    def __init__(self, chapter_manager, pattern, replacement, regex, chapters):
+        super().__init__()
+        self.chapter_manager = chapter_manager
+        self.pattern = pattern
+        self.replacement = replacement
+        self.regex = regex
+        # filename -> (text hash when searched, indexes of the matches to leave alone)
+        self.chapters = chapters
+
+    def run(self):
+        contents = {}
+        counts = {}
+        skipped = []
+        history = self.chapter_manager.history
+        try:
+            for filename, (text_hash, excluded) in self.chapters.items():
+                text = read_current_text(self.chapter_manager, filename)
+                if text is None or hash(text) != text_hash:
+                    # Changed since the search: its preview no longer applies
+                    skipped.append(filename)
+                    continue
+                matches = find_matches(self.pattern, text, self.replacement, self.regex)
+                matches = [match for index, match in enumerate(matches) if index not in excluded]
+                if not matches:
+                    continue
+                # The text being replaced stays restorable from the history
+                history.snapshot(filename, text, force=True)
+                contents[filename] = apply_matches(text, matches)
+                counts[filename] = len(matches)
+
+            saved = self.chapter_manager.save_chapters(contents)
+            for filename in saved:
+                # Recovered edits are in the new text now
+                journal = self.chapter_manager.journal(filename)
+                if journal.exists():
+                    journal.start(contents[filename])
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.replaced.emit(
+            {filename: contents[filename] for filename in saved},
+            sum(counts[filename] for filename in saved), skipped
+        )
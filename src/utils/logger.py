@@ -1,30 +1,190 @@
+"""
+Application log, written off the calling thread.
+
+log_* calls only put a record on a queue (QueueHandler style); a LogWriter
+thread drains it, formats each record as one JSON line and flushes once
+per batch. error.log is rotated by size, keeping LOG_BACKUPS old files.
+
+    {"time": "2025-11-30T21:58:21.120", "level": "INFO", "thread": "MainThread",
+     "message": "Loaded chapter: ...", "ms": 3.2}
+
+Keyword arguments of log_* become fields of the line, so hot paths can
+log timings (log_timing) at the cost of building a record. Records below
+the level (KUNO_LOG_LEVEL, INFO by default) are dropped before that.
+
+Uncaught exceptions are different: exception_hook waits for the records
+already queued, then writes the crash itself and fsyncs before returning.
+"""
+import os
 import sys
+import json
+import atexit
+import queue
+import logging
+import threading
 import traceback
-import os
 from datetime import datetime
+from logging.handlers import RotatingFileHandler
 
 LOG_FILE = "error.log"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+# Records written per flush, at most
+LOG_BATCH = 256
+# How long a crash waits for the records queued before it
+LOG_DRAIN_TIMEOUT = 2.0
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        line = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        line.update(getattr(record, "fields", None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line["exception"] = record.exc_text
+        return json.dumps(line, ensure_ascii=False, default=str)
+
+class BatchedFileHandler(RotatingFileHandler):
+    """Rotating file handler that leaves flushing to the end of each batch"""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self, sync=False):
+        with self.lock:
+            if self.stream:
+                self.stream.flush()
+                if sync:
+                    os.fsync(self.stream.fileno())
+
+class QueueHandler(logging.Handler):
+    """Puts records on the writer's queue, rendered so they can cross threads"""
+
+    def __init__(self, queue):
+        super().__init__()
+        self.queue = queue
+
+    def emit(self, record):
+        try:
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+            self.queue.put_nowait(record)
+        except Exception:
+            self.handleError(record)
+
+class LogWriter(threading.Thread):
+    """Writes queued records in batches; a threading.Event in the queue is set once everything before it is written"""
+
+    def __init__(self, handler):
+        super().__init__(name="LogWriter", daemon=True)
+        self.handler = handler
+        self.queue = queue.SimpleQueue()
+
+    def run(self):
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while len(batch) < LOG_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            markers = []
+            for item in batch:
+                if item is None:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    self.handler.handle(item)
+            try:
+                self.handler.flush_batch()
+            except Exception as e:
+                print(f"Failed to write to log: {e}", file=sys.stderr)
+            for marker in markers:
+                marker.set()
+
+    def drain(self, timeout=LOG_DRAIN_TIMEOUT):
+        """Waits until the records queued so far are written"""
+        if not self.is_alive():
+            return
+        marker = threading.Event()
+        self.queue.put(marker)
+        marker.wait(timeout)
+
+    def stop(self):
+        if self.is_alive():
+            self.queue.put(None)
+            self.join(LOG_DRAIN_TIMEOUT)
+        self.handler.close()
+
+logger = logging.getLogger("kuno")
+logger.propagate = False
+_writer = None
+_setup_lock = threading.Lock()
+
+def setup_logging(path=LOG_FILE, level=None):
+    """Starts the writer thread; log_* calls it on first use"""
+    global _writer
+    with _setup_lock:
+        if _writer is not None:
+            return _writer
+        handler = BatchedFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8", delay=True
+        )
+        handler.setFormatter(JsonLinesFormatter())
+        _writer = LogWriter(handler)
+        _writer.start()
+        logger.addHandler(QueueHandler(_writer.queue))
+        logger.setLevel(level or os.environ.get("KUNO_LOG_LEVEL", "INFO").upper())
+        atexit.register(_writer.stop)
+        return _writer
+
+def _log(level, message, fields, exc_info=False):
+    if _writer is None:
+        setup_logging()
+    if logger.isEnabledFor(level):
+        logger.log(level, message, exc_info=exc_info, extra={"fields": fields} if fields else None)
+
+def log_debug(message, **fields):
+    _log(logging.DEBUG, message, fields)
+
+def log_info(message, **fields):
+    _log(logging.INFO, message, fields)
+
+def log_warning(message, **fields):
+    _log(logging.WARNING, message, fields)
+
+def log_error(message, exc_info=False, **fields):
+    _log(logging.ERROR, message, fields, exc_info)
+
+def log_timing(label, seconds, **fields):
+    """Debug record of how long label took, as an "ms" field"""
+    _log(logging.DEBUG, label, dict(fields, ms=round(seconds * 1000, 2)))
 
 def setup_exception_hook():
+    setup_logging()
     sys.excepthook = exception_hook
 
 def exception_hook(exctype, value, tb):
     error_msg = "".join(traceback.format_exception(exctype, value, tb))
     print(error_msg, file=sys.stderr)
-    
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # Synchronous: the process may not live long enough for the writer
+    writer = setup_logging()
+    writer.drain()
+    record = logger.makeRecord(logger.name, logging.CRITICAL, "", 0, "Uncaught exception", None, None)
+    record.exc_text = error_msg
     try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(f"\n[{timestamp}] CRITICAL ERROR:\n")
-            f.write(error_msg)
-            f.write("-" * 80 + "\n")
+        writer.handler.handle(record)
+        writer.handler.flush_batch(sync=True)
     except Exception as e:
         print(f"Failed to write to log: {e}", file=sys.stderr)
-
-def log_info(message):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(f"[{timestamp}] INFO: {message}\n")
-    except:
-        pass
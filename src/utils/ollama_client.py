@@ -0,0 +1,177 @@
+"""
+Shared client for the Ollama HTTP API.
+
+Requests go through OLLAMA_POOL_SIZE long-lived OllamaWorker threads,
+each with its own requests.Session, so connections to the server stay
+open between prompts (keep-alive) instead of being set up again, along
+with a new thread, for every message. Requests are queued and answered
+through signals carrying the id generate()/list_models() returned;
+cancel() stops a generation between chunks. A cancelled generation still
+waiting for its first chunk (the model loading) keeps only its own
+worker, so the next prompt or model list does not queue behind it.
+
+Workers are daemon threads: a generation can wait up to GENERATE_TIMEOUT
+for its next chunk, and quitting does not wait for it.
+
+Generations also ask Ollama to keep the model loaded for
+OLLAMA_KEEP_ALIVE, so the next prompt does not wait for it to load again.
+"""
+import json
+import queue
+import threading
+import itertools
+from PyQt6.QtCore import QObject, QCoreApplication, pyqtSignal
+
+# Worker threads, each keeping its own connection open
+OLLAMA_POOL_SIZE = 4
+# Seconds to connect, and to wait for the first byte (models can be slow to load)
+CONNECT_TIMEOUT = 5
+GENERATE_TIMEOUT = 120
+MODELS_TIMEOUT = 5
+OLLAMA_KEEP_ALIVE = "30m"
+
+def tags_url(url):
+    """/api/tags of the server behind a /api/generate URL"""
+    base_url = url.strip()
+    if base_url.endswith('/api/generate'):
+        base_url = base_url[:-len('/api/generate')]
+    return f"{base_url.rstrip('/')}/api/tags"
+
+class OllamaWorker(threading.Thread):
+    """Runs requests from the client's queue one at a time on a Session of its own"""
+
+    def __init__(self, client, jobs):
+        super().__init__(name="OllamaWorker", daemon=True)
+        self.client = client
+        self.jobs = jobs
+        self.session = None
+
+    def run(self):
+        # Imported here, off the GUI thread and only once the AI is used
+        import requests
+        self.session = requests.Session()
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            kind, request_id = job[:2]
+            if request_id in self.client.cancelled:
+                self.client.cancelled.discard(request_id)
+                continue
+            try:
+                if kind == "generate":
+                    self._generate(request_id, *job[2:])
+                else:
+                    self._list_models(request_id, *job[2:])
+            except requests.exceptions.ConnectionError:
+                self.client.failed.emit(request_id, "No se pudo conectar al servidor Ollama. Verifica que esté corriendo en la URL configurada.")
+            except requests.exceptions.Timeout:
+                self.client.failed.emit(request_id, "TIMEOUT")
+            except Exception as e:
+                self.client.failed.emit(request_id, f"Error: {str(e)}")
+            finally:
+                self.client.cancelled.discard(request_id)
+        self.session.close()
+
+    def _generate(self, request_id, url, payload):
+        with self.session.post(url, json=payload, stream=True, timeout=(CONNECT_TIMEOUT, GENERATE_TIMEOUT)) as response:
+            if response.status_code != 200:
+                try:
+                    error_msg = response.json().get("error", response.text)
+                except ValueError:
+                    error_msg = response.text
+                if "no model" in error_msg.lower() or "model not found" in error_msg.lower():
+                    self.client.failed.emit(request_id, f"Modelo '{payload['model']}' no encontrado. Verifica que esté disponible en Ollama.")
+                else:
+                    self.client.failed.emit(request_id, f"Error API ({response.status_code}): {error_msg}")
+                return
+
+            full_response = ""
+            done = False
+            # Read to the end of the body even after "done", or the
+            # connection is closed instead of going back to the pool
+            for line in response.iter_lines():
+                if request_id in self.client.cancelled:
+                    return
+                if not line or done:
+                    continue
+                try:
+                    json_response = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                chunk = json_response.get("response", "")
+                if chunk:
+                    full_response += chunk
+                    self.client.chunk_received.emit(request_id, chunk)
+                done = json_response.get("done", False)
+            self.client.finished.emit(request_id, full_response)
+
+    def _list_models(self, request_id, url):
+        response = self.session.get(tags_url(url), timeout=MODELS_TIMEOUT)
+        if response.status_code != 200:
+            self.client.failed.emit(request_id, f"Error al obtener modelos: {response.status_code}")
+            return
+        models = response.json().get('models', [])
+        self.client.models_listed.emit(request_id, [model['name'] for model in models])
+
+class OllamaClient(QObject):
+    """One Session and one worker thread for every Ollama request of the app"""
+    chunk_received = pyqtSignal(int, str)  # request id, text
+    finished = pyqtSignal(int, str)        # request id, full response
+    failed = pyqtSignal(int, str)          # request id, message ("TIMEOUT" on timeouts)
+    models_listed = pyqtSignal(int, list)  # request id, model names
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        super().__init__()
+        self.ids = itertools.count(1)
+        # Ids of queued or running requests to drop; written from the GUI thread
+        self.cancelled = set()
+        self.jobs = queue.Queue()
+        self.workers = []
+        app = QCoreApplication.instance()
+        if app:
+            app.aboutToQuit.connect(self.stop)
+
+    def _submit(self, *job):
+        if not self.workers:
+            self.workers = [OllamaWorker(self, self.jobs) for _ in range(OLLAMA_POOL_SIZE)]
+            for worker in self.workers:
+                worker.start()
+        request_id = next(self.ids)
+        self.jobs.put((job[0], request_id) + job[1:])
+        return request_id
+
+    def generate(self, url, model, prompt, options=None):
+        """Streams a completion through chunk_received; returns the request id"""
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": options or {},
+        }
+        return self._submit("generate", url, payload)
+
+    def list_models(self, url):
+        """Lists the server's models through models_listed; returns the request id"""
+        return self._submit("models", url)
+
+    def cancel(self, request_id):
+        self.cancelled.add(request_id)
+
+    def stop(self):
+        if self.workers:
+            # Generations in progress are abandoned, not waited for: closing
+            # their responses from here would not wake a read blocked on the socket
+            self.cancelled.update(range(1, next(self.ids)))
+            for _ in self.workers:
+                self.jobs.put(None)
+            self.workers = []
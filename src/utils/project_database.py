@@ -0,0 +1,208 @@
+"""
+Optional single-file storage for a project: <project>/project.db.
+
+A project with a project.db keeps its chapters, their order and titles,
+and draft.txt/notes.txt/characters.json in this SQLite file instead of
+loose files. The database runs in WAL mode, so reads never wait for a
+write, and every operation that touches several rows (reordering,
+migrating a whole project) is one transaction. Sidecar data (.kuno/
+journals, history, caches) stays as files in both layouts.
+
+    chapters    id, file, title, position, words, chars, mtime_ns
+    texts       id, content         one row per chapter
+    content     name, data          draft.txt, notes.txt, characters.json
+    meta        key, value          schema version, next chapter id
+
+Chapters keep the filename they had in the folder layout as their key,
+so journals and history survive a migration either way
+(see utils.storage_migration).
+"""
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DATABASE_FILE = "project.db"
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS content (name TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS chapters (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    words INTEGER NOT NULL DEFAULT 0,
+    chars INTEGER NOT NULL DEFAULT 0,
+    mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS chapters_position ON chapters (position);
+CREATE TABLE IF NOT EXISTS texts (
+    id INTEGER PRIMARY KEY REFERENCES chapters (id) ON DELETE CASCADE,
+    content TEXT NOT NULL
+);
+"""
+
+def database_path(project_path):
+    return os.path.join(project_path, DATABASE_FILE)
+
+def has_database(project_path):
+    return os.path.exists(database_path(project_path))
+
+class ProjectDatabase:
+    """
+    Connection to a project.db, shared by the GUI thread and the save
+    worker: every statement runs under one lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        # Transactions are opened explicitly by batch()
+        self.connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last commits on power loss, never corruption
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        with self.batch() as db:
+            db._execute_script(SCHEMA)
+            if db.get_meta("schema_version") is None:
+                db.set_meta("schema_version", SCHEMA_VERSION)
+
+    def close(self):
+        with self._lock:
+            if self.connection:
+                self.connection.close()
+                self.connection = None
+
+    @contextmanager
+    def batch(self):
+        """Runs the enclosed calls as one transaction (nested batches join the outer one)"""
+        with self._lock:
+            self._check_open()
+            if self.connection.in_transaction:
+                yield self
+                return
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    def _execute_script(self, script):
+        # executescript() would commit the open transaction
+        for statement in script.split(";"):
+            if statement.strip():
+                self.connection.execute(statement)
+
+    def _check_open(self):
+        if self.connection is None:
+            raise sqlite3.ProgrammingError(f"{self.path} is closed")
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            self._check_open()
+            return self.connection.execute(sql, params).fetchall()
+
+    def get_meta(self, key, default=None):
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return json.loads(rows[0][0]) if rows else default
+
+    def set_meta(self, key, value):
+        with self.batch():
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value))
+            )
+
+    # Project files (draft.txt, notes.txt, characters.json)
+
+    def load_content(self, name, default=None):
+        rows = self._query("SELECT data FROM content WHERE name = ?", (name,))
+        if not rows:
+            return default
+        if name.endswith('.json'):
+            try:
+                return json.loads(rows[0][0])
+            except ValueError:
+                return default
+        return rows[0][0]
+
+    def save_content(self, name, content):
+        data = json.dumps(content, indent=4) if name.endswith('.json') else content
+        with self.batch():
+            self.connection.execute(
+                "INSERT OR REPLACE INTO content (name, data) VALUES (?, ?)", (name, data)
+            )
+
+    def content_names(self):
+        return [row[0] for row in self._query("SELECT name FROM content ORDER BY name")]
+
+    # Chapters
+
+    def chapters(self):
+        """Chapter rows in chapter order, without their text"""
+        rows = self._query(
+            "SELECT id, file, title, words, chars, mtime_ns FROM chapters ORDER BY position"
+        )
+        return [
+            {"id": r[0], "file": r[1], "title": r[2], "words": r[3], "chars": r[4], "mtime_ns": r[5]}
+            for r in rows
+        ]
+
+    def chapter_text(self, filename):
+        rows = self._query(
+            "SELECT texts.content FROM chapters JOIN texts ON texts.id = chapters.id "
+            "WHERE chapters.file = ?", (filename,)
+        )
+        return rows[0][0] if rows else None
+
+    def insert_chapters(self, entries):
+        """Appends chapters; entries are dicts as returned by chapters() plus "content" """
+        with self.batch():
+            position = self._query("SELECT COALESCE(MAX(position) + 1, 0) FROM chapters")[0][0]
+            for offset, entry in enumerate(entries):
+                content = entry.get("content", "")
+                self.connection.execute(
+                    "INSERT INTO chapters (id, file, title, position, words, chars, mtime_ns) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (entry["id"], entry["file"], entry["title"], position + offset,
+                     len(content.split()), len(content), entry.get("mtime_ns"))
+                )
+                self.connection.execute(
+                    "INSERT INTO texts (id, content) VALUES (?, ?)", (entry["id"], content)
+                )
+
+    def save_chapter(self, filename, content, mtime_ns):
+        """Returns False if the chapter does not exist"""
+        with self.batch():
+            rows = self._query("SELECT id FROM chapters WHERE file = ?", (filename,))
+            if not rows:
+                return False
+            self.connection.execute(
+                "UPDATE chapters SET words = ?, chars = ?, mtime_ns = ? WHERE id = ?",
+                (len(content.split()), len(content), mtime_ns, rows[0][0])
+            )
+            self.connection.execute(
+                "UPDATE texts SET content = ? WHERE id = ?", (content, rows[0][0])
+            )
+        return True
+
+    def delete_chapter(self, filename):
+        with self.batch():
+            self.connection.execute("DELETE FROM chapters WHERE file = ?", (filename,))
+
+    def set_title(self, filename, title):
+        with self.batch():
+            self.connection.execute("UPDATE chapters SET title = ? WHERE file = ?", (title, filename))
+
+    def set_order(self, filenames, start=0):
+        """Gives filenames the positions start, start + 1, ... in one transaction"""
+        with self.batch():
+            self.connection.executemany(
+                "UPDATE chapters SET position = ? WHERE file = ?",
+                [(position, filename) for position, filename in enumerate(filenames, start)]
+            )
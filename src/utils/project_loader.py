@@ -0,0 +1,49 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from utils.logger import log_error
+
+class ProjectLoader(QThread):
+    """
+    Reads what opening a project needs off the GUI thread, in the order the
+    window shows it: the characters, then the first chapter's text, then
+    the project's size for the project list.
+    """
+    characters_loaded = pyqtSignal(list)
+    chapter_loaded = pyqtSignal(str, object, object)  # filename, version, content (None: load it normally)
+
+    def __init__(self, project_manager, chapter_manager, project_name):
+        super().__init__()
+        self.project_manager = project_manager
+        self.chapter_manager = chapter_manager
+        self.project_name = project_name
+        self._stop = False
+
+    def stop(self):
+        self._stop = True
+
+    def run(self):
+        characters = self.project_manager.load_content("characters.json", [])
+        self.characters_loaded.emit(characters if isinstance(characters, list) else [])
+        if self._stop:
+            return
+
+        chapters = self.chapter_manager.get_chapters()
+        if chapters:
+            filename = chapters[0]
+            try:
+                content, version = self.chapter_manager.read_chapter(filename)
+            except Exception as e:
+                log_error(f"Error reading {filename}: {e}")
+                content, version = None, None
+            if content is not None and self.chapter_manager.journal(filename).replay(content) is not None:
+                # Unsaved edits to recover: left to a normal load
+                content = None
+            self.chapter_loaded.emit(filename, version, content)
+        if self._stop:
+            return
+
+        try:
+            # Walking a large project on a slow disk takes a while; stop() ends it
+            self.project_manager.mark_opened(self.project_name, lambda: self._stop)
+        except Exception as e:
+            log_error(f"Error updating project list: {e}")
@@ -1,6 +1,23 @@
 import os
 import json
+import time
 import shutil
+import threading
+from functools import partial
+
+from utils.project_database import ProjectDatabase, database_path, has_database
+from utils.logger import log_error
+
+# Per-project caches and indexes, hidden next to the user's files
+META_DIR = ".kuno"
+# Cached list of the projects in base_dir: last opened time and size of each
+PROJECT_LIST_FILE = "projects.json"
+
+def meta_path(project_path, filename):
+    """Returns <project>/.kuno/filename, creating the folder if needed"""
+    folder = os.path.join(project_path, META_DIR)
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, filename)
 
 class ProjectManager:
     def __init__(self, base_dir="D:/Kuno/Web Novel/Projects"):
@@ -8,14 +25,26 @@ class ProjectManager:
         if not os.path.exists(self.base_dir):
             os.makedirs(self.base_dir)
         self.current_project_path = None
+        # Set while the open project uses the single-file layout (project.db)
+        self.database = None
+        # The project list is updated from the dialog's scan and from project loads
+        self._list_lock = threading.Lock()
 
-    def create_project(self, project_name):
+    def create_project(self, project_name, use_database=False):
         project_path = os.path.join(self.base_dir, project_name)
         if os.path.exists(project_path):
             return False, "El proyecto ya existe."
         
         try:
             os.makedirs(project_path)
+            if use_database:
+                database = ProjectDatabase(database_path(project_path))
+                with database.batch():
+                    database.save_content("draft.txt", "")
+                    database.save_content("characters.json", [])
+                    database.save_content("notes.txt", "")
+                database.close()
+                return True, project_path
             # Create empty initial files
             self._save_file(os.path.join(project_path, "draft.txt"), "")
             self._save_json(os.path.join(project_path, "characters.json"), [])
@@ -28,26 +57,108 @@ class ProjectManager:
         project_path = os.path.join(self.base_dir, project_name)
         if not os.path.exists(project_path):
             return False, "El proyecto no existe."
+        self.close_project()
+        if has_database(project_path):
+            try:
+                self.database = ProjectDatabase(database_path(project_path))
+            except Exception as e:
+                return False, str(e)
         self.current_project_path = project_path
         return True, project_path
 
+    def close_project(self):
+        if self.database:
+            self.database.close()
+            self.database = None
+        self.current_project_path = None
+
     def get_projects(self):
         if not os.path.exists(self.base_dir):
             return []
-        return [d for d in os.listdir(self.base_dir) if os.path.isdir(os.path.join(self.base_dir, d))]
+        # scandir knows directories from the listing itself, without a stat each
+        with os.scandir(self.base_dir) as entries:
+            return [entry.name for entry in entries if entry.is_dir()]
 
-    def save_content(self, filename, content):
-        if not self.current_project_path:
+    def project_list_path(self):
+        return os.path.join(self.base_dir, PROJECT_LIST_FILE)
+
+    def load_project_list(self):
+        """Cached {name: {"opened": time or None, "size": bytes or None}}, without touching the projects"""
+        try:
+            with open(self.project_list_path(), 'r', encoding='utf-8') as f:
+                projects = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return projects if isinstance(projects, dict) else {}
+
+    def update_project_list(self, changes, keep=None):
+        """
+        Merges {name: {field: value}} into the cached list and writes it;
+        with keep, projects not in keep are dropped. Returns the new list.
+        """
+        with self._list_lock:
+            projects = self.load_project_list()
+            if keep is not None:
+                projects = {name: entry for name, entry in projects.items() if name in keep}
+            for name, fields in changes.items():
+                projects.setdefault(name, {"opened": None, "size": None}).update(fields)
+            tmp_path = self.project_list_path() + ".tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(projects, f, indent=4, ensure_ascii=False)
+                os.replace(tmp_path, self.project_list_path())
+            except OSError as e:
+                log_error(f"Error saving project list: {e}")
+            return projects
+
+    def project_size(self, project_name, stopped=None):
+        """
+        Bytes used by a project, its .kuno caches included; None if
+        stopped() turns true before the walk is done
+        """
+        size = 0
+        folders = [os.path.join(self.base_dir, project_name)]
+        while folders:
+            if stopped and stopped():
+                return None
+            try:
+                with os.scandir(folders.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            folders.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            size += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                pass
+        return size
+
+    def mark_opened(self, project_name, stopped=None):
+        """Records that project_name was just opened, and its current size"""
+        size = self.project_size(project_name, stopped)
+        if size is None:
             return
+        self.update_project_list({project_name: {"opened": time.time(), "size": size}})
+
+    def save_content(self, filename, content):
+        if self.current_project_path:
+            self.content_writer(filename)(content)
+
+    def content_writer(self, filename):
+        """
+        write(content) for filename in the storage of the project open now,
+        for deferred saves: it keeps writing there after another project is
+        opened, and fails instead of writing elsewhere once that storage is closed.
+        """
+        if self.database:
+            return partial(self.database.save_content, filename)
         path = os.path.join(self.current_project_path, filename)
-        if filename.endswith('.json'):
-            self._save_json(path, content)
-        else:
-            self._save_file(path, content)
+        return partial(self._save_json if filename.endswith('.json') else self._save_file, path)
 
     def load_content(self, filename, default=None):
         if not self.current_project_path:
             return default
+        if self.database:
+            return self.database.load_content(filename, default)
         path = os.path.join(self.current_project_path, filename)
         if not os.path.exists(path):
             return default
@@ -0,0 +1,132 @@
+import os
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from utils.chapter_manager import file_stamp
+from utils.logger import log_info, log_error
+
+def count_text(text):
+    """Returns (words, chars) the same way the editor counts them"""
+    return len(text.split()), len(text)
+
+class StatsWorker(QThread):
+    """Recounts the chapters whose file mtime or size changed since the manifest counted them"""
+    counted = pyqtSignal(str, object)  # filename, (words, chars, file stamp, counted version)
+    finished_scan = pyqtSignal()
+
+    def __init__(self, chapters_dir, versions):
+        super().__init__()
+        self.chapters_dir = chapters_dir
+        # filename -> (mtime_ns, size) the manifest counts are from (None: never counted)
+        self.versions = versions
+        self._stop = False
+
+    def stop(self):
+        self._stop = True
+
+    def run(self):
+        for filename, version in self.versions.items():
+            if self._stop:
+                return
+            path = os.path.join(self.chapters_dir, filename)
+            try:
+                stamp = file_stamp(path)
+                if (stamp["mtime_ns"], stamp["size"]) == version:
+                    continue
+                with open(path, 'r', encoding='utf-8') as f:
+                    words, chars = count_text(f.read())
+                self.counted.emit(filename, (words, chars, stamp, version))
+            except Exception as e:
+                log_error(f"Error counting {filename}: {e}")
+        self.finished_scan.emit()
+
+class ProjectStats(QObject):
+    """
+    Whole-project word/char totals, from the per-chapter counts the chapter
+    manager already keeps (chapters.json or project.db). Opening a project
+    shows those totals at once; in the folder layout a StatsWorker then
+    recounts only the files changed outside the app. The open chapter is
+    counted live from the editor.
+    """
+    totals_changed = pyqtSignal(int, int)  # words, chars
+
+    def __init__(self, chapter_manager):
+        super().__init__()
+        self.chapter_manager = chapter_manager
+        # filename -> (words, chars)
+        self.entries = {}
+        # (filename, words, chars) of the chapter open in the editor
+        self.live = None
+        self.worker = None
+        self.dirty = False
+        self.published = None
+
+        chapter_manager.chapters_changed.connect(self.refresh)
+
+    def refresh(self):
+        """Publishes the stored totals and recounts stale chapters in the background"""
+        self.entries = self.chapter_manager.counts()
+        self.publish()
+        if self.chapter_manager.chapters_dir is None:
+            # Single-file projects only change through the app
+            return
+
+        if self.worker and self.worker.isRunning():
+            self.worker.stop()
+            self.worker.wait()
+        self.worker = StatsWorker(self.chapter_manager.chapters_dir, self.chapter_manager.counted_versions())
+        self.worker.counted.connect(self._store)
+        self.worker.finished_scan.connect(self._scan_finished)
+        self.worker.start(QThread.Priority.LowPriority)
+
+    def close(self):
+        if self.worker and self.worker.isRunning():
+            self.worker.stop()
+            self.worker.wait()
+        self.save()
+
+    def save(self):
+        """Writes recounted chapters back to the manifest"""
+        if self.dirty:
+            self.chapter_manager.save_manifest()
+            self.dirty = False
+
+    def _store(self, filename, counted):
+        words, chars, stamp, version = counted
+        if filename not in self.chapter_manager:
+            return
+        self.chapter_manager.set_counts(filename, words, chars, stamp, version)
+        self.entries[filename] = (words, chars)
+        self.dirty = True
+        self.publish()
+
+    def _scan_finished(self):
+        log_info(f"Project stats: {len(self.entries)} chapters, {self.totals()[0]} words")
+        self.save()
+
+    def set_live(self, filename, words, chars):
+        """Counts of the open chapter, straight from the editor"""
+        self.live = (filename, words, chars) if filename else None
+        self.publish()
+
+    def record(self, filename, content):
+        """Updates the totals right after the app saved a chapter"""
+        self.entries[filename] = count_text(content)
+        self.publish()
+
+    def totals(self):
+        words = chars = 0
+        live_name = self.live[0] if self.live else None
+        for filename, (chapter_words, chapter_chars) in self.entries.items():
+            if filename != live_name:
+                words += chapter_words
+                chars += chapter_chars
+        if self.live:
+            words += self.live[1]
+            chars += self.live[2]
+        return words, chars
+
+    def publish(self):
+        totals = self.totals()
+        if totals != self.published:
+            self.published = totals
+            self.totals_changed.emit(*totals)
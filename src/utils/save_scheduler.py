@@ -0,0 +1,171 @@
+import time
+import queue
+import threading
+from PyQt6.QtCore import QObject, QThread, QTimer, QCoreApplication, pyqtSignal
+
+from utils.logger import log_error
+
+# Quiet time after the last change before saving
+SAVE_DEBOUNCE_MS = 2000
+# Longest a change may wait while the user keeps typing
+SAVE_MAX_LATENCY_MS = 10000
+
+class SaveWorker(QThread):
+    """Runs the queued writes off the GUI thread"""
+    saved = pyqtSignal(object, object, object)  # key, content, write() result
+    save_failed = pyqtSignal(object, str)       # key, error
+
+    def __init__(self, scheduler):
+        super().__init__()
+        self.scheduler = scheduler
+
+    def run(self):
+        while True:
+            key = self.scheduler.jobs.get()
+            try:
+                if key is None:
+                    break
+                job = self.scheduler._writing.get(key)
+                if job is None:
+                    continue
+                write, content = job
+                try:
+                    result = write(content)
+                except Exception as e:
+                    log_error(f"Error saving {key}: {e}")
+                    self.scheduler._done(key, job)
+                    self.save_failed.emit(key, str(e))
+                    continue
+                self.scheduler._done(key, job)
+                self.saved.emit(key, content, result)
+            finally:
+                self.scheduler.jobs.task_done()
+
+class SaveScheduler(QObject):
+    """
+    One place for every pending write (chapters, notes, characters).
+
+    schedule(key, collect, write) marks key as changed. Changes to the same
+    key coalesce: collect() runs once on the GUI thread when the key is due,
+    SAVE_DEBOUNCE_MS after its last change but never later than
+    SAVE_MAX_LATENCY_MS after its first one, and write(content) then runs
+    on the writer thread. collect() may return None when there is nothing
+    to save. A single timer serves every key.
+    """
+    pending_changed = pyqtSignal(int)
+    saved = pyqtSignal(object, object, object)
+    save_failed = pyqtSignal(object, str)
+
+    def __init__(self):
+        super().__init__()
+        # key -> [collect, write, due, deadline], waiting for their timer
+        self._scheduled = {}
+        # key -> (write, content), queued or being written
+        self._writing = {}
+        self._lock = threading.Lock()
+        self.jobs = queue.Queue()
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._run_due)
+
+        self.worker = SaveWorker(self)
+        self.worker.saved.connect(self._on_saved)
+        self.worker.save_failed.connect(self._on_failed)
+        self.worker.start()
+        app = QCoreApplication.instance()
+        if app:
+            app.aboutToQuit.connect(self.stop)
+
+    def schedule(self, key, collect, write):
+        now = time.monotonic()
+        entry = self._scheduled.get(key)
+        if entry is None:
+            deadline = now + SAVE_MAX_LATENCY_MS / 1000
+            self._scheduled[key] = [collect, write, 0, deadline]
+            self._emit_pending()
+        else:
+            entry[0], entry[1] = collect, write
+            deadline = entry[3]
+        self._scheduled[key][2] = min(now + SAVE_DEBOUNCE_MS / 1000, deadline)
+        self._arm_timer()
+
+    def save_now(self, key=None):
+        """Collects key (or every scheduled key) now and queues its write"""
+        keys = list(self._scheduled) if key is None else [key]
+        for k in keys:
+            entry = self._scheduled.pop(k, None)
+            if entry is not None:
+                self._queue(k, entry)
+        self._emit_pending()
+        self._arm_timer()
+
+    def flush(self):
+        """Saves everything scheduled and blocks until it is on disk"""
+        self.save_now()
+        self.jobs.join()
+
+    def stop(self):
+        if self.worker.isRunning():
+            self.flush()
+            self.jobs.put(None)
+            self.worker.wait()
+
+    def pending_content(self, key):
+        """Content queued for key but not yet written, or None"""
+        with self._lock:
+            job = self._writing.get(key)
+        return job[1] if job else None
+
+    def pending_count(self):
+        with self._lock:
+            writing = set(self._writing)
+        return len(writing | set(self._scheduled))
+
+    def _arm_timer(self):
+        if not self._scheduled:
+            self.timer.stop()
+            return
+        due = min(entry[2] for entry in self._scheduled.values())
+        self.timer.start(max(0, int((due - time.monotonic()) * 1000)))
+
+    def _run_due(self):
+        now = time.monotonic()
+        for key in [k for k, entry in self._scheduled.items() if entry[2] <= now]:
+            self._queue(key, self._scheduled.pop(key))
+        self._emit_pending()
+        self._arm_timer()
+
+    def _queue(self, key, entry):
+        collect, write = entry[0], entry[1]
+        try:
+            content = collect()
+        except Exception as e:
+            log_error(f"Error collecting {key}: {e}")
+            return
+        if content is None:
+            return
+        with self._lock:
+            queued = key in self._writing
+            self._writing[key] = (write, content)
+        if not queued:
+            self.jobs.put(key)
+
+    def _done(self, key, job):
+        with self._lock:
+            if self._writing.get(key) is job:
+                del self._writing[key]
+            else:
+                # Queued again while writing: write the newer content too
+                self.jobs.put(key)
+
+    def _on_saved(self, key, content, result):
+        self.saved.emit(key, content, result)
+        self._emit_pending()
+
+    def _on_failed(self, key, error):
+        self.save_failed.emit(key, error)
+        self._emit_pending()
+
+    def _emit_pending(self):
+        self.pending_changed.emit(self.pending_count())
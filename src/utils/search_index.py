@@ -0,0 +1,404 @@
+"""
+Full-text index of the chapters of a project.
+
+Words are folded (lowercase, no accents; ñ is kept) so "canción" finds
+"CANCION". Each chapter is indexed on its own as three arrays:
+
+    terms     sorted ids of the distinct words of the chapter
+    starts    where the offsets of terms[i] begin in offsets (len + 1)
+    offsets   character offsets of every word, grouped by term; kept
+              zlib-compressed, only the best hits need them
+
+A query bisects each chapter's terms, so updating a chapter after a save
+only replaces its arrays; there are no global posting lists to patch.
+Hits are ranked with BM25.
+
+The index is kept in <project>/.kuno/search.idx: a JSON header with the
+vocabulary and, per chapter, its version, word count and sizes, followed
+by each chapter's terms, starts and compressed offsets as stored in
+memory, so loading is reading. Chapters whose version changed while the
+app was closed are reindexed by the IndexWorker on open.
+"""
+import os
+import re
+import json
+import math
+import time
+import zlib
+import queue
+import struct
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from PyQt6.QtCore import QObject, QThread, QTimer, QCoreApplication, pyqtSignal
+
+from utils.project_manager import meta_path
+from utils.logger import log_timing, log_error
+
+INDEX_FILE = "search.idx"
+INDEX_MAGIC = b"KSIX"
+INDEX_VERSION = 1
+HEADER = struct.Struct("<4sII")  # magic, version, header length
+# Quiet time after the last update before the index is written
+INDEX_SAVE_DELAY_MS = 5000
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# str.translate is ~25x slower than a few replace() calls on Spanish text
+FOLD_PAIRS = list(zip("áàâäéèêëíìîïóòôöúùûü", "aaaaeeeeiiiioooouuuu"))
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+def fold(text):
+    """Lowercase without accents, same length as text in practice"""
+    text = text.lower()
+    for accented, plain in FOLD_PAIRS:
+        if accented in text:
+            text = text.replace(accented, plain)
+    return text
+
+def tokenize(text):
+    """Returns (word count, {folded word: [offsets]})"""
+    folded = fold(text)
+    if len(folded) == len(text):
+        matches = ((m.start(), m.group()) for m in TOKEN_PATTERN.finditer(folded))
+    else:
+        # A character whose lowercase is longer: fold word by word to keep offsets
+        matches = ((m.start(), fold(m.group())) for m in TOKEN_PATTERN.finditer(text))
+    tokens = defaultdict(list)
+    words = 0
+    for start, term in matches:
+        tokens[term].append(start)
+        words += 1
+    return words, tokens
+
+class IndexWorker(QThread):
+    """
+    Reads the index file, checks chapter versions, tokenizes chapters and
+    writes the index file off the GUI thread. It keeps its own copy of the
+    vocabulary and sends the terms it adds along with each chapter, so the
+    GUI thread's copy is only ever changed on the GUI thread.
+    """
+    indexed = pyqtSignal(str, object, object, list)  # filename, version, (words, terms, starts, offsets blob), new terms
+    loaded = pyqtSignal(list, object)  # vocabulary and chapters read from the index file
+    stale = pyqtSignal(list)  # chapters a sync found changed, about to be indexed
+    idle = pyqtSignal()
+
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+        self.jobs = queue.Queue()
+        # Vocabulary: term id -> folded word, and back
+        self.terms = []
+        self.term_ids = {}
+        self._new_terms = []
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                if job is None:
+                    break
+                if job[0] == "save":
+                    self.index._write(*job[1:])
+                elif job[0] == "load":
+                    self._load()
+                elif job[0] == "sync":
+                    self._sync(*job[1:])
+                else:
+                    self._index_chapter(*job[1:])
+            except Exception as e:
+                log_error(f"Error in search index job {job[:2]}: {e}")
+            finally:
+                self.jobs.task_done()
+            if self.jobs.empty():
+                self.idle.emit()
+
+    def term_id(self, term):
+        """Id of term, added to the vocabulary if new"""
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            term_id = len(self.terms)
+            self.terms.append(term)
+            self.term_ids[term] = term_id
+            self._new_terms.append(term)
+        return term_id
+
+    def _load(self):
+        result = self.index._read()
+        if result is None or self.terms:
+            # Nothing saved, or chapters were indexed with ids of their own meanwhile
+            self.loaded.emit([], {})
+            return
+        terms, term_ids, chapters = result
+        self.terms, self.term_ids = list(terms), dict(term_ids)
+        self.loaded.emit(terms, chapters)
+
+    def _sync(self, versions):
+        """Indexes the chapters whose version is not the one in versions (filename -> indexed version)"""
+        chapter_manager = self.index.chapter_manager
+        stale = [filename for filename, version in versions.items() if chapter_manager.version(filename) != version]
+        if stale:
+            self.stale.emit(stale)
+        for filename in stale:
+            self._index_chapter(filename, None, None)
+
+    def _index_chapter(self, filename, version, content):
+        if content is None:
+            content, version = self.index.chapter_manager.read_chapter(filename)
+            if content is None:
+                return
+        words, tokens = tokenize(content)
+        ids = sorted((self.term_id(term), positions) for term, positions in tokens.items())
+        terms = array('I', [term_id for term_id, _ in ids])
+        starts = array('I')
+        offsets = array('I')
+        for _, positions in ids:
+            starts.append(len(offsets))
+            offsets.extend(positions)
+        starts.append(len(offsets))
+        new_terms, self._new_terms = self._new_terms, []
+        self.indexed.emit(filename, version, (words, terms, starts, zlib.compress(offsets.tobytes())), new_terms)
+
+class SearchIndex(QObject):
+    """
+    Inverted index of one project's chapters (see module docstring).
+    The GUI thread owns self.chapters and its copy of the vocabulary; the
+    worker hands finished chapters and the terms they added back through
+    indexed, and checks which chapters changed on sync().
+    """
+    progress = pyqtSignal(int, int)  # chapters waiting, chapters in the project
+    updated = pyqtSignal()
+
+    def __init__(self, chapter_manager):
+        super().__init__()
+        self.chapter_manager = chapter_manager
+        self.path = meta_path(chapter_manager.project_path, INDEX_FILE)
+        # Vocabulary: term id -> folded word, and back
+        self.terms = []
+        self.term_ids = {}
+        # filename -> (version, words, terms, starts, compressed offsets)
+        self.chapters = {}
+        self.total_words = 0
+        self.waiting = set()
+        self.dirty = False
+
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(INDEX_SAVE_DELAY_MS)
+        self.save_timer.timeout.connect(self.save)
+
+        self.worker = IndexWorker(self)
+        self.worker.indexed.connect(self._store)
+        self.worker.loaded.connect(self._on_loaded)
+        self.worker.stale.connect(self._on_stale)
+        self.worker.idle.connect(self._on_idle)
+        self.worker.start(QThread.Priority.LowPriority)
+        app = QCoreApplication.instance()
+        if app:
+            app.aboutToQuit.connect(self.close)
+
+        chapter_manager.chapters_changed.connect(self.sync)
+        chapter_manager.chapter_saved.connect(self.on_chapter_saved)
+
+    def load(self):
+        """Reads the saved index on the calling thread, before anything is indexed"""
+        result = self._read()
+        if result is None:
+            return False
+        self.terms, self.term_ids, self.chapters = result
+        self.worker.terms, self.worker.term_ids = list(self.terms), dict(self.term_ids)
+        self.total_words = sum(entry[1] for entry in self.chapters.values())
+        return True
+
+    def load_in_background(self):
+        """Reads the saved index on the worker, then syncs it with the chapters"""
+        self.worker.jobs.put(("load",))
+
+    def _on_loaded(self, terms, chapters):
+        if terms:
+            # Loaded before any chapter was indexed, so no ids to reconcile
+            self.terms, self.term_ids = list(terms), {term: term_id for term_id, term in enumerate(terms)}
+            self.chapters = chapters
+            self.total_words = sum(entry[1] for entry in chapters.values())
+        self.sync()
+
+    def _read(self):
+        """Returns (terms, term ids, chapters) from the index file, or None"""
+        start = time.perf_counter()
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            magic, version, header_length = HEADER.unpack_from(data)
+            if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                return None
+            header = json.loads(data[HEADER.size:HEADER.size + header_length].decode('utf-8'))
+        except Exception as e:
+            log_error(f"Error loading search index: {e}")
+            return None
+
+        chapters = {}
+        body = memoryview(data)
+        position = HEADER.size + header_length
+        for filename, chapter_version, words, term_count, blob_size in header["chapters"]:
+            arrays = []
+            for count in (term_count, term_count + 1):
+                values = array('I')
+                values.frombytes(body[position:position + count * values.itemsize])
+                position += count * values.itemsize
+                arrays.append(values)
+            chapters[filename] = (chapter_version, words, arrays[0], arrays[1], bytes(body[position:position + blob_size]))
+            position += blob_size
+        terms = header["terms"]
+        term_ids = {term: term_id for term_id, term in enumerate(terms)}
+        log_timing("Search index loaded", time.perf_counter() - start, chapters=len(chapters))
+        return terms, term_ids, chapters
+
+    def save(self):
+        """Writes the index on the worker thread"""
+        self.save_timer.stop()
+        if not self.dirty:
+            return
+        self.dirty = False
+        self.worker.jobs.put(("save", list(self.terms), dict(self.chapters)))
+
+    def _write(self, terms, chapters):
+        header = {"terms": terms, "chapters": []}
+        blob = []
+        for filename, (chapter_version, words, term_ids, starts, offsets) in chapters.items():
+            header["chapters"].append([filename, chapter_version, words, len(term_ids), len(offsets)])
+            blob.extend((term_ids.tobytes(), starts.tobytes(), offsets))
+        header_data = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(header_data)))
+            f.write(header_data)
+            f.write(b"".join(blob))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        if self.worker.isRunning():
+            # Chapters not indexed yet are queued again by the next sync();
+            # a save already queued still has to happen
+            saves = []
+            while True:
+                try:
+                    job = self.worker.jobs.get_nowait()
+                except queue.Empty:
+                    break
+                self.worker.jobs.task_done()
+                if job and job[0] == "save":
+                    saves.append(job)
+            for job in saves:
+                self.worker.jobs.put(job)
+            self.save()
+            self.worker.jobs.put(None)
+            self.worker.wait()
+
+    def sync(self):
+        """Drops deleted chapters and has the worker reindex the ones changed since they were indexed"""
+        chapters = self.chapter_manager.get_chapters()
+        for filename in set(self.chapters) - set(chapters):
+            self.total_words -= self.chapters.pop(filename)[1]
+            self.dirty = True
+        # Versions are checked on the worker: a stat per chapter for the folder layout
+        versions = {}
+        for filename in chapters:
+            if filename not in self.waiting:
+                entry = self.chapters.get(filename)
+                versions[filename] = entry[0] if entry else None
+        self.worker.jobs.put(("sync", versions))
+        self.progress.emit(len(self.waiting), len(chapters))
+        if self.dirty:
+            self.save_timer.start()
+
+    def _on_stale(self, filenames):
+        self.waiting.update(filenames)
+        self.progress.emit(len(self.waiting), self.chapter_manager.count())
+
+    def on_chapter_saved(self, filename, content):
+        self._queue(filename, self.chapter_manager.version(filename), content)
+
+    def _queue(self, filename, version, content):
+        self.waiting.add(filename)
+        self.worker.jobs.put(("chapter", filename, version, content))
+
+    def _store(self, filename, version, arrays, new_terms):
+        # New terms first: ids are handed out in order, even for chapters dropped below
+        for term in new_terms:
+            self.term_ids[term] = len(self.terms)
+            self.terms.append(term)
+        self.waiting.discard(filename)
+        if filename not in self.chapter_manager:
+            return
+        old = self.chapters.get(filename)
+        if old is not None:
+            self.total_words -= old[1]
+        self.chapters[filename] = (version,) + arrays
+        self.total_words += arrays[0]
+        self.dirty = True
+        self.save_timer.start()
+        self.progress.emit(len(self.waiting), self.chapter_manager.count())
+
+    def _on_idle(self):
+        # Chapters that could not be read are not waiting anymore either
+        self.waiting.clear()
+        self.progress.emit(0, self.chapter_manager.count())
+        self.updated.emit()
+
+    def search(self, query, limit=50):
+        """
+        Returns up to limit hits for the chapters containing every word of
+        query, best first: (filename, score, [(offset, length), ...]).
+        """
+        terms = list(dict.fromkeys(fold(m.group()) for m in TOKEN_PATTERN.finditer(query)))
+        term_ids = [self.term_ids.get(term) for term in terms]
+        if not terms or None in term_ids:
+            return []
+
+        # (filename, entry, [index of each term in entry's terms])
+        matches = []
+        frequencies = [0] * len(term_ids)
+        for filename, entry in self.chapters.items():
+            chapter_terms = entry[2]
+            found = []
+            for n, term_id in enumerate(term_ids):
+                i = bisect_left(chapter_terms, term_id)
+                if i < len(chapter_terms) and chapter_terms[i] == term_id:
+                    frequencies[n] += 1
+                    found.append(i)
+            if len(found) == len(term_ids):
+                matches.append((filename, entry, found))
+        if not matches:
+            return []
+
+        count = len(self.chapters)
+        average = self.total_words / count if count else 1
+        idfs = [math.log(1 + (count - df + 0.5) / (df + 0.5)) for df in frequencies]
+        scored = []
+        for filename, entry, found in matches:
+            starts = entry[3]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * entry[1] / average)
+            score = 0.0
+            for i, idf in zip(found, idfs):
+                tf = starts[i + 1] - starts[i]
+                score += idf * tf * (BM25_K1 + 1) / (tf + norm)
+            scored.append((score, filename, entry, found))
+        scored.sort(key=lambda hit: hit[0], reverse=True)
+
+        hits = []
+        for score, filename, entry, found in scored[:limit]:
+            starts = entry[3]
+            offsets = array('I')
+            offsets.frombytes(zlib.decompress(entry[4]))
+            positions = []
+            for i, term in zip(found, terms):
+                positions.extend((offset, len(term)) for offset in offsets[starts[i]:starts[i + 1]])
+            positions.sort()
+            hits.append((filename, score, positions))
+        return hits
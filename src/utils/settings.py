@@ -1,115 +1,133 @@
+"""
+Application settings, kept in memory.
+
+settings.json is parsed once, the first time Settings.instance() is asked
+for. Reading a setting is an attribute lookup; changing one updates
+memory, emits changed and starts a short timer, so a burst of changes is
+written once, atomically, after it ends (and on quit).
+"""
 import os
 import json
+from PyQt6.QtCore import QObject, QTimer, QCoreApplication, pyqtSignal
+
+from utils.logger import log_warning, log_error
 
 SETTINGS_FILE = "settings.json"
+# Layout of settings.json; files without a version are the flat layout of
+# the old load_/save_ functions, which version 1 keeps as is
+SETTINGS_VERSION = 1
+# Quiet time after the last change before settings.json is written
+SETTINGS_SAVE_DELAY_MS = 1000
 
-def load_theme_preference():
-    """Load theme preference from settings file"""
-    if os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                settings = json.load(f)
-                return settings.get('dark_mode', True)
-        except:
-            pass
-    return True  # Default to dark mode
-
-def save_theme_preference(is_dark):
-    """Save theme preference to settings file"""
-    settings = {}
-    if os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                settings = json.load(f)
-        except:
-            pass
-    
-    settings['dark_mode'] = is_dark
-    
-    with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(settings, f, indent=4)
-
-def load_ollama_url():
-    """Load Ollama API URL from settings file"""
-    if os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                settings = json.load(f)
-                return settings.get('ollama_url', 'http://localhost:11434/api/generate')
-        except:
-            pass
-    return 'http://localhost:11434/api/generate'  # Default URL
-
-def save_ollama_url(url):
-    """Save Ollama API URL to settings file"""
-    settings = {}
-    if os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                settings = json.load(f)
-        except:
-            pass
-    
-    settings['ollama_url'] = url
-    
-    with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(settings, f, indent=4)
-
-def load_ollama_model():
-    """Load selected Ollama model from settings file"""
-    if os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                settings = json.load(f)
-                return settings.get('ollama_model', None)
-        except:
-            pass
-    return None
-
-def save_ollama_model(model):
-    """Save selected Ollama model to settings file"""
-    settings = {}
-    if os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                settings = json.load(f)
-        except:
-            pass
-    
-    settings['ollama_model'] = model
-    
-    with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(settings, f, indent=4)
-
-def load_style_preference():
-    """Load style preferences (auto_mode, last_style)"""
-    default = {"auto_style": True, "last_style": "Normal"}
-    if os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                settings = json.load(f)
-                return {
-                    "auto_style": settings.get('auto_style', True),
-                    "last_style": settings.get('last_style', "Normal")
-                }
-        except:
-            pass
-    return default
-
-def save_style_preference(auto_style, last_style):
-    """Save style preferences"""
-    settings = {}
-    if os.path.exists(SETTINGS_FILE):
+DEFAULT_OLLAMA_URL = 'http://localhost:11434/api/generate'
+
+class Setting:
+    """Typed attribute of Settings, stored under its own name in settings.json"""
+
+    def __init__(self, kind, default):
+        self.kind = kind
+        self.default = default
+
+    def __set_name__(self, owner, name):
+        self.key = name
+
+    def __get__(self, settings, owner=None):
+        if settings is None:
+            return self
+        return settings.get(self.key)
+
+    def __set__(self, settings, value):
+        settings.set(self.key, value)
+
+    def accepts(self, value):
+        if value is None:
+            return self.default is None
+        if self.kind is bool:
+            return isinstance(value, bool)
+        return isinstance(value, self.kind) and not isinstance(value, bool)
+
+class Settings(QObject):
+    """In-memory settings with debounced write-behind (see module docstring)"""
+    changed = pyqtSignal(str, object)  # key, new value
+
+    dark_mode = Setting(bool, True)
+    ollama_url = Setting(str, DEFAULT_OLLAMA_URL)
+    ollama_model = Setting(str, None)
+    auto_style = Setting(bool, True)
+    last_style = Setting(str, "Normal")
+    prefetch_spellcheck = Setting(bool, True)
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, path=SETTINGS_FILE):
+        super().__init__()
+        self.path = path
+        self.schema = {name: value for name, value in vars(type(self)).items() if isinstance(value, Setting)}
+        # Every key of the file, unknown ones included, so they survive a save
+        self.values = self.load()
+        self.dirty = False
+
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(SETTINGS_SAVE_DELAY_MS)
+        self.save_timer.timeout.connect(self.save)
+        app = QCoreApplication.instance()
+        if app:
+            app.aboutToQuit.connect(self.save)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return {}
         try:
-            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                settings = json.load(f)
-        except:
-            pass
-    
-    settings['auto_style'] = auto_style
-    settings['last_style'] = last_style
-    
-    with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(settings, f, indent=4)
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            log_error(f"Error loading settings: {e}")
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        version = data.pop("version", 0)
+        if version > SETTINGS_VERSION:
+            log_warning(f"settings.json is from a newer version ({version}); unknown settings are kept")
+        return data
+
+    def get(self, key):
+        """Value of key, or its default if missing or of the wrong type"""
+        setting = self.schema[key]
+        value = self.values.get(key, setting.default)
+        return value if setting.accepts(value) else setting.default
 
+    def set(self, key, value):
+        setting = self.schema[key]
+        if not setting.accepts(value):
+            raise TypeError(f"Setting {key} expects {setting.kind.__name__}, got {value!r}")
+        if key in self.values and self.values[key] == value:
+            return
+        self.values[key] = value
+        self.dirty = True
+        self.save_timer.start()
+        self.changed.emit(key, value)
 
+    def save(self):
+        """Writes settings.json now if anything changed"""
+        self.save_timer.stop()
+        if not self.dirty:
+            return
+        data = {"version": SETTINGS_VERSION}
+        data.update(self.values)
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except Exception as e:
+            log_error(f"Error saving settings: {e}")
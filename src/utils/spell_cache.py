@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """Bounded, thread-safe LRU mapping with hit/miss counters"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Returns the cached value for key, or None if unknown"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Stores a value, evicting the least recently used key if full"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Forgets one key, or every key if none is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Returns hit/miss counters and current size"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+class WordVerdictCache(LRUCache):
+    """word -> misspelled verdict (True/False)"""
+
+    def __init__(self, max_size=50000):
+        super().__init__(max_size)
+
+class BlockResultCache(LRUCache):
+    """Block text hash -> list of misspelled (start, length) ranges"""
+
+    def __init__(self, max_size=20000):
+        super().__init__(max_size)
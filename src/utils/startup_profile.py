@@ -0,0 +1,137 @@
+"""
+Startup profiling: python KunoWriter.pyw --profile-startup
+
+enable() has to run before the app's own imports. From then on every
+module imported on the main thread is timed (inclusive, and without the
+imports it triggered), and step()/timed() time the initialization steps
+and widget constructions they wrap. The report is printed and logged once
+the main window paints for the first time.
+
+Without enable() step() and timed() only run what they wrap.
+"""
+import sys
+import time
+import builtins
+import threading
+import importlib.util
+from contextlib import contextmanager
+
+# Imports listed in the report, slowest first
+REPORT_IMPORTS = 25
+# Imports faster than this are only counted in the totals
+REPORT_MIN_MS = 1.0
+
+_enabled = False
+_started = None
+# (name, inclusive seconds, own seconds, depth)
+_imports = []
+# (label, seconds, depth), in the order the steps started
+_steps = []
+_import_stack = []
+_step_depth = 0
+_original_import = builtins.__import__
+
+def enable():
+    global _enabled, _started
+    if _enabled:
+        return
+    _enabled = True
+    _started = time.perf_counter()
+    builtins.__import__ = _timed_import
+
+def is_enabled():
+    return _enabled
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if threading.current_thread() is not threading.main_thread():
+        return _original_import(name, globals, locals, fromlist, level)
+    full_name = name
+    if level:
+        try:
+            full_name = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+        except (ImportError, ValueError):
+            pass
+    if full_name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    _import_stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = _import_stack.pop()
+        if _import_stack:
+            _import_stack[-1] += elapsed
+        _imports.append((full_name, elapsed, elapsed - children, len(_import_stack)))
+
+@contextmanager
+def step(label):
+    """Times the enclosed block as one initialization step"""
+    global _step_depth
+    if not _enabled:
+        yield
+        return
+    index = len(_steps)
+    _steps.append((label, 0.0, _step_depth))
+    _step_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _step_depth -= 1
+        _steps[index] = (label, time.perf_counter() - start, _step_depth)
+
+def timed(label, factory, *args, **kwargs):
+    """factory(*args, **kwargs), timed as a step"""
+    with step(label):
+        return factory(*args, **kwargs)
+
+def watch_first_paint(widget):
+    """Reports once widget has painted for the first time"""
+    if not _enabled:
+        return
+    from PyQt6.QtCore import QObject, QEvent, QTimer
+
+    class FirstPaint(QObject):
+        def eventFilter(self, watched, event):
+            if event.type() == QEvent.Type.Paint:
+                widget.removeEventFilter(self)
+                first_paint = time.perf_counter() - _started
+                # After the paint itself, not from inside it
+                QTimer.singleShot(0, lambda: report(first_paint))
+            return False
+
+    widget._first_paint_filter = FirstPaint(widget)
+    widget.installEventFilter(widget._first_paint_filter)
+
+def report(first_paint=None):
+    """Prints the timings gathered so far and logs them; returns the text"""
+    from utils.logger import log_info
+
+    top_level = sum(entry[1] for entry in _imports if entry[3] == 0)
+    lines = ["", "Startup profile", "=" * 60]
+    if first_paint is not None:
+        lines.append(f"First paint:            {first_paint * 1000:9.1f} ms after enable()")
+    lines.append(f"Imports (main thread):  {top_level * 1000:9.1f} ms, {len(_imports)} modules")
+
+    lines += ["", "Initialization steps                           ms"]
+    for label, seconds, depth in _steps:
+        lines.append(f"  {'  ' * depth}{label:<{44 - 2 * depth}} {seconds * 1000:7.1f}")
+
+    slowest = sorted(_imports, key=lambda entry: entry[1], reverse=True)
+    slowest = [entry for entry in slowest if entry[1] * 1000 >= REPORT_MIN_MS][:REPORT_IMPORTS]
+    lines += ["", "Slowest imports                     total ms   own ms"]
+    for name, inclusive, own, depth in slowest:
+        lines.append(f"  {name:<34} {inclusive * 1000:8.1f} {own * 1000:8.1f}")
+    text = "\n".join(lines)
+    print(text)
+
+    log_info(
+        "Startup profile",
+        first_paint_ms=round(first_paint * 1000, 1) if first_paint is not None else None,
+        imports_ms=round(top_level * 1000, 1),
+        steps={label: round(seconds * 1000, 1) for label, seconds, _ in _steps},
+        imports={name: round(inclusive * 1000, 1) for name, inclusive, _, _ in slowest},
+    )
+    return text
@@ -0,0 +1,122 @@
+"""
+Converts a project between the folder layout (chapters/, chapters.json,
+notes.txt, ...) and the single-file layout (project.db). Run it with the
+project closed, from the src folder:
+
+    python -m utils.storage_migration to-sqlite <project folder>
+    python -m utils.storage_migration to-folder <project folder>
+
+The new layout is written completely before the old one is moved aside
+into <project>/.kuno/backup-<time>/, so an interrupted migration leaves
+the project as it was.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+
+from utils.project_manager import META_DIR
+from utils.project_database import DATABASE_FILE, ProjectDatabase, database_path, has_database
+from utils.chapter_manager import ChapterManager, MANIFEST_FILE, MANIFEST_VERSION, file_stamp
+
+# Project files stored in the database's content table
+PROJECT_FILES = ("draft.txt", "notes.txt", "characters.json")
+
+def _backup_folder(project_path):
+    folder = os.path.join(project_path, META_DIR, time.strftime("backup-%Y%m%d-%H%M%S"))
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+def migrate_to_database(project_path):
+    """Folder layout -> project.db. Returns the number of chapters migrated"""
+    if has_database(project_path):
+        raise ValueError(f"{project_path} already has a {DATABASE_FILE}")
+
+    chapter_manager = ChapterManager(project_path)
+    chapter_manager.close()
+    entries = []
+    for entry in chapter_manager._order:
+        with open(os.path.join(chapter_manager.chapters_dir, entry["file"]), 'r', encoding='utf-8') as f:
+            entries.append(dict(entry, content=f.read()))
+
+    tmp_path = database_path(project_path) + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    database = ProjectDatabase(tmp_path)
+    try:
+        # One transaction for the whole project
+        with database.batch():
+            database.insert_chapters(entries)
+            database.set_meta("next_id", chapter_manager._next_id)
+            for name in PROJECT_FILES:
+                path = os.path.join(project_path, name)
+                if os.path.exists(path):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        data = f.read()
+                    database.save_content(name, json.loads(data) if name.endswith('.json') else data)
+    finally:
+        # Closing the last connection folds the WAL back into the file
+        database.close()
+    os.replace(tmp_path, database_path(project_path))
+
+    backup = _backup_folder(project_path)
+    for name in ("chapters", MANIFEST_FILE) + PROJECT_FILES:
+        path = os.path.join(project_path, name)
+        if os.path.exists(path):
+            shutil.move(path, os.path.join(backup, name))
+    return len(entries)
+
+def migrate_to_folder(project_path):
+    """project.db -> folder layout. Returns the number of chapters migrated"""
+    if not has_database(project_path):
+        raise ValueError(f"{project_path} has no {DATABASE_FILE}")
+    chapters_dir = os.path.join(project_path, "chapters")
+    if os.path.exists(chapters_dir) and os.listdir(chapters_dir):
+        raise ValueError(f"{chapters_dir} is not empty")
+
+    database = ProjectDatabase(database_path(project_path))
+    try:
+        entries = database.chapters()
+        os.makedirs(chapters_dir, exist_ok=True)
+        for entry in entries:
+            with open(os.path.join(chapters_dir, entry["file"]), 'w', encoding='utf-8') as f:
+                f.write(database.chapter_text(entry["file"]))
+            entry.update(file_stamp(os.path.join(chapters_dir, entry["file"])))
+        for name in database.content_names():
+            data = database.load_content(name)
+            with open(os.path.join(project_path, name), 'w', encoding='utf-8') as f:
+                if name.endswith('.json'):
+                    json.dump(data, f, indent=4)
+                else:
+                    f.write(data)
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "next_id": database.get_meta("next_id", len(entries) + 1),
+            "chapters": entries
+        }
+        with open(os.path.join(project_path, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=4, ensure_ascii=False)
+    finally:
+        database.close()
+
+    shutil.move(database_path(project_path), os.path.join(_backup_folder(project_path), DATABASE_FILE))
+    return len(entries)
+
+def main():
+    if len(sys.argv) != 3 or sys.argv[1] not in ("to-sqlite", "to-folder"):
+        print(__doc__)
+        return 2
+    from PyQt6.QtCore import QCoreApplication
+    app = QCoreApplication(sys.argv)
+    migrate = migrate_to_database if sys.argv[1] == "to-sqlite" else migrate_to_folder
+    try:
+        count = migrate(os.path.abspath(sys.argv[2]))
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"{count} chapters migrated")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
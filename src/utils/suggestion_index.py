@@ -0,0 +1,266 @@
+"""
+Symmetric-delete (SymSpell) suggestion index over the dictionary snapshot.
+
+Words are accent-folded ("canción" -> "cancion") and the first PREFIX_LENGTH
+characters of each folded word are indexed under every string reachable by
+deleting up to INDEX_DISTANCE characters. A query generates deletes of its
+own prefix (up to QUERY_DISTANCE) and only the words sharing one of those
+keys are verified with a bounded Damerau-Levenshtein distance.
+
+The index is written next to the .dic file as <base>.suggest and memory-mapped,
+validated against the same source metadata as the snapshot:
+
+    magic, version, metadata length     (struct HEADER)
+    metadata JSON
+    entries table     folded word + "\\0" + its spellings, by word id
+    keys table        sorted delete keys
+    postings table    uint32 word ids per key (same order as keys)
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import time
+from array import array
+
+from utils.dictionary_snapshot import (
+    HEADER, MappedTable, write_table, source_info, sources_match,
+    DictionarySnapshot, compile_snapshot
+)
+from utils.spell_cache import LRUCache
+
+MAGIC = b"KWSI"
+INDEX_VERSION = 1
+PREFIX_LENGTH = 7
+INDEX_DISTANCE = 1
+QUERY_DISTANCE = 2
+MAX_DISTANCE = 2
+
+# Accents and ñ are folded for candidate search and scored separately
+FOLD_TABLE = str.maketrans('áéíóúüñÁÉÍÓÚÜÑ', 'aeiouunAEIOUUN')
+
+def fold(word):
+    return word.lower().translate(FOLD_TABLE)
+
+def index_path(base_path):
+    """Returns the suggestion index file for a dictionary base path"""
+    return base_path + ".suggest"
+
+def _deletes(word, distance):
+    """word plus every string obtained by deleting up to distance characters"""
+    found = {word}
+    frontier = [word]
+    for _ in range(distance):
+        next_frontier = []
+        for current in frontier:
+            for i in range(len(current)):
+                candidate = current[:i] + current[i + 1:]
+                if candidate not in found:
+                    found.add(candidate)
+                    next_frontier.append(candidate)
+        frontier = next_frontier
+    return found
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance, or max_distance + 1 once exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_best = i
+        ai = a[i - 1]
+        for j in range(1, len(b) + 1):
+            cost = 0 if ai == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and j > 1 and ai == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            if value < row_best:
+                row_best = value
+        if row_best > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+def _accent_distance(original, word):
+    """Positions that differ only by accent/case-folded letters, as a tie-breaker"""
+    return sum(1 for x, y in zip(original.lower(), word.lower()) if x != y)
+
+def compile_index(base_path, words=None):
+    """Builds <base_path>.suggest from the snapshot (or the given words)"""
+    if words is None:
+        snapshot = DictionarySnapshot.open(base_path)
+        if snapshot is None:
+            raise FileNotFoundError(f"No valid snapshot for {base_path}")
+        words = list(snapshot.words())
+        snapshot.close()
+
+    # Group spellings by folded form: cancion -> [canción]
+    entry_ids = {}
+    entries = []
+    for word in words:
+        folded = fold(word)
+        entry_id = entry_ids.get(folded)
+        if entry_id is None:
+            entry_ids[folded] = len(entries)
+            entries.append([folded])
+            entry_id = len(entries) - 1
+        entries[entry_id].append(word)
+
+    postings = {}
+    for entry_id, entry in enumerate(entries):
+        for key in _deletes(entry[0][:PREFIX_LENGTH], INDEX_DISTANCE):
+            ids = postings.get(key)
+            if ids is None:
+                postings[key] = array('I', (entry_id,))
+            else:
+                ids.append(entry_id)
+
+    keys = sorted(postings)
+    metadata = json.dumps({
+        "version": INDEX_VERSION,
+        "prefix_length": PREFIX_LENGTH,
+        "index_distance": INDEX_DISTANCE,
+        "entries": len(entries),
+        "keys": len(keys),
+        "sources": {
+            "dic": source_info(base_path + ".dic"),
+            "aff": source_info(base_path + ".aff")
+        }
+    }).encode('utf-8')
+
+    path = index_path(base_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, INDEX_VERSION, len(metadata)))
+        f.write(metadata)
+        write_table(f, ["\0".join(entry).encode('utf-8') for entry in entries])
+        write_table(f, [key.encode('utf-8') for key in keys])
+        write_table(f, [postings[key].tobytes() for key in keys])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+class SuggestionIndex:
+    """Memory-mapped SymSpell index answering top-N suggestions"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, meta_len = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != INDEX_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported suggestion index format: {path}")
+
+        meta_start = HEADER.size
+        self.metadata = json.loads(self._map[meta_start:meta_start + meta_len])
+        self._entries = MappedTable(self._map, meta_start + meta_len)
+        self._keys = MappedTable(self._map, self._entries.end)
+        self._postings = MappedTable(self._map, self._keys.end)
+        # Auto-correct and the context menu often ask for the same word
+        self._recent = LRUCache(2000)
+
+    @classmethod
+    def open(cls, base_path):
+        """Returns the index for base_path, or None if missing or out of date"""
+        path = index_path(base_path)
+        if not os.path.exists(path):
+            return None
+        try:
+            index = cls(path)
+        except (ValueError, OSError, struct.error):
+            return None
+        if not sources_match(index.metadata.get("sources", {}), base_path):
+            index.close()
+            return None
+        return index
+
+    def close(self):
+        self._map.close()
+
+    def _candidates(self, prefix, deadline):
+        """Yields word ids sharing a delete key with prefix, closest keys first"""
+        seen = set()
+        keys = sorted(_deletes(prefix, QUERY_DISTANCE), key=len, reverse=True)
+        for key in keys:
+            if time.perf_counter() > deadline:
+                return
+            position = self._keys.find(key.encode('utf-8'))
+            if position < 0:
+                continue
+            ids = array('I')
+            ids.frombytes(self._postings[position])
+            for entry_id in ids:
+                if entry_id not in seen:
+                    seen.add(entry_id)
+                    yield entry_id
+
+    def suggest(self, word, limit=5, budget=0.02):
+        """
+        Returns up to limit suggestions ranked by folded edit distance, then
+        accent differences. Stops verifying candidates once budget seconds
+        have passed and returns the best found so far.
+        """
+        cached = self._recent.get((word, limit))
+        if cached is not None:
+            return list(cached)
+
+        deadline = time.perf_counter() + budget
+        folded = fold(word)
+        scored = []
+
+        for entry_id in self._candidates(folded[:PREFIX_LENGTH], deadline):
+            if time.perf_counter() > deadline:
+                break
+            entry = self._entries[entry_id].decode('utf-8').split("\0")
+            candidate = entry[0]
+            distance = edit_distance(folded, candidate, MAX_DISTANCE)
+            if distance > MAX_DISTANCE:
+                continue
+            for spelling in entry[1:]:
+                if spelling == word:
+                    continue
+                scored.append((
+                    distance, _accent_distance(spelling, word),
+                    spelling[:1].isupper() != word[:1].isupper(),
+                    abs(len(spelling) - len(word)), spelling
+                ))
+
+        scored.sort()
+        suggestions = []
+        for *_, spelling in scored:
+            if word[:1].isupper():
+                spelling = spelling[:1].upper() + spelling[1:]
+            if spelling not in suggestions and spelling != word:
+                suggestions.append(spelling)
+            if len(suggestions) == limit:
+                break
+        self._recent.put((word, limit), tuple(suggestions))
+        return suggestions
+
+def compile_dictionary_files(base_path, dictionary=None):
+    """Rebuilds the snapshot and/or suggestion index if missing or stale"""
+    snapshot = DictionarySnapshot.open(base_path)
+    if snapshot is None:
+        compile_snapshot(base_path, dictionary)
+    else:
+        snapshot.close()
+
+    index = SuggestionIndex.open(base_path)
+    if index is None:
+        compile_index(base_path)
+    else:
+        index.close()
+
+if __name__ == "__main__":
+    # python -m utils.suggestion_index [base_path]
+    base = os.path.normpath(sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(__file__), "..", "..", "diccionarios", "es"))
+    compile_dictionary_files(base)
+    print(f"Dictionary files up to date: {index_path(base)}")
@@ -0,0 +1,75 @@
+import os
+import re
+
+from utils.logger import log_error
+
+USER_DICTIONARY_FILE = "dictionary.txt"
+NAME_WORD_PATTERN = re.compile(r'[a-zA-ZáéíóúÁÉÍÓÚñÑüÜ]+')
+
+class UserDictionary:
+    """
+    Words accepted by the spellchecker for one project.
+    Added words persist in <project>/dictionary.txt (one per line);
+    character names are seeded from characters.json and kept in memory.
+    """
+
+    def __init__(self, project_path=None):
+        self.path = os.path.join(project_path, USER_DICTIONARY_FILE) if project_path else None
+        self.words = set()
+        self.names = set()
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.words = {line.strip() for line in f if line.strip()}
+        except Exception as e:
+            log_error(f"Error loading user dictionary: {e}")
+
+    def save(self):
+        """Writes the words atomically (temp file, fsync, rename), so a crash never truncates them"""
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write("".join(f"{word}\n" for word in sorted(self.words)))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            log_error(f"Error saving user dictionary: {e}")
+
+    def __contains__(self, word):
+        if word in self.words or word in self.names:
+            return True
+        # "Kuno" at the start of a sentence when "kuno" was added
+        lower = word.lower()
+        return lower != word and (lower in self.words or lower in self.names)
+
+    def add(self, word):
+        """Adds and persists word; returns False if it was already there"""
+        if word in self.words:
+            return False
+        self.words.add(word)
+        self.save()
+        return True
+
+    def remove(self, word):
+        """Removes and persists word; returns False if it was not there"""
+        if word not in self.words:
+            return False
+        self.words.discard(word)
+        self.save()
+        return True
+
+    def set_names(self, names):
+        """Replaces the seeded character names; returns the words that changed"""
+        new_names = set()
+        for name in names:
+            new_names.update(NAME_WORD_PATTERN.findall(name))
+        changed = new_names ^ self.names
+        self.names = new_names
+        return changed